@@ -68,6 +68,38 @@ document.addEventListener('DOMContentLoaded', function() {
                 </div>
             `;
 
+            // Hinweis, wenn der Job auf eine Rückfallstufe ausweichen musste (fehlt in älteren prediction.json-Dateien)
+            const degradationNotes = {
+                cached_features: 'Berechnet aus zwischengespeicherten Daten (aktueller Abruf fehlgeschlagen).',
+                last_forecast: 'Vorhersage vom letzten erfolgreichen Lauf übernommen.',
+                climatology: 'Keine Modellvorhersage verfügbar: langjährige Normalwerte.',
+                unavailable: 'Keine Vorhersage verfügbar.'
+            };
+            if (data.degradation && degradationNotes[data.degradation.level]) {
+                forecastDiv.innerHTML += `<p class="degradation-note">${degradationNotes[data.degradation.level]}</p>`;
+            }
+
+            // Mehrtagesvorhersage (optional, fehlt in älteren prediction.json-Dateien)
+            if (Array.isArray(data.horizon) && data.horizon.length > 0) {
+                const rows = data.horizon.map(day => `
+                    <tr>
+                        <td>${day.date}</td>
+                        <td>${formatValue(day.rf_temp_c, '°C')}</td>
+                        <td>${formatValue(day.rf_wspd_kmh, ' km/h')}</td>
+                        <td>${formatValue(day.xgb_temp_c, '°C')}</td>
+                        <td>${formatValue(day.xgb_wspd_kmh, ' km/h')}</td>
+                    </tr>`).join('');
+                forecastDiv.innerHTML += `
+                    <div class="prediction-box">
+                        <h3>Nächste ${data.horizon.length} Tage</h3>
+                        <table class="horizon-table">
+                            <tr><th>Datum</th><th>RF Temp.</th><th>RF Wind</th><th>XGB Temp.</th><th>XGB Wind</th></tr>
+                            ${rows}
+                        </table>
+                    </div>
+                `;
+            }
+
             // Aktualisiere den Zeitstempel des letzten Updates
             try {
                 // Versuche, das Datum aus dem ISO-Format zu parsen
@@ -1,40 +1,40 @@
-import os
 import sys
-import subprocess
 from rich.console import Console
 
+from cli import Session, run_command
+
 console = Console()
 
-MODEL_SAVE_DIR = "../saved_models"
-predict_script = "update_prediction_data.py"
+# Menüpunkt -> (Text, Befehl für cli.run_command)
+MENU = {
+    "1": ("Modell trainieren", ["train"]),
+    "2": ("Gespeicherte Modelle für die Vorhersage benutzen", ["predict"]),
+    "3": ("Modelle auf dem Testzeitraum bewerten", ["evaluate"]),
+    "4": ("Hyperparameter tunen", ["tune"]),
+    "5": ("Vorhersagedienst starten (Strg+C kehrt zum Menü zurück)", ["serve"]),
+}
 
 
 def main_menu():
+    # Alle Befehle laufen in diesem Prozess; Modelle und Daten bleiben zwischen den Menüpunkten geladen
+    session = Session(console)
+    exit_choice = str(len(MENU) + 1)
     while True:
         console.print("\n[bold cyan]MeteoFlow App Menü[/bold cyan]")
-        console.print("1. Modell trainieren")
-        console.print("2. Gespeicherte Modelle für die Vorhersage benutzen")
-        console.print("3. Programm beenden")
-        choice = input("\nBitte wähle eine Option (1-3): ")
+        for key, (text, _) in MENU.items():
+            console.print(f"{key}. {text}")
+        console.print(f"{exit_choice}. Programm beenden")
+        choice = input(f"\nBitte wähle eine Option (1-{exit_choice}): ")
 
-        if choice == "1":
-            main_script_path = "main.py"
-            console.print("\n[green]Starte Training...[/green]\n")
-            try:
-                subprocess.run([sys.executable, main_script_path], check=False)
-            except Exception as e:
-                console.print(f"[red]Fehler beim Ausführen von main.py: {e}[/red]")
-        elif choice == "2":
-            console.print(f"\n[green]Starte Vorhersage")
-            try:
-                subprocess.run([sys.executable, predict_script], check=False)
-            except Exception as e:
-                console.print(f"[red]Fehler beim Ausführen von {predict_script}: {e}[/red]")
-        elif choice == "3":
+        if choice in MENU:
+            text, command = MENU[choice]
+            console.print(f"\n[green]{text}...[/green]\n")
+            run_command(session, command)
+        elif choice == exit_choice:
             console.print("[bold magenta]Programm wird beendet.[/bold magenta]")
             sys.exit(0)
         else:
-            console.print("[red]Ungültige Eingabe. Bitte wähle 1, 2 oder 3.[/red]")
+            console.print(f"[red]Ungültige Eingabe. Bitte wähle eine Zahl von 1 bis {exit_choice}.[/red]")
 
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    main_menu()
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Läuft in einem frischen Interpreter, damit Ladezeit und Speicher nicht vom Elternprozess verfälscht werden
+_CHILD_CODE = r"""
+import os, sys, json, time, resource
+import numpy as np
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+variant, paths, n_features = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3])
+row = np.random.default_rng(0).normal(10, 5, (1, n_features)).astype(np.float32)
+
+if variant.startswith("joblib"):
+    import joblib, sklearn.ensemble, xgboost  # Bibliotheksimport nicht in die Ladezeit einrechnen
+    before = rss_mb()
+    t0 = time.perf_counter()
+    models = {name: joblib.load(path) for name, path in paths.items()}
+else:
+    from flat_trees import load_flat_models
+    before = rss_mb()
+    t0 = time.perf_counter()
+    models = load_flat_models(paths["flat"], mmap_mode="r" if variant == "flat_mmap" else None)
+load_seconds = time.perf_counter() - t0
+after_load = rss_mb()
+t0 = time.perf_counter()
+for model in models.values():
+    model.predict(row)
+predict_seconds = time.perf_counter() - t0
+after_predict = rss_mb()
+print(json.dumps({
+    "load_ms": load_seconds * 1000,
+    "predict_ms": predict_seconds * 1000,
+    "rss_load_mb": after_load - before,
+    "rss_predict_mb": after_predict - before,
+}))
+"""
+
+
+def _measure(variant: str, paths: dict, n_features: int, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", _CHILD_CODE, variant, json.dumps(paths), str(n_features)],
+            cwd=_THIS_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Messung für {variant} fehlgeschlagen:\n{result.stderr[-2000:]}")
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    runs.sort(key=lambda r: r["load_ms"])
+    return runs[len(runs) // 2]
+
+
+def _train_synthetic_models(n_rows: int, n_features: int) -> dict:
+    """Trainiert RF/XGB mit den Parametern aus config.py auf Zufallsdaten (wenn keine Modelle vorliegen)."""
+    import numpy as np
+    from model_training import build_models
+
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    X = rng.normal(size=(n_rows, n_features))
+    y = np.column_stack([X[:, :5].sum(axis=1), X[:, 5:10].sum(axis=1)]) + rng.normal(size=(n_rows, 2))
+    models = build_models({**config.RF_PARAMETER, "n_jobs": -1}, {**config.XGB_PARAMETER, "n_jobs": -1})
+    for model in models.values():
+        model.fit(X, y)
+    return models
+
+
+def run_report(models: dict, n_features: int, work_dir: str, repeat: int = 3) -> list[dict]:
+    """Speichert die Modelle in allen Varianten und misst Dateigröße, Ladezeit und Speicher."""
+    import joblib
+    from flat_trees import save_flat_models
+
+    variants = {}
+    for compress, variant in ((0, "joblib"), (3, "joblib_zlib3")):
+        paths = {}
+        for name, model in models.items():
+            paths[name] = os.path.join(work_dir, f"{name}_{variant}.joblib")
+            joblib.dump(model, paths[name], compress=compress)
+        variants[variant] = paths
+    raw_path = os.path.join(work_dir, "flat_raw.mfa")
+    zlib_path = os.path.join(work_dir, "flat_zlib.mfa")
+    save_flat_models(models, raw_path, compress=False)
+    save_flat_models(models, zlib_path, compress=True)
+    variants["flat_mmap"] = {"flat": raw_path}
+    variants["flat_read"] = {"flat": raw_path}
+    variants["flat_zlib"] = {"flat": zlib_path}
+
+    rows = []
+    for variant, paths in variants.items():
+        measured = _measure(variant, paths, n_features, repeat)
+        measured["variant"] = variant
+        measured["size_mb"] = sum(os.path.getsize(p) for p in paths.values()) / 2**20
+        rows.append(measured)
+    return rows
+
+
+def print_report(rows: list[dict], console: Console):
+    table = Table(title="Modell-Artefakte: Größe, Ladezeit und Speicher (RF + XGB)")
+    for column in ["Variante", "Datei (MB)", "Laden (ms)", "RSS nach Laden (MB)", "RSS nach Predict (MB)", "Predict 1 Zeile (ms)"]:
+        table.add_column(column, justify="right")
+    for row in rows:
+        table.add_row(
+            row["variant"], f"{row['size_mb']:.1f}", f"{row['load_ms']:.1f}",
+            f"{row['rss_load_mb']:.1f}", f"{row['rss_predict_mb']:.1f}", f"{row['predict_ms']:.2f}",
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht joblib- und Flat-Artefakte (Größe, Ladezeit, Speicher).")
+    parser.add_argument("--model-dir", default=config.MODEL_SAVE_DIR,
+                        help="Verzeichnis mit rf_model.joblib und xgb_model.joblib")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Modelle mit den config-Parametern auf Zufallsdaten trainieren statt zu laden")
+    parser.add_argument("--rows", type=int, default=7000, help="Zeilen für --synthetic (≈ 20 Jahre)")
+    parser.add_argument("--features", type=int, default=47, help="Features für --synthetic")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    console = Console()
+    if args.synthetic:
+        console.print(f"[cyan]Trainiere Modelle auf {args.rows} x {args.features} Zufallsdaten...[/cyan]")
+        models = _train_synthetic_models(args.rows, args.features)
+        n_features = args.features
+    else:
+        from model_manager import load_model
+        models = {
+            name: load_model(os.path.join(args.model_dir, f"{name}_model.joblib"), console)
+            for name in ("rf", "xgb")
+        }
+        if any(model is None for model in models.values()):
+            console.print("[red]FEHLER: rf_model.joblib und xgb_model.joblib werden benötigt (oder --synthetic).[/red]")
+            sys.exit(1)
+        n_features = models["xgb"].n_features_in_
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        rows = run_report(models, n_features, work_dir, args.repeat)
+    print_report(rows, console)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from data_splitting import get_feature_target_columns
+from model_training import build_models
+
+# Daten für die Worker-Prozesse; werden einmal pro Prozess im Initializer gesetzt,
+# damit nicht jedes Fenster den kompletten Datensatz erneut pickeln muss.
+_WORKER_STATE = {}
+
+
+def make_backtest_windows(
+    n_samples: int,
+    test_days: int,
+    retrain_every: int,
+    window: str = "expanding",
+    train_window_days: int | None = None,
+) -> list[tuple[int, int, int, int]]:
+    """
+    Erstellt die Walk-Forward-Fenster als Positionsindizes.
+
+    Die letzten `test_days` Zeilen werden in Blöcke von `retrain_every` Tagen
+    aufgeteilt. Vor jedem Block wird neu trainiert, entweder auf der gesamten
+    Historie ('expanding') oder auf den letzten `train_window_days` Tagen ('sliding').
+
+    Returns:
+        Liste von (train_start, train_end, test_start, test_end), Enden exklusiv.
+    """
+    if window not in ("expanding", "sliding"):
+        raise ValueError(f"Unbekannter Fenstertyp '{window}'. Erlaubt: 'expanding', 'sliding'.")
+    if retrain_every < 1:
+        raise ValueError("retrain_every muss mindestens 1 Tag sein.")
+    if n_samples <= test_days:
+        raise ValueError(
+            f"Nicht genügend Daten ({n_samples} Zeilen) für {test_days} Testtage im Backtest."
+        )
+    if window == "sliding" and not train_window_days:
+        raise ValueError("Für 'sliding' muss train_window_days gesetzt sein.")
+
+    windows = []
+    first_test = n_samples - test_days
+    for test_start in range(first_test, n_samples, retrain_every):
+        test_end = min(test_start + retrain_every, n_samples)
+        train_start = 0 if window == "expanding" else max(0, test_start - train_window_days)
+        windows.append((train_start, test_start, test_start, test_end))
+    return windows
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, rf_parameter: dict, xgb_parameter: dict):
+    _WORKER_STATE["X"] = X
+    _WORKER_STATE["y"] = y
+    _WORKER_STATE["rf_parameter"] = rf_parameter
+    _WORKER_STATE["xgb_parameter"] = xgb_parameter
+
+
+def _run_window(window: tuple[int, int, int, int]) -> dict:
+    """Trainiert alle Modelle auf einem Fenster und sagt den Folgeblock in einem predict-Aufruf vorher."""
+    train_start, train_end, test_start, test_end = window
+    X, y = _WORKER_STATE["X"], _WORKER_STATE["y"]
+    X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+    X_test = X[test_start:test_end]
+
+    result = {"window": window, "predictions": {}, "fit_seconds": {}, "predict_seconds": {}}
+    models = build_models(_WORKER_STATE["rf_parameter"], _WORKER_STATE["xgb_parameter"])
+    for model_name, model in models.items():
+        t0 = time.perf_counter()
+        model.fit(X_train, y_train)
+        t1 = time.perf_counter()
+        y_pred = model.predict(X_test)
+        t2 = time.perf_counter()
+        if y_pred.ndim == 1:
+            y_pred = y_pred.reshape(-1, 1)
+        result["predictions"][model_name] = y_pred
+        result["fit_seconds"][model_name] = t1 - t0
+        result["predict_seconds"][model_name] = t2 - t1
+    return result
+
+
+def walk_forward_backtest(
+    data_featured: pd.DataFrame,
+    retrain_every: int,
+    rf_parameter: dict = config.RF_PARAMETER,
+    xgb_parameter: dict = config.XGB_PARAMETER,
+    test_days: int = config.TEST_PERIOD_DAYS,
+    window: str = config.BACKTEST_WINDOW,
+    train_window_days: int | None = config.BACKTEST_TRAIN_WINDOW_DAYS,
+    n_workers: int = config.BACKTEST_WORKERS,
+    console: Console | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simuliert den operativen Betrieb: alle `retrain_every` Tage neu trainieren,
+    dann die folgenden Tage vorhersagen. Unabhängige Fenster laufen parallel in Prozessen.
+
+    Returns:
+        errors: Fehler pro Tag im Long-Format (Index: Datum; Spalten: window, model, target, y_true, y_pred, error).
+        windows: Rechenaufwand pro Fenster und Modell (Trainings-/Vorhersagezeit, Anzahl Samples).
+    """
+    console = console or Console()
+    features_cols, target_cols = get_feature_target_columns(data_featured)
+    X = data_featured[features_cols].to_numpy(dtype=np.float64)
+    y = data_featured[target_cols].to_numpy(dtype=np.float64)
+    dates = data_featured.index
+
+    windows = make_backtest_windows(len(data_featured), test_days, retrain_every, window, train_window_days)
+    n_workers = max(1, min(n_workers, len(windows)))
+    console.print(
+        f"   Backtest: {len(windows)} Fenster ({window}, Retrain alle {retrain_every} Tage) auf {n_workers} Prozess(en)..."
+    )
+
+    if n_workers == 1:
+        _init_worker(X, y, rf_parameter, xgb_parameter)
+        results = [_run_window(w) for w in windows]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(X, y, rf_parameter, xgb_parameter),
+        ) as executor:
+            results = list(executor.map(_run_window, windows))
+
+    error_frames = []
+    window_rows = []
+    n_targets = len(target_cols)
+    for window_id, result in enumerate(results):
+        train_start, train_end, test_start, test_end = result["window"]
+        y_true = y[test_start:test_end]
+        n_days = test_end - test_start
+        for model_name, y_pred in result["predictions"].items():
+            # Long-Format in einem Schritt: Tage x Targets flach ausrollen
+            error_frames.append(pd.DataFrame(
+                {
+                    "window": window_id,
+                    "model": model_name,
+                    "target": np.tile(target_cols, n_days),
+                    "y_true": y_true.ravel(),
+                    "y_pred": y_pred.ravel(),
+                    "error": (y_pred - y_true).ravel(),
+                },
+                index=dates[test_start:test_end].repeat(n_targets),
+            ))
+            window_rows.append({
+                "window": window_id,
+                "model": model_name,
+                "train_start": dates[train_start],
+                "test_start": dates[test_start],
+                "train_samples": train_end - train_start,
+                "test_samples": n_days,
+                "fit_seconds": result["fit_seconds"][model_name],
+                "predict_seconds": result["predict_seconds"][model_name],
+            })
+
+    errors = pd.concat(error_frames)
+    errors.index.name = "time"
+    return errors, pd.DataFrame(window_rows)
+
+
+def summarize_backtest(errors: pd.DataFrame, windows: pd.DataFrame, retrain_every: int, wall_seconds: float) -> pd.DataFrame:
+    """Verdichtet die Tagesfehler zu MAE/RMSE/Bias pro Modell und Target plus Rechenaufwand."""
+    grouped = errors.groupby(["model", "target"])["error"]
+    summary = pd.DataFrame({
+        "MAE": grouped.apply(lambda e: e.abs().mean()),
+        "RMSE": grouped.apply(lambda e: np.sqrt((e ** 2).mean())),
+        "Bias": grouped.mean(),
+    }).reset_index()
+    cost = windows.groupby("model").agg(
+        n_windows=("window", "nunique"),
+        fit_seconds=("fit_seconds", "sum"),
+        predict_seconds=("predict_seconds", "sum"),
+    ).reset_index()
+    summary = summary.merge(cost, on="model")
+    summary.insert(0, "retrain_every", retrain_every)
+    summary["wall_seconds"] = wall_seconds
+    return summary
+
+
+def compare_retrain_frequencies(
+    data_featured: pd.DataFrame,
+    retrain_days: list[int] = config.BACKTEST_RETRAIN_DAYS,
+    console: Console | None = None,
+    **backtest_kwargs,
+) -> tuple[pd.DataFrame, dict[int, pd.DataFrame]]:
+    """Führt den Backtest für mehrere Retrain-Intervalle aus und stellt Genauigkeit und Aufwand gegenüber."""
+    console = console or Console()
+    summaries = []
+    all_errors = {}
+    for retrain_every in retrain_days:
+        t0 = time.perf_counter()
+        errors, windows = walk_forward_backtest(
+            data_featured, retrain_every=retrain_every, console=console, **backtest_kwargs
+        )
+        wall_seconds = time.perf_counter() - t0
+        all_errors[retrain_every] = errors
+        summaries.append(summarize_backtest(errors, windows, retrain_every, wall_seconds))
+    return pd.concat(summaries, ignore_index=True), all_errors
+
+
+def print_backtest_summary(summary: pd.DataFrame, console: Console):
+    table = Table(title="Walk-Forward-Backtest: Genauigkeit vs. Rechenaufwand")
+    for column in ["Retrain (Tage)", "Modell", "Target", "MAE", "RMSE", "Bias", "Fenster", "Fit (s)", "Predict (s)", "Wall (s)"]:
+        table.add_column(column, justify="right")
+    for row in summary.itertuples(index=False):
+        table.add_row(
+            str(row.retrain_every), row.model, row.target,
+            f"{row.MAE:.2f}", f"{row.RMSE:.2f}", f"{row.Bias:+.2f}",
+            str(row.n_windows), f"{row.fit_seconds:.1f}", f"{row.predict_seconds:.2f}", f"{row.wall_seconds:.1f}",
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-Forward-Backtest mit periodischem Retraining.")
+    parser.add_argument("--retrain-every", type=int, nargs="+", default=config.BACKTEST_RETRAIN_DAYS,
+                        help="Retrain-Intervalle in Tagen, die verglichen werden.")
+    parser.add_argument("--window", choices=["expanding", "sliding"], default=config.BACKTEST_WINDOW)
+    parser.add_argument("--train-window-days", type=int, default=config.BACKTEST_TRAIN_WINDOW_DAYS)
+    parser.add_argument("--test-days", type=int, default=config.TEST_PERIOD_DAYS)
+    parser.add_argument("--workers", type=int, default=config.BACKTEST_WORKERS)
+    args = parser.parse_args()
+
+    console = Console()
+    console.rule("[bold purple4]Walk-Forward-Backtest[/bold purple4]")
+
+    # Import hier, damit das Modul ohne Meteostat-Zugriff importierbar bleibt
+    from dataset import load_featured_data
+    from climatology import load_climatology
+    from model_registry import current_model_dir
+    # dieselben Anomalie-Features wie die aktuellen Modelle
+    data_featured = load_featured_data(console, load_climatology(current_model_dir(config.MODEL_SAVE_DIR)))
+    if data_featured is None:
+        console.print("[bold red]Keine Daten für den Backtest verfügbar. Breche ab.[/bold red]")
+        sys.exit(1)
+
+    console.rule("[orange1]Backtest[/orange1]")
+    summary, all_errors = compare_retrain_frequencies(
+        data_featured,
+        retrain_days=args.retrain_every,
+        console=console,
+        test_days=args.test_days,
+        window=args.window,
+        train_window_days=args.train_window_days,
+        n_workers=args.workers,
+    )
+    print_backtest_summary(summary, console)
+
+    os.makedirs(config.BACKTEST_RESULTS_DIR, exist_ok=True)
+    summary.to_csv(os.path.join(config.BACKTEST_RESULTS_DIR, "summary.csv"), index=False)
+    for retrain_every, errors in all_errors.items():
+        errors.to_csv(os.path.join(config.BACKTEST_RESULTS_DIR, f"errors_retrain_{retrain_every}.csv"))
+    console.print(f"[green]   ✔️ Ergebnisse gespeichert in {config.BACKTEST_RESULTS_DIR}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import sys
+import time
+import shlex
+import argparse
+import warnings
+
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+COMMANDS = ['train', 'predict', 'evaluate', 'tune', 'serve']
+
+
+class Session:
+    """
+    Zustand zwischen den Befehlen eines Prozesses (app_menu.py oder `cli.py` ohne Befehl).
+
+    Modelle und Features für die Vorhersage hält der ForecastService: Die Modelle werden nur neu geladen, wenn sich
+    die Dateien geändert haben, neue Features erst geholt, wenn ein neuer Beobachtungstag verfügbar ist. Den
+    Feature-DataFrame für evaluate/tune gibt es einmal pro Sitzung, bevorzugt aus dem Checkpoint des letzten
+    Pipeline-Laufs (sonst Download und Interpolation wie in main.py).
+    """
+
+    def __init__(self, console: Console | None = None, model_dir: str = config.MODEL_SAVE_DIR):
+        self.console = console or Console()
+        self.model_dir = model_dir
+        self._service = None
+        self._featured = None
+
+    def service(self):
+        """ForecastService mit aktuellen Modellen oder None, wenn keine Modelle geladen werden können."""
+        from forecast_service import ForecastService
+
+        if self._service is None:
+            try:
+                self._service = ForecastService(self.model_dir)
+            except RuntimeError as e:
+                self.console.print(f"[red]FEHLER: {e} Zuerst 'train' ausführen.[/red]")
+                return None
+        else:
+            result = self._service.reload() # vergleicht nur die Änderungszeiten der Modelldateien
+            if result["loaded"]:
+                self.console.print(f"   Geänderte Modelle neu geladen: {result['models']}")
+        return self._service
+
+    def featured_data(self) -> pd.DataFrame | None:
+        if self._featured is None:
+            from pipeline import load_checkpoint
+
+            featured = load_checkpoint("featured")
+            if featured is not None:
+                self.console.print("   Feature-Daten aus dem Checkpoint des letzten Pipeline-Laufs geladen.")
+            else:
+                from dataset import load_featured_data
+                from climatology import load_climatology
+                from model_registry import current_model_dir
+                featured = load_featured_data(self.console, load_climatology(current_model_dir(self.model_dir)))
+            self._featured = featured
+        return self._featured
+
+    def invalidate_data(self):
+        """Nach einem Training: Feature-Daten beim nächsten Befehl aus dem neuen Lauf laden."""
+        self._featured = None
+
+
+# ----- Befehle: erhalten Sitzung und Argumente, liefern True bei Erfolg -----
+
+def _train(session: Session, args: argparse.Namespace) -> bool:
+    from pipeline import run_pipeline
+
+    session.console.rule("[bold purple4]⛅ Wettervorhersage für Berlin ⛅[/bold purple4]")
+    ok = run_pipeline(args.run_dir, args.resume, args.from_stage, args.to_stage, session.console, args.cores)
+    session.invalidate_data()
+    return ok
+
+
+def _predict(session: Session, args: argparse.Namespace) -> bool:
+    from update_prediction_data import save_prediction
+
+    service = session.service()
+    if service is None:
+        return False
+    try:
+        output_data = service.forecast()
+    except RuntimeError as e:
+        session.console.print(f"[red]FEHLER: {e}[/red]")
+        return False
+    session.console.print(output_data)
+    return save_prediction(output_data, args.output)
+
+
+def _evaluate(session: Session, args: argparse.Namespace) -> bool:
+    from data_splitting import get_feature_target_columns, split_frames
+    from model_evaluation import evaluate_model
+    from climatology import ClimatologyBaseline
+
+    service = session.service()
+    data_featured = session.featured_data()
+    if service is None or data_featured is None:
+        return False
+
+    features_cols, target_cols = get_feature_target_columns(data_featured)
+    split_index = len(data_featured) - config.TEST_PERIOD_DAYS
+    X_train, X_test, y_train, y_test = split_frames(data_featured, features_cols, target_cols, split_index)
+    models = dict(service.models)
+    climatology = service.climatology
+    if climatology is not None:
+        models["climatology"] = ClimatologyBaseline(climatology, target_cols) # Vergleich ohne Modell
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        metrics = evaluate_model(models, X_test, y_test, target_cols, config.EDA_PLOT_DIR, plots=args.plots)
+
+    table = Table(title=f"Testzeitraum {X_test.index[0].date()} - {X_test.index[-1].date()}")
+    for column in ["Modell", "Zielvariable", "MAE", "RMSE", "R²"]:
+        table.add_column(column, justify="left" if column in ("Modell", "Zielvariable") else "right")
+    for model_name, target_metrics in metrics.items():
+        for target, values in target_metrics.items():
+            table.add_row(model_name, target, *(f"{values[k]:.2f}" for k in ("MAE", "RMSE", "R2")))
+    session.console.print(table)
+    return bool(metrics)
+
+
+def _tune(session: Session, args: argparse.Namespace) -> bool:
+    from tuning import tune_models, print_tuned_parameters
+    from model_manager import save_tuned_parameters
+
+    data_featured = session.featured_data()
+    if data_featured is None:
+        return False
+    session.console.rule("[orange1]Tuning[/orange1]")
+    tuned, _ = tune_models(
+        data_featured,
+        model_names=args.models,
+        n_candidates=args.candidates,
+        n_workers=args.workers,
+        console=session.console,
+    )
+    print_tuned_parameters(tuned, args.models, session.console)
+    return save_tuned_parameters(tuned, args.output)
+
+
+def _serve(session: Session, args: argparse.Namespace) -> bool:
+    from forecast_service import serve
+
+    service = session.service()
+    if service is None:
+        return False
+    serve(args.host, args.port, session.model_dir, service=service)
+    return True
+
+
+_COMMAND_FUNCTIONS = {
+    'train': _train,
+    'predict': _predict,
+    'evaluate': _evaluate,
+    'tune': _tune,
+    'serve': _serve,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from main import add_pipeline_arguments
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="MeteoFlow-Befehle in einem Prozess; ohne Befehl startet eine Sitzung, die Modelle und Daten behält.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    add_pipeline_arguments(subparsers.add_parser("train", help="Pipeline aus main.py ausführen"))
+
+    predict_parser = subparsers.add_parser("predict", help="Vorhersage für morgen und die nächsten Tage")
+    predict_parser.add_argument("--output", default="prediction.json")
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="aktuelle Modelle auf dem Testzeitraum bewerten")
+    evaluate_parser.add_argument("--plots", action="store_true", help=f"Plots in {config.EDA_PLOT_DIR} speichern")
+
+    tune_parser = subparsers.add_parser("tune", help="Hyperparameter-Tuning (wie tuning.py)")
+    tune_parser.add_argument("--models", nargs="+", choices=["rf", "xgb"], default=["rf", "xgb"])
+    tune_parser.add_argument("--candidates", type=int, default=config.TUNING_CANDIDATES)
+    tune_parser.add_argument("--workers", type=int, default=config.TUNING_WORKERS)
+    tune_parser.add_argument("--output", default=config.TUNED_PARAMS_PATH)
+
+    serve_parser = subparsers.add_parser("serve", help="HTTP-Vorhersagedienst mit den Modellen der Sitzung")
+    serve_parser.add_argument("--host", default=config.FORECAST_SERVICE_HOST)
+    serve_parser.add_argument("--port", type=int, default=config.FORECAST_SERVICE_PORT)
+    return parser
+
+
+def run_command(session: Session, argv: list[str]) -> bool:
+    """Führt einen Befehl (z.B. ['predict']) in der Sitzung aus und zeigt die Dauer an."""
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit: # argparse meldet Fehler und --help selbst
+        return False
+    if args.command is None:
+        session.console.print(f"[yellow]Befehl fehlt: {', '.join(COMMANDS)}[/yellow]")
+        return False
+
+    start = time.perf_counter()
+    try:
+        ok = _COMMAND_FUNCTIONS[args.command](session, args)
+    except KeyboardInterrupt:
+        session.console.print(f"[yellow]'{args.command}' abgebrochen.[/yellow]")
+        ok = False
+    except Exception as e:
+        session.console.print(f"[red]FEHLER in '{args.command}': {e}[/red]")
+        session.console.print_exception(show_locals=False)
+        ok = False
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    color = "green" if ok else "red"
+    session.console.print(f"[{color}]   '{args.command}' {'abgeschlossen' if ok else 'fehlgeschlagen'} ({elapsed_ms:.0f} ms)[/{color}]")
+    return ok
+
+
+def interactive(session: Session):
+    """Eingabeaufforderung: Befehle wie auf der Kommandozeile, 'exit' beendet die Sitzung."""
+    session.console.print(f"[bold cyan]MeteoFlow-Sitzung[/bold cyan] – Befehle: {', '.join(COMMANDS)}, help, exit")
+    while True:
+        try:
+            line = input("meteoflow> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if line in ("exit", "quit"):
+            break
+        if line == "help":
+            build_parser().print_help()
+        elif line:
+            run_command(session, shlex.split(line))
+    session.console.print("[bold magenta]Sitzung beendet.[/bold magenta]")
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    session = Session()
+    if not argv:
+        interactive(session)
+    elif not run_command(session, argv):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import json
+import argparse
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+CLIMATOLOGY_FILE = 'climatology.json'
+_DAYS = 366
+
+
+def training_history(data: pd.DataFrame, test_days: int = config.TEST_PERIOD_DAYS) -> pd.DataFrame:
+    """
+    Tagesreihe ohne Testzeitraum (und ohne den letzten Tag, der kein Target hat), damit die Normalwerte
+    nichts aus den Tagen enthalten, auf denen die Modelle bewertet werden.
+    """
+    cutoff = data.index.max() - pd.Timedelta(days=test_days)
+    return data[data.index < cutoff]
+
+
+def compute_climatology(
+    data: pd.DataFrame,
+    columns: list | None = None,
+    smoothing_days: int = config.CLIMATOLOGY_SMOOTHING_DAYS,
+    percentiles: list | None = None,
+    anomaly_columns: list | None = None,
+) -> dict:
+    """
+    Normalwerte und Perzentile je Tag des Jahres (366 Zeilen) aus einer Tagesreihe mit DatetimeIndex.
+
+    Die Werte werden auf ein Raster (Jahre x Tag des Jahres) gelegt; für jeden Tag werden alle Jahre im Fenster
+    von `smoothing_days` Tagen um ihn herum (Jahresende schließt an den Anfang an, gerade Fenster werden um einen
+    Tag verlängert) mit einem Indexzugriff gesammelt. Mittelwert und Perzentile laufen einmal über dieses Array,
+    fehlende Werte zählen nicht mit.
+
+    anomaly_columns: Spalten, für die engineer_features Anomalie-Features (Wert - Normalwert) anlegt.
+    """
+    columns = [col for col in (columns or config.REQUIRED_COLUMNS) if col in data.columns]
+    percentiles = config.CLIMATOLOGY_PERCENTILES if percentiles is None else percentiles
+    anomaly_columns = config.CLIMATOLOGY_ANOMALY_COLUMNS if anomaly_columns is None else anomaly_columns
+    data = data[~data.index.duplicated(keep="first")]
+
+    years = data.index.year.to_numpy()
+    grid = np.full((years.max() - years.min() + 1, _DAYS, len(columns)), np.nan)
+    grid[years - years.min(), data.index.dayofyear.to_numpy() - 1] = data[columns].to_numpy(dtype=np.float64)
+
+    half = smoothing_days // 2
+    window = (np.arange(_DAYS)[:, None] + np.arange(-half, half + 1)) % _DAYS # (366, Fenster)
+    samples = grid[:, window].transpose(1, 0, 2, 3).reshape(_DAYS, -1, len(columns)) # (366, Jahre * Fenster, Spalten)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=RuntimeWarning) # Tage ohne jeden Wert -> nan
+        tables = {"normals": np.nanmean(samples, axis=1)}
+        if percentiles:
+            for q, table in zip(percentiles, np.nanpercentile(samples, percentiles, axis=1)):
+                tables[f"p{q}"] = table
+
+    return {
+        "columns": columns,
+        "smoothing_days": 2 * half + 1,
+        "percentiles": list(percentiles),
+        "anomaly_columns": [col for col in anomaly_columns if col in columns],
+        "start": data.index.min().strftime("%Y-%m-%d"),
+        "end": data.index.max().strftime("%Y-%m-%d"),
+        **tables,
+    }
+
+
+def climatology_to_json(climatology: dict) -> dict:
+    """Tabellen als Listen (3 Nachkommastellen, None statt nan) - so, wie sie in climatology.json stehen."""
+    return {
+        key: [[None if np.isnan(v) else round(float(v), 3) for v in row] for row in value]
+        if isinstance(value, np.ndarray) else value
+        for key, value in climatology.items()
+    }
+
+
+def climatology_from_json(climatology: dict) -> dict:
+    """Gegenstück zu climatology_to_json: Tabellen als float-Arrays (366, Spalten), None -> nan."""
+    return {
+        key: np.array(value, dtype=np.float64) if isinstance(value, list) and value and isinstance(value[0], list) else value
+        for key, value in climatology.items()
+    }
+
+
+def climatology_values(climatology: dict, dates, column: str, table: str = "normals") -> np.ndarray:
+    """Werte der Tabelle für beliebige Tage per Indexzugriff (Tag des Jahres - 1)."""
+    day_index = pd.DatetimeIndex(dates).dayofyear.to_numpy() - 1
+    return climatology[table][day_index, climatology["columns"].index(column)]
+
+
+def add_anomaly_features(featured: pd.DataFrame, climatology: dict | None) -> pd.DataFrame:
+    """
+    Hängt für jede Spalte aus climatology['anomaly_columns'] '<Spalte>_anomaly' = Wert - Normalwert des Tages an.
+
+    Die Normalwerte kommen mit einem Indexzugriff (Tag des Jahres - 1) aus der Tabelle, der Datentyp folgt der
+    Wertspalte (float32 bei COMPACT_DTYPES). Ohne Klimatologie oder Anomalie-Spalten bleibt featured unverändert.
+    """
+    columns = (climatology or {}).get("anomaly_columns") or []
+    if not columns:
+        return featured
+    missing = [col for col in columns if col not in featured.columns]
+    if missing:
+        raise ValueError(f"Spalten {missing} für Anomalie-Features nicht gefunden.")
+    day_index = featured.index.dayofyear.to_numpy() - 1
+    normals = climatology["normals"][day_index][:, [climatology["columns"].index(col) for col in columns]]
+    anomalies = featured[columns].to_numpy(dtype=np.float64) - normals
+    print(f"\nErstelle Anomalie-Features (Wert - Normalwert) für Spalten: {columns}")
+    for j, col in enumerate(columns):
+        featured[f"{col}_anomaly"] = anomalies[:, j].astype(featured[col].dtype)
+    return featured
+
+
+class ClimatologyBaseline:
+    """
+    Vorhersage ohne Modell: der Normalwert des Zieltags (Tag nach der Feature-Zeile) für jede Zielvariable.
+
+    Hat predict(X) wie die Modelle, damit evaluate_model sie als Vergleich mitbewerten kann; X braucht
+    einen DatetimeIndex (Datum der Feature-Zeile).
+    """
+
+    def __init__(
+        self,
+        climatology: dict,
+        target_cols: list = config.TARGET_COLUMNS,
+        target_base_cols: list = config.ORIGINAL_TARGET_BASE_COLUMNS,
+    ):
+        self.climatology = climatology
+        self.base_cols = [target_base_cols[config.TARGET_COLUMNS.index(col)] if col in config.TARGET_COLUMNS else col
+                          for col in target_cols]
+
+    def predict(self, X) -> np.ndarray:
+        if not isinstance(getattr(X, "index", None), pd.DatetimeIndex):
+            raise TypeError("ClimatologyBaseline braucht Feature-Zeilen mit DatetimeIndex.")
+        target_dates = X.index + pd.Timedelta(days=1)
+        return np.column_stack([climatology_values(self.climatology, target_dates, col) for col in self.base_cols])
+
+
+def save_climatology(climatology: dict, model_dir: str = config.MODEL_SAVE_DIR) -> bool:
+    filepath = os.path.join(model_dir, CLIMATOLOGY_FILE)
+    try:
+        os.makedirs(model_dir, exist_ok=True)
+        with open(f"{filepath}.tmp", "w") as f:
+            json.dump(climatology_to_json(climatology), f)
+        os.replace(f"{filepath}.tmp", filepath)
+        return True
+    except Exception as e:
+        print(f"\nFehler beim Speichern der Klimatologie: {e}")
+        return False
+
+
+def load_climatology(model_dir: str = config.MODEL_SAVE_DIR) -> dict | None:
+    """Klimatologie aus model_dir/climatology.json (Tabellen als float-Arrays); None, wenn es keine gibt."""
+    filepath = os.path.join(model_dir, CLIMATOLOGY_FILE)
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath) as f:
+            return climatology_from_json(json.load(f))
+    except Exception as e:
+        print(f"\nFehler beim Laden der Klimatologie: {e}")
+        return None
+
+
+def print_climatology(climatology: dict, console: Console, day: date | None = None):
+    """Normalwert und Perzentile eines Tages (Standard: heute) je Variable."""
+    day = day or date.today()
+    tables = ["normals"] + [f"p{q}" for q in climatology.get("percentiles", [])]
+    table = Table(title=f"Klimatologie {climatology['start']} bis {climatology['end']} für den {day.strftime('%d.%m.')}")
+    table.add_column("Variable")
+    for name in tables:
+        table.add_column("Normalwert" if name == "normals" else name, justify="right")
+    for col in climatology["columns"]:
+        table.add_row(col, *(f"{climatology_values(climatology, [day], col, name)[0]:.1f}" for name in tables))
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Berechnet die Klimatologie (Normalwerte und Perzentile je Tag des Jahres) aus den historischen "
+                    "Daten, als Rückfall für den täglichen Job ohne Pipeline-Lauf."
+    )
+    parser.add_argument("--model-dir", default=config.MODEL_SAVE_DIR)
+    parser.add_argument("--smoothing-days", type=int, default=config.CLIMATOLOGY_SMOOTHING_DAYS)
+    args = parser.parse_args()
+
+    from data_collection import get_weather_data
+
+    console = Console()
+    existing = load_climatology(args.model_dir)
+    if existing is not None and existing.get("anomaly_columns"):
+        # die Modelle wurden mit den Anomalie-Features dieser Tabelle trainiert
+        console.print("[yellow]Die Klimatologie der aktuellen Modelle stammt aus der Pipeline und wird nicht überschrieben.[/yellow]")
+        print_climatology(existing, console)
+        return
+    console.print(f"[cyan]Hole historische Daten von {config.START_DATE.strftime('%Y-%m-%d')} bis {config.END_DATE.strftime('%Y-%m-%d')}...[/cyan]")
+    data = get_weather_data(config.LOCATION, config.START_DATE, config.END_DATE, config.REQUIRED_COLUMNS, config.ESSENTIAL_COLS)
+    if data is None or data.empty:
+        console.print("[red]FEHLER: Keine historischen Daten erhalten.[/red]")
+        return
+    # ohne Anomalie-Spalten: die Features der vorhandenen Modelle bleiben unverändert
+    climatology = compute_climatology(data, config.REQUIRED_COLUMNS, args.smoothing_days, anomaly_columns=[])
+    if save_climatology(climatology, args.model_dir):
+        console.print(f"[green]   ✔️ Klimatologie gespeichert in {os.path.join(args.model_dir, CLIMATOLOGY_FILE)}.[/green]")
+        print_climatology(climatology, console)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import io
+import time
+import argparse
+import tracemalloc
+import contextlib
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from interpolation import idw_interpolate
+from data_preprocessing import preprocess_data
+from feature_engineering import engineer_features
+from data_splitting import split_data
+
+STAGES = ['interpolation', 'preprocessing', 'features', 'split', 'estimator']
+
+
+def synthetic_station_data(years: int, n_stations: int = config.MAX_NEARBY_STATIONS) -> tuple[dict, dict]:
+    """Tageswerte für n_stations Stationen rund um den Zielort (Jahresgang + Rauschen, einzelne Lücken)."""
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    all_station_data, station_metadata = {}, {}
+    for s in range(n_stations):
+        sid = f"S{s}"
+        all_station_data[sid], station_metadata[sid] = synthetic_station(s, years, rng)
+    return all_station_data, station_metadata
+
+
+def synthetic_station(s: int, years: int, rng: np.random.Generator) -> tuple[pd.DataFrame, tuple[float, float]]:
+    """Tageswerte und Koordinaten der s-ten synthetischen Station (einzeln, z.B. als simulierter Download)."""
+    index = pd.date_range("1900-01-01", periods=years * 365, freq="D", name="time")
+    season = np.sin(2 * np.pi * index.dayofyear.to_numpy() / 365.25)
+    tavg = 10 + 9 * season + rng.normal(0, 3, len(index))
+    data = pd.DataFrame({
+        "tavg": tavg,
+        "tmin": tavg - 4 - rng.gamma(2, 1, len(index)),
+        "tmax": tavg + 4 + rng.gamma(2, 1, len(index)),
+        "prcp": rng.gamma(0.5, 3, len(index)),
+        "wspd": 12 + rng.gamma(2, 3, len(index)),
+        "pres": 1015 + rng.normal(0, 8, len(index)),
+    }, index=index)[config.REQUIRED_COLUMNS]
+    data.iloc[rng.choice(len(index), len(index) // 100, replace=False), 1:] = np.nan
+    return data, (config.TARGET_LAT + 0.1 * (s + 1), config.TARGET_LON - 0.1 * s)
+
+
+def run_pipeline(all_station_data: dict, station_metadata: dict, compact: bool) -> tuple[dict, dict]:
+    """
+    Interpolation -> Vorverarbeitung -> Features -> Split -> Übergabe an den Estimator.
+
+    'estimator' ist die Umwandlung, die RandomForest.fit selbst vornimmt (float32-Array). Liefert die Zeiten je
+    Stufe und Infos zum Ergebnis (Speicher von X_train, ob der Estimator eine Kopie anlegen musste).
+    """
+    from sklearn.utils import check_array
+
+    console = Console(quiet=True)
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        interpolated = idw_interpolate(
+            all_station_data, station_metadata, config.TARGET_LAT, config.TARGET_LON,
+            config.REQUIRED_COLUMNS, console, compact=compact,
+        )
+        timings["interpolation"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        processed = preprocess_data(interpolated, console, compact=compact)
+        del interpolated
+        timings["preprocessing"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        featured = engineer_features(
+            processed, config.TARGET_COLUMNS, config.ORIGINAL_TARGET_BASE_COLUMNS, config.LAG_DAYS, compact=compact
+        )
+        del processed
+        timings["features"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        X_train, X_test, y_train, y_test, *_ = split_data(featured, console, compact=compact)
+        del featured
+        timings["split"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        X_fit = check_array(X_train, dtype=np.float32)
+        timings["estimator"] = time.perf_counter() - t0
+
+    info = {
+        "rows": len(X_train) + len(X_test),
+        "x_train_mb": X_train.memory_usage(index=False).sum() / 2**20,
+        "estimator_copy": not np.shares_memory(X_fit, X_train.to_numpy()),
+    }
+    return timings, info
+
+
+def measure(years: int, compact: bool, repeat: int = 3) -> dict:
+    """Median der Zeiten aus `repeat` Läufen und Speicherspitze (tracemalloc, eigener Lauf)."""
+    all_station_data, station_metadata = synthetic_station_data(years)
+    runs = [run_pipeline(all_station_data, station_metadata, compact) for _ in range(repeat)]
+    timings = {stage: float(np.median([t[stage] for t, _ in runs])) for stage in STAGES}
+
+    tracemalloc.start()
+    _, info = run_pipeline(all_station_data, station_metadata, compact)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(timings.values())
+    return {
+        "years": years,
+        "mode": "compact" if compact else "float64",
+        **info,
+        "timings": timings,
+        "total_s": total,
+        "rows_per_s": info["rows"] / total,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def print_report(rows: list[dict], console: Console):
+    table = Table(title="Kompakte Datentypen: Interpolation bis Estimator-Übergabe")
+    for column in ["Jahre", "Modus", "Peak (MB)", "X_train (MB)", *[f"{s} (ms)" for s in STAGES],
+                   "Gesamt (ms)", "Zeilen/s", "Kopie bei fit"]:
+        table.add_column(column, justify="right")
+    for row in rows:
+        table.add_row(
+            str(row["years"]), row["mode"], f"{row['peak_mb']:.1f}", f"{row['x_train_mb']:.1f}",
+            *[f"{row['timings'][s] * 1000:.0f}" for s in STAGES],
+            f"{row['total_s'] * 1000:.0f}", f"{row['rows_per_s']:,.0f}", "ja" if row["estimator_copy"] else "nein",
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht Speicher und Durchsatz mit float64 und kompakten Datentypen.")
+    parser.add_argument("--years", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    console = Console()
+    rows = []
+    for years in args.years:
+        for compact in (False, True):
+            console.print(f"   Messe {years} Jahre, {'kompakt' if compact else 'float64'}...")
+            rows.append(measure(years, compact, args.repeat))
+    print_report(rows, console)
+
+
+if __name__ == "__main__":
+    main()
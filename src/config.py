@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-from meteostat import Point
 import os
 
 # ----- Standort: Berlin -----
@@ -11,7 +10,26 @@ MAX_NEARBY_STATIONS = 4
 LATITUDE = 52.5200
 LONGITUDE = 13.4050
 ALTITUDE = 34 # Höhe in Metern 
-LOCATION = Point(LATITUDE, LONGITUDE, ALTITUDE)
+
+def __getattr__(name):
+    # LOCATION erst bei Bedarf erzeugen, damit `import config` nicht Meteostat (und damit pandas) lädt
+    if name == "LOCATION":
+        from meteostat import Point
+        location = Point(LATITUDE, LONGITUDE, ALTITUDE)
+        globals()["LOCATION"] = location
+        return location
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ----- Mehrere Standorte (multi_location.py) -----
+FORECAST_LOCATIONS = { # Name: (Breite, Länge, Höhe in m)
+    'Berlin': (52.5200, 13.4050, 34),
+    'Hamburg': (53.5511, 9.9937, 6),
+    'Muenchen': (48.1374, 11.5755, 519),
+    'Koeln': (50.9375, 6.9603, 53),
+}
+MULTI_LOCATION_MODE = 'pooled' # 'pooled' (ein Modell mit Standort-Features) oder 'per_location' (ein Modell je Ort)
+MULTI_LOCATION_WORKERS = os.cpu_count() or 1 # Prozesse für 'per_location'
+LOCATION_FEATURE_COLUMNS = ['loc_lat', 'loc_lon', 'loc_alt'] # Standort-Features im 'pooled'-Modus
 
 # ----- Zeitraum für historische Wetterdaten -----
 END_DATE = datetime.now()
@@ -30,10 +48,28 @@ ESSENTIAL_COLS = ['tavg', 'wspd']
 TARGET_COLUMNS = ['tavg_target', 'wspd_target']
 ORIGINAL_TARGET_BASE_COLUMNS = ['tavg', 'wspd'] # Originalspalten, die zu Targets werden
 LAG_DAYS = 5 # Anzahl der Lag-Tage
+# True: Wetterwerte und Features als float32, Kalenderspalten als int8/int16; Interpolation bis Split arbeiten mit
+# Views statt Kopien (etwa halber Speicher, siehe README "Kompakte Datentypen")
+COMPACT_DTYPES = False
+# 'pandas' oder 'polars': Vorverarbeitung + Feature Engineering als eine Polars-Abfrage (polars_backend.py),
+# Ergebnis spaltengleich zum pandas-Pfad
+DATA_BACKEND = 'pandas'
+
+# ----- Mehrtagesvorhersage (multistep_forecast.py) -----
+FORECAST_HORIZON_DAYS = 7 # Tage ab morgen (rekursiv, jede Vorhersage wird zum Lag des nächsten Tages)
+# Annahmen für die exogenen Features (tmin, tmax, prcp, pres) der Folgetage; das erste Szenario landet in prediction.json
+MULTISTEP_SCENARIOS = ['anchored', 'persistence', 'mean']
+MULTISTEP_ANCHORS = {'tmin': 'tavg', 'tmax': 'tavg'} # 'anchored': Spalte folgt der vorhergesagten Änderung von tavg
 
 # ----- Train/Test Daten -----
 TEST_PERIOD_DAYS = 4 * 365 # Tage für den Testdatensatz
 
+# ----- Walk-Forward-Backtest -----
+BACKTEST_RETRAIN_DAYS = [30, 90, 365] # Retrain-Intervalle (Tage), die verglichen werden
+BACKTEST_WINDOW = 'expanding' # 'expanding' (gesamte Historie) oder 'sliding' (festes Fenster)
+BACKTEST_TRAIN_WINDOW_DAYS = 10 * 365 # Länge des Trainingsfensters bei 'sliding'
+BACKTEST_WORKERS = os.cpu_count() or 1 # Prozesse für unabhängige Fenster
+
 # ----- Modellparameter -----
 RANDOM_STATE = 42
 
@@ -56,6 +92,138 @@ XGB_PARAMETER = {
     'max_depth': 3
 }
 
+# ----- Hyperparameter-Tuning -----
+# Suchräume für tuning.py; die besten Werte landen in TUNED_PARAMS_PATH und überschreiben beim Training die Werte oben
+RF_SEARCH_SPACE = {
+    'max_depth': [8, 12, 15, 20, None],
+    'min_samples_split': [2, 5, 10, 20],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': [0.3, 0.5, 1.0],
+}
+XGB_SEARCH_SPACE = {
+    'learning_rate': [0.01, 0.03, 0.05, 0.1],
+    'max_depth': [2, 3, 4, 6],
+    'subsample': [0.7, 0.85, 1.0],
+    'colsample_bytree': [0.5, 0.8, 1.0],
+    'min_child_weight': [1, 5, 10],
+}
+TUNING_CANDIDATES = 27 # Anzahl zufälliger Kandidaten in der ersten Runde
+TUNING_HALVING_FACTOR = 3 # pro Runde überlebt 1/Faktor der Kandidaten, Ressourcen wachsen um den Faktor
+TUNING_FOLDS = 4 # Anzahl zeitlicher CV-Folds
+TUNING_VALID_DAYS = 365 # Länge jedes Validierungsblocks
+TUNING_WORKERS = os.cpu_count() or 1
+
+# ----- RandomForest-Kompression (model_compression.py) -----
+# Schritte für den RF in flat_models.mfa, z.B. ['prune', 'float32']; leer = unverändert
+# (Optionen: 'prune', 'max_leaf', 'float32', 'distill_rf', 'distill_xgb')
+RF_COMPRESSION = []
+RF_COMPRESSION_PRUNE_TREES = 25 # Bäume, die 'prune' behält
+RF_COMPRESSION_MAX_LEAF_NODES = 256 # Blätter pro Baum bei 'max_leaf'
+RF_DISTILL_RF_PARAMETER = {
+    'n_estimators': 20,
+    'random_state': RANDOM_STATE,
+    'n_jobs': -1,
+    'max_depth': 12,
+    'min_samples_leaf': 3
+}
+RF_DISTILL_XGB_PARAMETER = {
+    'objective': 'reg:squarederror',
+    'n_estimators': 300,
+    'random_state': RANDOM_STATE,
+    'n_jobs': -1,
+    'learning_rate': 0.05,
+    'max_depth': 4
+}
+# Varianten, die model_compression.py mit dem Original vergleicht
+RF_COMPRESSION_REPORT_VARIANTS = {
+    'float32': ['float32'],
+    'prune': ['prune'],
+    'prune+float32': ['prune', 'float32'],
+    'max_leaf': ['max_leaf'],
+    'distill_rf': ['distill_rf'],
+    'distill_xgb': ['distill_xgb'],
+}
+
+# ----- Out-of-core-Training (out_of_core.py) -----
+OOC_CHUNK_ROWS = 50_000 # Zeilen pro Parquet-Datei (= pro Schritt im Speicher)
+OOC_RF_MAX_ROWS = 200_000 # RandomForest hat keinen External-Memory-Modus: Training auf einer Stichprobe
+
+# ----- Validierung der IDW-Interpolation (idw_validation.py) -----
+IDW_VALIDATION_RADIUS_KM = 150 # Stationen in diesem Umkreis sagen sich gegenseitig voraus
+IDW_VALIDATION_MAX_STATIONS = 200
+IDW_VALIDATION_YEARS = 5 # Zeitraum bis END_DATE
+IDW_VALIDATION_POWERS = [1, 1.5, 2, 3, 4]
+IDW_VALIDATION_K = [2, 4, 8, 16, None] # k nächste Stationen (None = alle übrigen)
+IDW_VALIDATION_CHUNK_DAYS = 256 # Tage pro Matrixmultiplikation (begrenzt den Speicher bei vielen Stationen)
+
+# ----- Konfigurations-Sweep (sweep.py) -----
+# Standardvergleich ohne --grid/--variants; Namen wie in diesem Modul (IDW_POWER: Potenz der IDW-Interpolation)
+SWEEP_GRID = {'LAG_DAYS': [5, 14], 'IDW_POWER': [1, 2, 3], 'SEARCH_RADIUS_KM': [30, 60]}
+SWEEP_WORKERS = os.cpu_count() or 1 # Varianten gleichzeitig (Threads, gemeinsame Stufen werden nur einmal berechnet)
+
+# ----- Streaming-Interpolation (streaming_interpolation.py) -----
+# 'batch': alle Stationen laden, dann interpolieren; 'streaming': jede Station beim Eintreffen in die IDW-Summen
+# einrechnen (Download und Interpolation überlappen, Speicher unabhängig von der Zahl der Stationen)
+INTERPOLATION_MODE = 'batch'
+STREAMING_DOWNLOAD_WORKERS = 4 # gleichzeitige Downloads (Threads, die Zeit geht ins Netz)
+
+# ----- Stündliche Daten (hourly_ingestion.py) -----
+# Tageswerte aus Meteostat Hourly: Tagesgang der Temperatur (tmax - tmin), Nachtminimum, stärkste Böe,
+# Luftdrucktendenz (hPa pro 24 h); landen zusammen mit REQUIRED_COLUMNS im StationCube unter STATION_CUBE_DIR
+HOURLY_DAILY_COLUMNS = ['temp_range', 'tmin_night', 'wpgt_max', 'pres_tendency']
+HOURLY_CHUNK_DAYS = 365 # Tage pro Abruf; mehr als ein Block Stundenwerte je Station ist nie im Speicher
+HOURLY_NIGHT_HOURS = [0, 1, 2, 3, 4, 5] # Stunden (UTC) für das Nachtminimum
+HOURLY_MIN_HOURS = 18 # Tageswert nur, wenn mindestens so viele Stunden gemessen wurden
+
+# ----- Pipeline (pipeline.py / main.py) -----
+PIPELINE_CORE_BUDGET = os.cpu_count() or 1 # Kerne für gleichzeitig laufende Stufen (RF/XGB bekommen je die Hälfte)
+PIPELINE_START_METHOD = 'forkserver' # Prozesse für EDA/Bewertung; kein 'fork', da parallel Threads laufen
+
+# ----- Vorhersageintervalle (prediction_intervals.py) -----
+# Anteil der Tage, deren Messwert im Intervall liegen soll: RF über die Quantile der Bäume, XGBoost per
+# Split-Conformal mit den Residuen auf dem Testzeitraum (beim Training kalibriert, intervals.json)
+PREDICTION_INTERVAL_COVERAGE = 0.8
+# Anteil am Anfang des Testzeitraums für die Conformal-Breiten; auf dem Rest wird die Abdeckung gemessen
+PREDICTION_INTERVAL_CALIBRATION_FRACTION = 0.5
+
+# ----- Vorhersagehistorie (forecast_history.py) -----
+# Jede Vorhersage des täglichen Jobs wird an FORECAST_HISTORY_PATH (SQLite) angehängt; sobald die Messwerte da
+# sind, gehen die Fehler in gleitende Kennzahlen (MAE/RMSE/Bias) je Modell, Variable, Vorlauf und Fenster ein
+FORECAST_HISTORY_WINDOWS = [7, 30, 90, 365] # Fenster in Tagen (nach Zieltag, bis zum letzten bewerteten Tag)
+
+# ----- Klimatologie (climatology.py) -----
+# Normalwerte und Perzentile je Tag des Jahres aus dem Trainingszeitraum (Stufe 'climatology', climatology.json):
+# Anomalie-Features, Vergleichswert in der Bewertung und letzte Rückfallstufe des täglichen Jobs
+CLIMATOLOGY_SMOOTHING_DAYS = 31 # gleitendes Fenster (Tage) über die Tage des Jahres für die Normalwerte
+CLIMATOLOGY_PERCENTILES = [10, 90]
+CLIMATOLOGY_ANOMALY_COLUMNS = ['tavg', 'tmin', 'tmax', 'wspd', 'pres'] # je Spalte '<Spalte>_anomaly'; [] = keine
+
+# ----- Zeitbudget des täglichen Jobs (update_prediction_data.py) -----
+# Wird ein Schritt nicht rechtzeitig fertig (oder schlägt fehl), wird der Reihe nach zurückgegriffen auf:
+# zwischengespeicherte Features -> letzte gespeicherte Vorhersage -> Klimatologie. prediction.json wird immer
+# geschrieben, 'degradation' nennt die verwendete Stufe
+DAILY_JOB_DEADLINE_SECONDS = 300 # Gesamtzeit des Jobs; None: ohne Budget, Abbruch bei Fehlern (altes Verhalten)
+DAILY_JOB_STEP_BUDGETS = {'fetch': 120, 'features': 30, 'predict': 60} # Sekunden je Schritt
+DAILY_JOB_RESERVE_SECONDS = 10 # bleibt für Rückfallstufen und das Schreiben der Ausgabe
+FEATURE_CACHE_MAX_AGE_DAYS = 3 # ältere zwischengespeicherte Features werden nicht mehr verwendet
+
+# ----- Vorhersagedienst -----
+FORECAST_SERVICE_HOST = '127.0.0.1'
+FORECAST_SERVICE_PORT = 8765
+FORECAST_SERVICE_REFETCH_SECONDS = 15 * 60 # wie oft nach einem neuen Beobachtungstag gefragt wird, solange er fehlt
+
+# ----- Modell-Artefakte -----
+MODEL_REGISTRY_REUSE = True # vorhandene Version wiederverwenden, wenn Trainingsdaten + Parameter unverändert sind
+MODEL_ARTIFACT_COMPRESS = False # True: flat_models.mfa zlib-komprimiert (kleiner, aber kein mmap beim Laden)
+
+# ----- Kaltstart des täglichen Vorhersage-Jobs (import_benchmark.py) -----
+IMPORT_TIME_BUDGET_MS = {
+    'entry': 500, # import update_prediction_data
+    'models': 600, # zusätzlich Modelle laden (flache Bäume, ohne sklearn/xgboost)
+}
+# Pakete, die im Vorhersagepfad nicht geladen werden dürfen (nur für Training/Plots nötig)
+PREDICTION_FORBIDDEN_IMPORTS = ['matplotlib', 'seaborn', 'tqdm', 'statsmodels', 'sklearn', 'xgboost', 'scipy']
+
 # TODO: LightGBM
 # LGBM = {
 #     'objective': 'regression',
@@ -75,4 +243,16 @@ _THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 _PROJECT_ROOT = os.path.dirname(_THIS_DIR)
 
 EDA_PLOT_DIR = os.path.join(_PROJECT_ROOT, "plots")
-MODEL_SAVE_DIR = os.path.join(_PROJECT_ROOT, "saved_models")
\ No newline at end of file
+MODEL_SAVE_DIR = os.path.join(_PROJECT_ROOT, "saved_models")
+BACKTEST_RESULTS_DIR = os.path.join(_PROJECT_ROOT, "backtest_results")
+SWEEP_RESULTS_DIR = os.path.join(_PROJECT_ROOT, "sweep_results")
+IDW_VALIDATION_RESULTS_PATH = os.path.join(_PROJECT_ROOT, "idw_validation.csv")
+TUNED_PARAMS_PATH = os.path.join(MODEL_SAVE_DIR, "tuned_params.json")
+MODEL_REGISTRY_DIR = os.path.join(MODEL_SAVE_DIR, "registry")
+MULTI_LOCATION_MODEL_DIR = os.path.join(MODEL_SAVE_DIR, "multi_location")
+OOC_CHUNK_DIR = os.path.join(_PROJECT_ROOT, "featured_chunks")
+STATION_CUBE_DIR = os.path.join(_PROJECT_ROOT, "station_cube") # Tages- und Stundenaggregate je Station (hourly_ingestion.py)
+PIPELINE_RUN_DIR = os.path.join(_PROJECT_ROOT, "pipeline_runs") # Checkpoints von main.py (ein Unterverzeichnis pro Lauf)
+FORECAST_HISTORY_PATH = os.path.join(_PROJECT_ROOT, "forecast_history.sqlite") # ausgegebene Vorhersagen + Kennzahlen
+FEATURE_CACHE_PATH = os.path.join(_PROJECT_ROOT, "latest_features.json") # letzte Feature-Zeile des täglichen Jobs
+MULTI_LOCATION_OUTPUT_PATH = os.path.join(_PROJECT_ROOT, "multi_location_prediction.json")
@@ -1,19 +1,32 @@
 import pandas as pd
 from datetime import datetime
-from meteostat import Point, Daily, Stations
+from typing import TYPE_CHECKING
 from config import TARGET_LAT, TARGET_LON, SEARCH_RADIUS_KM, MAX_NEARBY_STATIONS
 from rich.console import Console
 
+# Meteostat wird erst beim Abruf importiert, nicht schon beim Import des Moduls
+if TYPE_CHECKING:
+    from meteostat import Point
+
+
+def find_stations(
+    console: Console,
+    lat: float = TARGET_LAT,
+    lon: float = TARGET_LON,
+    name: str = "Berlin",
+    radius_km: float = SEARCH_RADIUS_KM,
+    max_stations: int = MAX_NEARBY_STATIONS,
+) -> list:
+    from meteostat import Stations
 
-def find_stations(console: Console) -> list:
     print(
-        f"Suche nach Wetterstationen im Umkreis von {SEARCH_RADIUS_KM} km um Berlin..."
+        f"Suche nach Wetterstationen im Umkreis von {radius_km} km um {name}..."
     )
     stations = Stations()
 
     try:
-        nearby_stations_df = stations.nearby(TARGET_LAT, TARGET_LON, SEARCH_RADIUS_KM * 1000)
-        nearby_stations_df = nearby_stations_df.fetch(limit=MAX_NEARBY_STATIONS * 2)
+        nearby_stations_df = stations.nearby(lat, lon, radius_km * 1000)
+        nearby_stations_df = nearby_stations_df.fetch(limit=max_stations * 2)
 
         if nearby_stations_df.empty:
             print("FEHLER: Keine Stationen im angegebenen Radius gefunden.")
@@ -31,11 +44,11 @@ def find_stations(console: Console) -> list:
                 print("WARNUNG: Keine kürzlich aktiven Stationen gefunden. Nehme die nächstgelegenen.")
                 relevant_stations = nearby_stations_df
         
-        final_station_ids = relevant_stations.sort_values('distance').head(MAX_NEARBY_STATIONS).index.tolist()
+        final_station_ids = relevant_stations.sort_values('distance').head(max_stations).index.tolist()
 
-        console.print(f"   Gefundene relevante Stations-IDs (bis zu {MAX_NEARBY_STATIONS}): [magenta]{final_station_ids}[/magenta]")
+        console.print(f"   Gefundene relevante Stations-IDs (bis zu {max_stations}): [magenta]{final_station_ids}[/magenta]")
         console.print("   Details der Stationen:")
-        console.print(relevant_stations.sort_values('distance').head(MAX_NEARBY_STATIONS)[['name', 'country', 'distance']])
+        console.print(relevant_stations.sort_values('distance').head(max_stations)[['name', 'country', 'distance']])
         
         return final_station_ids
 
@@ -43,6 +56,44 @@ def find_stations(console: Console) -> list:
         console.print(f"[red]FEHLER bei der Stationssuche: {e}[/red]")
         return []
 
+def fetch_station_data(
+    station_id: str,
+    start_date: datetime,
+    end_date: datetime,
+    required_columns: list,
+    essential_columns: list,
+    console: Console
+) -> pd.DataFrame | None:
+    """Ruft tägliche Wetterdaten für eine Station ab; None, wenn keine (brauchbaren) Daten vorliegen."""
+    from meteostat import Daily
+
+    console.print(f"   Versuche Station [bold]{station_id}[/bold]...")
+    try:
+        data_request = Daily(station_id, start_date, end_date)
+        station_df = data_request.fetch()
+
+        if station_df.empty:
+             console.print(f"     [yellow]Keine Daten für Station {station_id} im Zeitraum.[/yellow]")
+             return None
+
+        # --- Spaltenprüfung pro Station (Optional, aber gut) ---
+        available_cols = [col for col in required_columns if col in station_df.columns]
+        missing_essential = [col for col in essential_columns if col not in station_df.columns]
+
+        if missing_essential:
+             console.print(f"     [yellow]WARNUNG: Essentielle Spalten {missing_essential} fehlen für Station {station_id}. Überspringe.[/yellow]")
+             return None
+
+        # Wähle nur benötigte, verfügbare Spalten aus
+        station_df_filtered = station_df[available_cols].copy()
+        console.print(f"     [green]Daten für {station_id} ({len(station_df_filtered)} Einträge) geladen.[/green]")
+        return station_df_filtered
+
+    except Exception as e:
+        console.print(f"     [red]Fehler beim Laden/Verarbeiten für Station {station_id}: {e}[/red]")
+        return None
+
+
 def get_data_for_stations(
     station_ids: list,
     start_date: datetime,
@@ -57,45 +108,23 @@ def get_data_for_stations(
     successful_stations = []
 
     for station_id in station_ids:
-        console.print(f"   Versuche Station [bold]{station_id}[/bold]...")
-        try:
-            data_request = Daily(station_id, start_date, end_date)
-            station_df = data_request.fetch()
-
-            if station_df.empty:
-                 console.print(f"     [yellow]Keine Daten für Station {station_id} im Zeitraum.[/yellow]")
-                 continue # Nächste Station
-
-            # --- Spaltenprüfung pro Station (Optional, aber gut) ---
-            available_cols = [col for col in required_columns if col in station_df.columns]
-            missing_essential = [col for col in essential_columns if col not in station_df.columns]
-
-            if missing_essential:
-                 console.print(f"     [yellow]WARNUNG: Essentielle Spalten {missing_essential} fehlen für Station {station_id}. Überspringe.[/yellow]")
-                 continue # Nächste Station
-
-            # Wähle nur benötigte, verfügbare Spalten aus
-            station_df_filtered = station_df[available_cols].copy()
-
-            # Füge zum Ergebnis hinzu
-            all_station_data[station_id] = station_df_filtered
+        station_df = fetch_station_data(station_id, start_date, end_date, required_columns, essential_columns, console)
+        if station_df is not None:
+            all_station_data[station_id] = station_df
             successful_stations.append(station_id)
-            console.print(f"     [green]Daten für {station_id} ({len(station_df_filtered)} Einträge) geladen.[/green]")
-
-        except Exception as e:
-            console.print(f"     [red]Fehler beim Laden/Verarbeiten für Station {station_id}: {e}[/red]")
 
     console.print(f"\nDaten erfolgreich geladen für {len(successful_stations)} von {len(station_ids)} angefragten Stationen: {successful_stations}")
     return all_station_data
 
 
 def get_weather_data(
-    location: Point,
+    location: "Point",
     start_date: datetime,
     end_date: datetime,
     required_columns: list,
     essential_columns: list,
 ) -> pd.DataFrame:
+    from meteostat import Daily
 
     try:
         data_raw_request = Daily(location, start_date, end_date)
@@ -1,14 +1,18 @@
 import pandas as pd
 import numpy as np
 from rich.console import Console
-from scipy.stats import mstats
 
-def preprocess_data(data: pd.DataFrame, console: Console) -> pd.DataFrame:
+import config
+
+def preprocess_data(data: pd.DataFrame, console: Console, compact: bool = config.COMPACT_DTYPES) -> pd.DataFrame:
+    from scipy.stats import mstats
+
     print("Überpüfung auf fehlende Werte (vor Imputation)")
     print(data.isnull().sum())
     
     # Kopie des DataFrames erstellen, um Originaldaten nicht zu ändern
-    data_copy = data.copy()
+    # (kompakt: die Kopie ist gleich float32, alle weiteren Schritte arbeiten in place darauf)
+    data_copy = data.astype(np.float32) if compact else data.copy()
     
     # Strategie für fehlende Werte: Vorwärtsfüllen (fill forward), dann rückwärts
     if data_copy.isnull().sum().sum() > 0:
@@ -1,12 +1,11 @@
+import numpy as np
 import pandas as pd
 import sys
 import config
 from rich.console import Console
 
-# Datenaufteilung
-def split_data(data_featured: pd.DataFrame, console: Console):
-    print("Definiere Feature- und Zielspalten...")
-
+def get_feature_target_columns(data_featured: pd.DataFrame) -> tuple[list, list]:
+    """Liefert (Feature-Spalten, vorhandene Zielspalten) eines Feature-DataFrames."""
     features_cols = [
         col
         for col in data_featured.columns
@@ -15,6 +14,48 @@ def split_data(data_featured: pd.DataFrame, console: Console):
     target_cols_present = [
         col for col in config.TARGET_COLUMNS if col in data_featured.columns
     ]
+    return features_cols, target_cols_present
+
+
+def _split_compact(data_featured: pd.DataFrame, columns: list, split_index: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Train/Test als Views auf ein einziges float32-Array (eine Kopie für alle Spalten statt je eine pro Teil).
+
+    Die Estimatoren erhalten so ein float32-Array ohne weitere Umwandlung (sklearn-Bäume rechnen intern in
+    float32). Setzt einen aufsteigend sortierten Index voraus, dann entspricht der Positions-Split dem
+    Datums-Split.
+    """
+    values = data_featured[columns].to_numpy(dtype=np.float32)
+    index = data_featured.index
+    train = pd.DataFrame(values[:split_index], index=index[:split_index], columns=columns, copy=False)
+    test = pd.DataFrame(values[split_index:], index=index[split_index:], columns=columns, copy=False)
+    return train, test
+
+
+def split_frames(
+    data_featured: pd.DataFrame,
+    features_cols: list,
+    target_cols: list,
+    split_index: int,
+    compact: bool = config.COMPACT_DTYPES,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """X_train, X_test, y_train, y_test für einen chronologischen Split an Position split_index (ohne Ausgaben)."""
+    if compact and data_featured.index.is_monotonic_increasing and data_featured.index.is_unique:
+        X_train, X_test = _split_compact(data_featured, features_cols, split_index)
+        y_train, y_test = _split_compact(data_featured, target_cols, split_index)
+        return X_train, X_test, y_train, y_test
+
+    split_date = data_featured.index[split_index]
+    X = data_featured[features_cols]
+    y = data_featured[target_cols]
+    return X[X.index < split_date], X[X.index >= split_date], y[y.index < split_date], y[y.index >= split_date]
+
+
+# Datenaufteilung
+def split_data(data_featured: pd.DataFrame, console: Console, compact: bool = config.COMPACT_DTYPES):
+    print("Definiere Feature- und Zielspalten...")
+
+    features_cols, target_cols_present = get_feature_target_columns(data_featured)
 
     if not target_cols_present:
         console.print(
@@ -27,9 +68,6 @@ def split_data(data_featured: pd.DataFrame, console: Console):
     console.print(f"   Gefundene Features: {len(features_cols)}")
     console.print(f"   Gefundene Targets: {target_cols_present}")
 
-    X = data_featured[features_cols]
-    y = data_featured[target_cols_present]
-
     total_samples = len(data_featured)
     test_days = config.TEST_PERIOD_DAYS
 
@@ -54,10 +92,7 @@ def split_data(data_featured: pd.DataFrame, console: Console):
         sys.exit(1)
 
     # Daten aufteilen
-    X_train = X[X.index < split_date]
-    X_test = X[X.index >= split_date]
-    y_train = y[y.index < split_date]
-    y_test = y[y.index >= split_date]
+    X_train, X_test, y_train, y_test = split_frames(data_featured, features_cols, target_cols_present, split_index, compact)
 
     # Überprüfung des Split-Verhältnisses
     total_samples_after_engineering = X_train.shape[0] + X_test.shape[0]
@@ -74,17 +109,18 @@ def split_data(data_featured: pd.DataFrame, console: Console):
     console.print(f"     Test-Anteil:      [bold magenta]{test_percentage:.2f}%[/bold magenta]")
     console.print("[green]   ✔️ Train/Test Split abgeschlossen.[/green]")
     
+    # erst die Zeilen auswählen, dann joinen (sonst entsteht eine Kopie des ganzen Splits nur für die Ausgabe)
     console.print("\n[bold yellow]Trainingsdaten (erste 3 und letzte 3 Zeilen):[/bold yellow]")
     with pd.option_context('display.max_columns', 13, 'display.width', 1000):
-        print(X_train.join(y_train).head(3))
+        print(X_train.head(3).join(y_train))
         print("...")
-        print(X_train.join(y_train).tail(3))
+        print(X_train.tail(3).join(y_train))
 
     console.print("\n[bold yellow]Testdaten (erste 3 und letzte 3 Zeilen):[/bold yellow]")
     with pd.option_context('display.max_columns', 13, 'display.width', 1000):
-        print(X_test.join(y_test).head(3))
+        print(X_test.head(3).join(y_test))
         print("...")
-        print(X_test.join(y_test).tail(3))
+        print(X_test.tail(3).join(y_test))
     
     return (
         X_train,
@@ -0,0 +1,127 @@
+import config
+import pandas as pd
+from rich.console import Console
+
+from data_collection import find_stations, get_data_for_stations
+from interpolation import idw_interpolate, get_station_data, DEFAULT_IDW_POWER
+from data_preprocessing import preprocess_data
+from feature_engineering import engineer_features
+
+
+def load_interpolated_data(console: Console) -> pd.DataFrame | None:
+    """Stationssuche, Datenerfassung und IDW-Interpolation für den Zielort."""
+    console.rule("\n[orange1]1. Stationssuche & Datenerfassung[/orange1]")
+    try:
+        # Finde relevante Stations-IDs
+        station_ids = find_stations(console=console)
+        if not station_ids:
+            console.print("[bold red]Keine Stationen gefunden.[/bold red]")
+            return None
+        if config.INTERPOLATION_MODE == "streaming":
+            return _stream_interpolated_data(station_ids, console)
+
+        # Lade Daten für diese Stationen
+        all_station_data_dict = get_data_for_stations(
+            station_ids=station_ids,
+            start_date=config.START_DATE,
+            end_date=config.END_DATE,
+            required_columns=config.REQUIRED_COLUMNS,
+            essential_columns=config.ESSENTIAL_COLS,
+            console=console
+        )
+        if not all_station_data_dict:
+            console.print("[bold red]Keine Daten für relevante Stationen geladen.[/bold red]")
+            return None
+
+    except Exception as e:
+        console.print(f"[red] Ein Fehler bei Datenerfassung/Stationssuche ist aufgetreten: [/red] {e}")
+        console.print_exception(show_locals=False)
+        return None
+
+    console.rule("[orange1]1.5 Räumliche Interpolation (IDW)[/orange1]")
+    try:
+        # Metadaten nur für die Stationen, für die Daten geladen wurden
+        console.print("   Hole Metadaten für Interpolation...")
+        station_metadata = get_station_data(list(all_station_data_dict.keys()), console=console)
+        if not station_metadata:
+            console.print("[bold red]FEHLER: Konnte keine Metadaten für Interpolation laden.[/bold red]")
+            return None
+
+        interpolated_df = idw_interpolate(
+            all_station_data=all_station_data_dict,
+            station_metadata=station_metadata,
+            target_lat=config.TARGET_LAT,
+            target_lon=config.TARGET_LON,
+            variables=config.REQUIRED_COLUMNS,
+            console=console,
+            power=DEFAULT_IDW_POWER
+        )
+        if interpolated_df is None:
+            console.print("[bold red]FEHLER: IDW-Interpolation fehlgeschlagen.[/bold red]")
+        return interpolated_df
+
+    except Exception as e:
+        console.print(f"[red] Ein Fehler bei der Interpolation ist aufgetreten: [/red] {e}")
+        console.print_exception(show_locals=False)
+        return None
+
+
+def _stream_interpolated_data(station_ids: list, console: Console) -> pd.DataFrame | None:
+    """INTERPOLATION_MODE 'streaming': Stationen beim Laden direkt in die IDW-Summen einrechnen."""
+    from streaming_interpolation import download_and_interpolate
+
+    console.print("   Hole Metadaten für Interpolation...")
+    station_metadata = get_station_data(station_ids, console=console)
+    if not station_metadata:
+        console.print("[bold red]FEHLER: Konnte keine Metadaten für Interpolation laden.[/bold red]")
+        return None
+    console.rule("[orange1]1.5 Räumliche Interpolation (IDW, Streaming)[/orange1]")
+    results = download_and_interpolate(
+        station_metadata, {"target": (config.TARGET_LAT, config.TARGET_LON)}, console, DEFAULT_IDW_POWER,
+    )
+    if results is None:
+        console.print("[bold red]FEHLER: IDW-Interpolation fehlgeschlagen.[/bold red]")
+        return None
+    return results["target"]
+
+
+def build_featured_data(interpolated_df: pd.DataFrame, console: Console, climatology: dict | None = None) -> pd.DataFrame | None:
+    """
+    Vorverarbeitung und Feature Engineering (Schritte 3 und 4 aus main.py), mit pandas oder Polars (DATA_BACKEND).
+
+    climatology: Tabelle aus climatology.load_climatology, für die Anomalie-Features der damit trainierten Modelle.
+    """
+    if config.DATA_BACKEND == "polars":
+        from polars_backend import build_featured_data_polars
+        from climatology import add_anomaly_features
+
+        console.rule("[orange1]3./4. Datenvorverarbeitung & Feature Engineering (Polars)[/orange1]")
+        data_featured = build_featured_data_polars(interpolated_df, console)
+        if data_featured is not None:
+            data_featured = add_anomaly_features(data_featured, climatology)
+    else:
+        console.rule("[orange1]3. Datenvorverarbeitung[/orange1]")
+        data_processed = preprocess_data(interpolated_df, console)
+        if data_processed is None:
+            return None
+
+        console.rule("[orange1]4. Feature Engineering[/orange1]")
+        data_featured = engineer_features(
+            data=data_processed,
+            target_cols=config.TARGET_COLUMNS,
+            target_base_cols=config.ORIGINAL_TARGET_BASE_COLUMNS,
+            lag_days=config.LAG_DAYS,
+            climatology=climatology,
+        )
+    if data_featured is None or data_featured.empty:
+        console.print("[red] Nach dem Feature Engineering sind keine Daten mehr verfügbar [/red]")
+        return None
+    return data_featured
+
+
+def load_featured_data(console: Console, climatology: dict | None = None) -> pd.DataFrame | None:
+    """Kompletter Datenpfad bis zum Feature-DataFrame (ohne EDA), z.B. für Backtests."""
+    interpolated_df = load_interpolated_data(console)
+    if interpolated_df is None:
+        return None
+    return build_featured_data(interpolated_df, console, climatology)
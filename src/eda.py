@@ -1,5 +1,3 @@
-import seaborn as sns
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import os
@@ -9,6 +7,10 @@ from rich.console import Console
 from plot_manager import save_plot
 
 def start_eda(data: pd.DataFrame, plot_columns: list, save_dir: str, console: Console):
+    # Plot-Bibliotheken erst hier laden; der Vorhersagepfad braucht sie nicht
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
     if data.empty:
         print("DataFrame ist leer. EDA kann nicht durchgeführt werden.")
         return
@@ -1,11 +1,78 @@
+import numpy as np
 import pandas as pd
 
-def engineer_features(data: pd.DataFrame, target_cols: list, target_base_cols: list, lag_days: int) -> pd.DataFrame:
-    data = data.copy()
-    
+import config
+
+
+def _engineer_features_compact(data: pd.DataFrame, target_cols: list, target_base_cols: list, lag_days: int,
+                               climatology: dict | None = None) -> pd.DataFrame:
+    """
+    Wie engineer_features, aber alle Wert- und Lag-Spalten liegen in einem einzigen float32-Array.
+
+    Das Array wird einmal angelegt und spaltenweise befüllt (kein Kopieren beim Einfügen jeder Lag-Spalte),
+    Kalenderspalten sind int8/int16. Sind die ungültigen Zeilen ein zusammenhängender Bereich (der Normalfall:
+    Anfang durch die Lags, letzte Zeile durch das Target), wird per Slice statt per Maske gefiltert.
+    Spaltenreihenfolge und Werte entsprechen engineer_features (bis auf die Datentypen).
+    """
+    for base in target_base_cols:
+        if base not in data.columns:
+            raise ValueError(f"Basisspalte '{base}' für Zielvariable '{target_cols[target_base_cols.index(base)]}' nicht gefunden.")
+
+    value_cols = list(data.columns) + list(target_cols)
+    n_rows, n_values = len(data), len(value_cols)
+    print(f"Erstelle Zielspalten und Lag-Features (kompakt, float32) für Spalten: {value_cols}")
+
+    values = np.empty((n_rows, n_values * (1 + lag_days)), dtype=np.float32)
+    values[:, :data.shape[1]] = data.to_numpy(dtype=np.float32)
+    for j, base in enumerate(target_base_cols, start=data.shape[1]):
+        values[:-1, j] = values[1:, data.columns.get_loc(base)] # Zielwert ist der Wert des nächsten Tages
+        values[-1:, j] = np.nan
+    for j in range(n_values):
+        for i in range(1, lag_days + 1):
+            out = n_values + j * lag_days + i - 1
+            values[i:, out] = values[:-i, j]
+            values[:i, out] = np.nan
+
+    # Zeilen mit NaN-Werten entfernen, die durch die Verschiebungen entstanden sind
+    valid = ~np.isnan(values).any(axis=1)
+    valid_rows = np.flatnonzero(valid)
+    if len(valid_rows) == 0:
+        raise ValueError("\nNach Feature Engineering sind keine Daten mehr verfügbar.")
+    first, last = valid_rows[0], valid_rows[-1] + 1
+    rows = slice(first, last) if last - first == len(valid_rows) else valid
+    print(f"\n{n_rows - len(valid_rows)} Zeilen mit NaN-Werten entfernt.")
+
+    lag_cols = [f'{col}_lag_{i}' for col in value_cols for i in range(1, lag_days + 1)]
+    index = data.index[rows]
+    featured = pd.DataFrame(values[rows], index=index, columns=value_cols + lag_cols, copy=False)
+
+    print("\nErstelle zeitbasierte Features: Monat, Tag des Jahres, Wochentag...")
+    featured['month'] = index.month.to_numpy().astype(np.int8)
+    featured['dayofyear'] = index.dayofyear.to_numpy().astype(np.int16)
+    featured['weekday'] = index.weekday.to_numpy().astype(np.int8)
+    if climatology is not None:
+        from climatology import add_anomaly_features
+        featured = add_anomaly_features(featured, climatology)
+
+    print("\nDimensionen der aufbereiteten Daten:", featured.shape)
+    print(f"Speicherbedarf: {featured.memory_usage(index=True).sum() / 2**20:.1f} MB")
+    print("\nFeature Engineering abgeschlossen.")
+    return featured
+
+
+def engineer_features(data: pd.DataFrame, target_cols: list, target_base_cols: list, lag_days: int,
+                      compact: bool = config.COMPACT_DTYPES, climatology: dict | None = None) -> pd.DataFrame:
+    """
+    Zielspalten (Wert des nächsten Tages), Lags und Kalenderspalten; mit `climatology` (climatology.py) zusätzlich
+    die Anomalie-Features ihrer anomaly_columns.
+    """
     # sicherstellen, dass Zielspalten und Basisspalten übereinstimmen
     if len(target_cols) != len(target_base_cols):
         raise ValueError("target_cols und target_base_cols müssen die gleiche Länge haben.")
+    if compact:
+        return _engineer_features_compact(data, target_cols, target_base_cols, lag_days, climatology)
+
+    data = data.copy()
     
     demo_col = target_base_cols[0]
     print(f"\n--- Demonstration: Effekt von .shift(-1) für '{demo_col}' ---")
@@ -49,6 +116,9 @@ def engineer_features(data: pd.DataFrame, target_cols: list, target_base_cols: l
     if data.empty:
         raise ValueError("\nNach Feature Engineering sind keine Daten mehr verfügbar.")
         return None # es sind keine Daten vorhanden
+    if climatology is not None:
+        from climatology import add_anomaly_features
+        data = add_anomaly_features(data, climatology)
 
     print("\nDaten nach Feature Engineering (erste paar Zeilen):")
     with pd.option_context(
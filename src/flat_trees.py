@@ -0,0 +1,360 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from model_manager import save_artifact, load_artifact
+
+# Objectives, bei denen die XGBoost-Ausgabe direkt die Summe der Blätter + base_score ist
+_XGB_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:quantileerror", "reg:pseudohubererror"}
+
+_ARRAY_FIELDS = ["feature", "threshold", "left", "right", "missing_left", "value", "roots", "base_score"]
+# joblib-Dateien neben flat_models.mfa, aus denen die flachen Modelle erstellt werden
+SOURCE_FILES = ['rf_model.joblib', 'xgb_model.joblib']
+# {Dateiname: {'sha256', 'size'}} der joblib-Dateien, geschrieben von save_flat_models (siehe sources_match)
+SOURCES_FILE = 'model_sources.json'
+
+
+class FlatTreeEnsemble:
+    """
+    Baumensemble als flache NumPy-Arrays (alle Bäume hintereinander).
+
+    Alle Knoten verwenden dieselbe Regel `x <= threshold` (float32) -> links. Blätter zeigen auf sich
+    selbst, daher reicht es, alle Bäume und Zeilen `max_depth`-mal gleichzeitig einen Schritt weiterzugehen.
+    Die Vorhersage braucht weder sklearn noch xgboost.
+
+    Attribute:
+        feature, threshold, left, right, missing_left: pro Knoten (globale Knotenindizes).
+        value: Blattwerte pro Knoten und Output, Form (n_nodes, n_outputs).
+        roots: Wurzelknoten jedes Baums.
+        aggregation: 'mean' (RandomForest) oder 'sum' (Boosting, plus base_score).
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, base_score,
+                 max_depth: int, aggregation: str, feature_names: list | None = None, kind: str = ""):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.base_score = base_score
+        self.max_depth = int(max_depth)
+        self.aggregation = aggregation
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.kind = kind
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_outputs(self) -> int:
+        return self.value.shape[1]
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    # ----- Umbau -----
+
+    def subset(self, tree_ids) -> "FlatTreeEnsemble":
+        """Neues Ensemble nur aus den angegebenen Bäumen (Knoten werden neu durchnummeriert)."""
+        tree_ids = np.asarray(tree_ids, dtype=np.int64)
+        bounds = np.append(self.roots, self.n_nodes)
+        sizes = bounds[tree_ids + 1] - bounds[tree_ids]
+        nodes = np.concatenate([np.arange(bounds[t], bounds[t + 1]) for t in tree_ids])
+        new_roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        shift = np.repeat(new_roots - self.roots[tree_ids], sizes)
+        return FlatTreeEnsemble(
+            feature=self.feature[nodes],
+            threshold=self.threshold[nodes],
+            left=(self.left[nodes] + shift).astype(np.int32),
+            right=(self.right[nodes] + shift).astype(np.int32),
+            missing_left=self.missing_left[nodes],
+            value=self.value[nodes],
+            roots=new_roots.astype(np.int32),
+            base_score=self.base_score,
+            max_depth=self.max_depth,
+            aggregation=self.aggregation,
+            feature_names=self.feature_names,
+            kind=self.kind,
+        )
+
+    def with_value_dtype(self, dtype) -> "FlatTreeEnsemble":
+        """Kopie mit anderem Datentyp für die Blattwerte (z.B. float32 halbiert den größten Array)."""
+        arrays = self.to_arrays()
+        arrays["value"] = np.asarray(self.value, dtype=dtype)
+        return FlatTreeEnsemble.from_arrays(arrays, self.metadata())
+
+    # ----- Export -----
+
+    @classmethod
+    def from_random_forest(cls, rf, feature_names: list | None = None) -> "FlatTreeEnsemble":
+        """Exportiert einen (Multi-Output-)RandomForestRegressor."""
+        trees = [est.tree_ for est in rf.estimators_]
+        offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+        n_outputs = trees[0].value.shape[1]
+
+        feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            # sklearn vergleicht float32(x) <= float64(threshold); gleichwertig ist x <= größter float32 <= threshold
+            thr32 = tree.threshold.astype(np.float32)
+            thr32 = np.where(thr32.astype(np.float64) > tree.threshold, np.nextafter(thr32, np.float32(-np.inf)), thr32)
+            threshold.append(np.where(is_leaf, np.float32(np.inf), thr32))
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+            missing_left.append(np.asarray(missing, dtype=bool))
+            value.append(tree.value[:, :, 0])
+
+        if feature_names is None and hasattr(rf, "feature_names_in_"):
+            feature_names = list(rf.feature_names_in_)
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            missing_left=np.concatenate(missing_left),
+            value=np.concatenate(value).astype(np.float64),
+            roots=offsets.astype(np.int32),
+            base_score=np.zeros(n_outputs),
+            max_depth=max(t.max_depth for t in trees),
+            aggregation="mean",
+            feature_names=feature_names,
+            kind="rf",
+        )
+
+    @classmethod
+    def from_xgboost(cls, model, feature_names: list | None = None) -> "FlatTreeEnsemble":
+        """Exportiert einen XGBRegressor bzw. Booster (gbtree, ein Output pro Baum)."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in _XGB_IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective '{objective}' wird vom Flat-Export nicht unterstützt.")
+        gbtree = learner["gradient_booster"]
+        if gbtree["name"] != "gbtree":
+            raise ValueError(f"Booster-Typ '{gbtree['name']}' wird vom Flat-Export nicht unterstützt.")
+
+        trees = gbtree["model"]["trees"]
+        tree_info = gbtree["model"]["tree_info"]
+        # Bei Early Stopping nutzt predict nur die Bäume bis best_iteration
+        best_iteration = booster.attributes().get("best_iteration")
+        if best_iteration is not None:
+            n_used = gbtree["model"]["iteration_indptr"][int(best_iteration) + 1]
+            trees, tree_info = trees[:n_used], tree_info[:n_used]
+
+        params = learner["learner_model_param"]
+        n_outputs = max(int(params.get("num_target", 1)), 1)
+        base_score = np.array([float(v) for v in params["base_score"].strip("[]").split(",")], dtype=np.float64)
+        base_score = np.broadcast_to(base_score, (n_outputs,)).copy()
+
+        feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for tree, group in zip(trees, tree_info):
+            if int(tree["tree_param"].get("size_leaf_vector", 1)) > 1:
+                raise ValueError("Multi-Output-Bäume (multi_strategy='multi_output_tree') werden nicht unterstützt.")
+            tree_left = np.asarray(tree["left_children"], dtype=np.int64)
+            tree_right = np.asarray(tree["right_children"], dtype=np.int64)
+            split = np.asarray(tree["split_conditions"], dtype=np.float32)
+            n_nodes = len(tree_left)
+            is_leaf = tree_left == -1
+            node_ids = np.arange(n_nodes)
+
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+            # XGBoost geht bei x < split nach links; für float32 ist das x <= nächstkleinerer float32
+            threshold.append(np.where(is_leaf, np.float32(np.inf), np.nextafter(split, np.float32(-np.inf))))
+            left.append(np.where(is_leaf, node_ids, tree_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree_right) + offset)
+            missing_left.append(np.asarray(tree["default_left"], dtype=bool))
+            tree_value = np.zeros((n_nodes, n_outputs))
+            tree_value[is_leaf, group] = split[is_leaf]
+            value.append(tree_value)
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(tree_left, tree_right))
+            offset += n_nodes
+
+        if feature_names is None:
+            feature_names = learner.get("feature_names") or None
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            missing_left=np.concatenate(missing_left),
+            value=np.concatenate(value),
+            roots=np.asarray(roots, dtype=np.int32),
+            base_score=base_score,
+            max_depth=max_depth,
+            aggregation="sum",
+            feature_names=feature_names,
+            kind="xgb",
+        )
+
+    # ----- Vorhersage -----
+
+    def apply(self, X) -> np.ndarray:
+        """Blattknoten pro Zeile und Baum, Form (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_per_tree(self, X) -> np.ndarray:
+        """Beitrag jedes einzelnen Baums, Form (n_trees, n_rows, n_outputs)."""
+        return self.value[self.apply(X).T]
+
+    def predict(self, X) -> np.ndarray:
+        """Wie predict von sklearn/xgboost: (n_rows, n_outputs), bzw. (n_rows,) bei einem Output."""
+        leaf_values = self.value[self.apply(X)] # (n_rows, n_trees, n_outputs)
+        # Summiert wird immer in float64, auch wenn die Blattwerte als float32 gespeichert sind
+        if self.aggregation == "mean":
+            prediction = leaf_values.mean(axis=1, dtype=np.float64)
+        else:
+            prediction = leaf_values.sum(axis=1, dtype=np.float64) + self.base_score
+        return prediction[:, 0] if self.n_outputs == 1 else prediction
+
+    # ----- Serialisierung -----
+
+    def to_arrays(self, prefix: str = "") -> dict:
+        return {f"{prefix}{name}": getattr(self, name) for name in _ARRAY_FIELDS}
+
+    def metadata(self) -> dict:
+        return {
+            "max_depth": self.max_depth,
+            "aggregation": self.aggregation,
+            "feature_names": self.feature_names,
+            "kind": self.kind,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict, prefix: str = "") -> "FlatTreeEnsemble":
+        return cls(**{name: arrays[f"{prefix}{name}"] for name in _ARRAY_FIELDS}, **meta)
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = np.zeros(len(left), dtype=np.int64)
+    max_depth = 0
+    # Kinder haben in XGBoost immer größere Indizes als ihre Eltern
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, depth[node] + 1)
+    return max_depth
+
+
+def flatten_model(model, feature_names: list | None = None) -> FlatTreeEnsemble:
+    """Wählt den passenden Export für RandomForestRegressor bzw. XGBRegressor."""
+    if hasattr(model, "get_booster"):
+        return FlatTreeEnsemble.from_xgboost(model, feature_names)
+    if hasattr(model, "estimators_"):
+        return FlatTreeEnsemble.from_random_forest(model, feature_names)
+    raise TypeError(f"Modelltyp {type(model).__name__} kann nicht als flache Bäume exportiert werden.")
+
+
+def file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_source_hashes(model_dir: str) -> dict:
+    """
+    Berechnet die SHA-256 der vorhandenen joblib-Dateien (SOURCE_FILES) in model_dir einmalig und hält sie mit der
+    Dateigröße in model_dir/model_sources.json fest -> {Dateiname: SHA-256}.
+    """
+    sources = {}
+    for name in SOURCE_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            sources[name] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+    tmp_path = os.path.join(model_dir, f"{SOURCES_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, os.path.join(model_dir, SOURCES_FILE))
+    return {name: entry["sha256"] for name, entry in sources.items()}
+
+
+def _recorded_sources(model_dir: str) -> dict:
+    try:
+        with open(os.path.join(model_dir, SOURCES_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def sources_match(meta: dict, filepath: str, model_dir: str) -> bool:
+    """
+    True, wenn die joblib-Dateien in model_dir die sind, aus denen die flachen Modelle in filepath stammen.
+
+    Verglichen werden die SHA-256 aus dem Header ('sources'), nicht die Änderungszeiten: nach einem git checkout
+    haben alle Dateien beliebige mtimes. Damit die Dateien nicht bei jedem Laden gelesen werden, kommt der Hash aus
+    model_sources.json, solange die Dateigröße dort stimmt; nur sonst wird die joblib-Datei neu gehasht. Ältere
+    Dateien ohne 'sources' gelten, solange sie nicht älter als die joblib-Dateien sind.
+    """
+    paths = {name: os.path.join(model_dir, name) for name in SOURCE_FILES}
+    if "sources" not in meta:
+        return all(not os.path.exists(p) or os.path.getmtime(p) <= os.path.getmtime(filepath) for p in paths.values())
+    recorded = _recorded_sources(model_dir)
+    for name, path in paths.items():
+        if not os.path.exists(path):
+            continue
+        entry = recorded.get(name) or {}
+        sha256 = entry.get("sha256") if entry.get("size") == os.path.getsize(path) else file_sha256(path)
+        if meta["sources"].get(name) != sha256:
+            return False
+    return True
+
+
+def save_flat_models(models: dict, filepath: str, feature_names: list | None = None, compress: bool = False) -> bool:
+    """
+    Exportiert {'rf': ..., 'xgb': ...} als Modell-Artefakt (Modelle oder bereits flache Ensembles).
+
+    Unkomprimiert liegen die Arrays seitenweise ausgerichtet in der Datei und werden beim Laden per mmap
+    eingeblendet; compress=True speichert sie zlib-komprimiert (kleiner, aber ohne mmap). Der Header enthält die
+    SHA-256 der joblib-Dateien im selben Verzeichnis ('sources'), die vorher gespeichert sein müssen; dieselben Hashes
+    landen in model_sources.json (record_source_hashes).
+    """
+    try:
+        arrays = {}
+        meta = {"models": {}, "sources": record_source_hashes(os.path.dirname(filepath) or ".")}
+        for model_name, model in models.items():
+            flat = model if isinstance(model, FlatTreeEnsemble) else flatten_model(model, feature_names)
+            arrays.update(flat.to_arrays(prefix=f"{model_name}__"))
+            meta["models"][model_name] = flat.metadata()
+    except Exception as e:
+        print(f"\nFehler beim Export der flachen Baummodelle: {e}")
+        return False
+    return save_artifact(arrays, meta, filepath, compress=compress)
+
+
+def load_flat_models(filepath: str, mmap_mode: str | None = "r", source_dir: str | None = None) -> dict | None:
+    """
+    Lädt die flachen Modelle aus save_flat_models; None, wenn die Datei fehlt oder defekt ist.
+
+    source_dir: auch None, wenn die joblib-Dateien dort nicht zu den flachen Modellen passen (sources_match).
+    """
+    loaded = load_artifact(filepath, mmap_mode=mmap_mode)
+    if loaded is None:
+        return None
+    arrays, meta = loaded
+    if source_dir is not None and not sources_match(meta, filepath, source_dir):
+        return None
+    return {
+        model_name: FlatTreeEnsemble.from_arrays(arrays, model_meta, prefix=f"{model_name}__")
+        for model_name, model_meta in meta["models"].items()
+    }
@@ -0,0 +1,328 @@
+import os
+import re
+import math
+import sqlite3
+import argparse
+from datetime import date, datetime, timedelta
+
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+# Schlüssel in prediction.json -> Variable in der Historie; Variable -> Basisspalte der Messwerte
+_VALUE_KEY = re.compile(r"^(?P<model>\w+?)_(?P<unit>temp_c|wspd_kmh)$")
+_UNITS = {'temp_c': 'temp', 'wspd_kmh': 'wspd'}
+_OBSERVED_COLUMNS = {'temp': 'tavg', 'wspd': 'wspd'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    issued_at TEXT NOT NULL,
+    model TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    lead_days INTEGER NOT NULL,
+    value REAL,
+    lower REAL,
+    upper REAL,
+    PRIMARY KEY (target_date, variable, model, lead_days, issued_at)
+);
+CREATE TABLE IF NOT EXISTS observations (
+    date TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    value REAL NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (date, variable)
+);
+CREATE TABLE IF NOT EXISTS errors (
+    model TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    lead_days INTEGER NOT NULL,
+    target_date TEXT NOT NULL,
+    error REAL NOT NULL,
+    issued_at TEXT NOT NULL,
+    PRIMARY KEY (model, variable, lead_days, target_date)
+);
+CREATE TABLE IF NOT EXISTS accuracy (
+    model TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    lead_days INTEGER NOT NULL,
+    window_days INTEGER NOT NULL,
+    end_date TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    sum_abs REAL NOT NULL,
+    sum_sq REAL NOT NULL,
+    sum_error REAL NOT NULL,
+    PRIMARY KEY (model, variable, lead_days, window_days)
+);
+"""
+
+
+def _shift(iso_date: str, days: int) -> str:
+    return (date.fromisoformat(iso_date) + timedelta(days=days)).isoformat()
+
+
+def open_history(path: str = config.FORECAST_HISTORY_PATH, windows: list[int] | None = None) -> sqlite3.Connection:
+    """
+    Öffnet (oder erstellt) die Historie. Fehlen Kennzahlen für ein Fenster aus `windows`, obwohl es schon
+    bewertete Vorhersagen gibt (z.B. nach Änderung von FORECAST_HISTORY_WINDOWS), werden sie neu berechnet.
+    """
+    windows = config.FORECAST_HISTORY_WINDOWS if windows is None else windows
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    if conn.execute("SELECT 1 FROM errors LIMIT 1").fetchone():
+        present = {row[0] for row in conn.execute("SELECT DISTINCT window_days FROM accuracy")}
+        missing = [w for w in windows if w not in present]
+        if missing:
+            rebuild_accuracy(conn, missing)
+    return conn
+
+
+def forecasts_from_output(output_data: dict) -> list[dict]:
+    """
+    Zerlegt prediction.json in Einzelwerte {model, variable, target_date, lead_days, value, lower, upper}.
+
+    Morgen kommt aus den Schlüsseln auf oberster Ebene (mit Intervallen), die weiteren Tage aus 'horizon'
+    (erstes Szenario). Der Vorlauf zählt ab dem Feature-Tag (Tag vor forecast_date).
+    """
+    feature_date = date.fromisoformat(output_data["forecast_date"]) - timedelta(days=1)
+    intervals = output_data.get("intervals") or {}
+    days = [(output_data, intervals)] + [(entry, {}) for entry in output_data.get("horizon") or []]
+
+    forecasts, seen = [], set()
+    for entry, bounds in days:
+        target_date = entry.get("forecast_date", entry.get("date"))
+        lead_days = (date.fromisoformat(target_date) - feature_date).days
+        for key, value in entry.items():
+            match = _VALUE_KEY.match(key)
+            if match is None or value is None:
+                continue
+            model, variable = match["model"], _UNITS[match["unit"]]
+            if (model, variable, lead_days) in seen: # horizon[0] wiederholt den Wert für morgen
+                continue
+            seen.add((model, variable, lead_days))
+            lower, upper = bounds.get(key) or (None, None)
+            forecasts.append({
+                "model": model, "variable": variable, "target_date": target_date, "lead_days": lead_days,
+                "value": float(value), "lower": lower, "upper": upper,
+            })
+    return forecasts
+
+
+def observations_from_features(features_for_prediction, last_feature_date: date, lag_days: int = config.LAG_DAYS) -> dict:
+    """
+    Messwerte der Tage vor dem Feature-Tag aus den Lag-Spalten ({'YYYY-MM-DD': {'temp': ..., 'wspd': ...}}).
+
+    Die Werte sind die, mit denen das Modell gerechnet hat (Lücken wie bei den Features aufgefüllt); ein Tag
+    kommt also einen Lauf später an als seine Vorhersage fällig wird.
+    """
+    row = features_for_prediction.iloc[-1]
+    observations = {}
+    for lag in range(1, lag_days + 1):
+        day = (last_feature_date - timedelta(days=lag)).isoformat()
+        for variable, column in _OBSERVED_COLUMNS.items():
+            value = row.get(f"{column}_lag_{lag}")
+            if value is not None and not math.isnan(value):
+                observations.setdefault(day, {})[variable] = float(value)
+    return observations
+
+
+def record_forecasts(conn: sqlite3.Connection, forecasts: list[dict], issued_at: str,
+                     windows: list[int] | None = None) -> int:
+    """Hängt die Vorhersagen an (nie überschrieben) und bewertet sie, falls die Messwerte schon da sind."""
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(issued_at, f["model"], f["variable"], f["target_date"], f["lead_days"], f["value"], f["lower"], f["upper"])
+             for f in forecasts],
+        )
+        _evaluate(conn, {f["target_date"] for f in forecasts}, windows)
+    return len(forecasts)
+
+
+def record_observations(conn: sqlite3.Connection, observations: dict, windows: list[int] | None = None) -> int:
+    """
+    Speichert Messwerte (der erste Wert je Tag und Variable bleibt) und bewertet die dazu passenden Vorhersagen.
+    Returns: Anzahl neu bewerteter Vorhersagen.
+    """
+    recorded_at = datetime.now().isoformat()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?)",
+            [(day, variable, value, recorded_at) for day, values in observations.items() for variable, value in values.items()],
+        )
+        return _evaluate(conn, set(observations), windows)
+
+
+def _evaluate(conn: sqlite3.Connection, target_dates: set, windows: list[int] | None) -> int:
+    """
+    Verbindet noch nicht bewertete Vorhersagen für target_dates mit den Messwerten.
+
+    Bewertet wird je Modell, Variable, Vorlauf und Zieltag die zuerst ausgegebene Vorhersage; jeder Fehler
+    geht genau einmal in die Kennzahlen ein.
+    """
+    if not target_dates:
+        return 0
+    windows = config.FORECAST_HISTORY_WINDOWS if windows is None else windows
+    placeholders = ", ".join("?" * len(target_dates))
+    rows = conn.execute(
+        f"""
+        SELECT f.model, f.variable, f.lead_days, f.target_date, f.value - o.value, f.issued_at
+        FROM forecasts f JOIN observations o ON o.date = f.target_date AND o.variable = f.variable
+        WHERE f.target_date IN ({placeholders}) AND f.value IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM errors e WHERE e.model = f.model AND e.variable = f.variable
+                          AND e.lead_days = f.lead_days AND e.target_date = f.target_date)
+        ORDER BY f.target_date, f.issued_at
+        """,
+        sorted(target_dates),
+    ).fetchall()
+    evaluated = 0
+    for model, variable, lead_days, target_date, error, issued_at in rows:
+        cursor = conn.execute("INSERT OR IGNORE INTO errors VALUES (?, ?, ?, ?, ?, ?)",
+                              (model, variable, lead_days, target_date, error, issued_at))
+        if cursor.rowcount:
+            _accumulate(conn, model, variable, lead_days, target_date, error, windows)
+            evaluated += 1
+    return evaluated
+
+
+def _accumulate(conn: sqlite3.Connection, model: str, variable: str, lead_days: int, target_date: str,
+                error: float, windows: list[int]):
+    """
+    Rechnet einen Fehler in die gleitenden Summen ein (Fenster: Zieltage in (end_date - Fenster, end_date]).
+
+    Rückt end_date vor, werden nur die Fehler abgezogen, die dabei aus dem Fenster fallen - jeder Fehler wird
+    einmal addiert und einmal abgezogen, die Historie wird nie erneut gelesen.
+    """
+    key = (model, variable, lead_days)
+    for window in windows:
+        row = conn.execute(
+            "SELECT end_date, n, sum_abs, sum_sq, sum_error FROM accuracy "
+            "WHERE model = ? AND variable = ? AND lead_days = ? AND window_days = ?", (*key, window),
+        ).fetchone()
+        end_date, n, sum_abs, sum_sq, sum_error = row or (target_date, 0, 0.0, 0.0, 0.0)
+        new_end = max(end_date, target_date)
+        if target_date > _shift(new_end, -window): # verspätete Werte zählen nur, solange sie im Fenster liegen
+            n, sum_abs, sum_sq, sum_error = n + 1, sum_abs + abs(error), sum_sq + error * error, sum_error + error
+        if new_end > end_date:
+            for (old,) in conn.execute(
+                "SELECT error FROM errors WHERE model = ? AND variable = ? AND lead_days = ? "
+                "AND target_date > ? AND target_date <= ?",
+                (*key, _shift(end_date, -window), _shift(new_end, -window)),
+            ):
+                n, sum_abs, sum_sq, sum_error = n - 1, sum_abs - abs(old), sum_sq - old * old, sum_error - old
+        if n == 0: # keine Rundungsreste aus dem Abziehen mitschleppen
+            sum_abs, sum_sq, sum_error = 0.0, 0.0, 0.0
+        conn.execute("INSERT OR REPLACE INTO accuracy VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (*key, window, new_end, n, sum_abs, sum_sq, sum_error))
+
+
+def rebuild_accuracy(conn: sqlite3.Connection, windows: list[int] | None = None):
+    """Berechnet die Kennzahlen für `windows` komplett aus der Tabelle errors neu."""
+    windows = config.FORECAST_HISTORY_WINDOWS if windows is None else windows
+    with conn:
+        for window in windows:
+            conn.execute("DELETE FROM accuracy WHERE window_days = ?", (window,))
+            conn.execute(
+                """
+                INSERT INTO accuracy
+                WITH last AS (SELECT model, variable, lead_days, MAX(target_date) AS end_date
+                              FROM errors GROUP BY model, variable, lead_days)
+                SELECT e.model, e.variable, e.lead_days, ?, l.end_date,
+                       COUNT(*), SUM(ABS(e.error)), SUM(e.error * e.error), SUM(e.error)
+                FROM errors e JOIN last l USING (model, variable, lead_days)
+                WHERE e.target_date > date(l.end_date, '-' || ? || ' days')
+                GROUP BY e.model, e.variable, e.lead_days
+                """,
+                (window, window),
+            )
+
+
+def load_accuracy(path: str = config.FORECAST_HISTORY_PATH) -> list[dict] | None:
+    """
+    Fertige Kennzahlen je Modell, Variable, Vorlauf und Fenster (MAE, RMSE, Bias = Vorhersage - Messwert);
+    None, wenn es noch keine Historie gibt.
+    """
+    if not os.path.exists(path):
+        return None
+    conn = open_history(path)
+    try:
+        rows = conn.execute(
+            "SELECT model, variable, lead_days, window_days, end_date, n, sum_abs, sum_sq, sum_error FROM accuracy "
+            "ORDER BY variable, lead_days, window_days, model"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "model": model, "variable": variable, "lead_days": lead_days, "window_days": window_days,
+            "end_date": end_date, "n": n,
+            "mae": sum_abs / n if n else None,
+            "rmse": math.sqrt(max(sum_sq, 0.0) / n) if n else None,
+            "bias": sum_error / n if n else None,
+        }
+        for model, variable, lead_days, window_days, end_date, n, sum_abs, sum_sq, sum_error in rows
+    ]
+
+
+def update_history(
+    output_data: dict,
+    features_for_prediction,
+    last_feature_date: date,
+    console: Console,
+    path: str = config.FORECAST_HISTORY_PATH,
+) -> dict | None:
+    """
+    Für den täglichen Job: Vorhersage aus prediction.json anhängen, Messwerte aus den Features nachtragen.
+    Fehler werden nur gemeldet (die Vorhersage ist dann trotzdem gespeichert); Returns: Zähler oder None.
+    """
+    try:
+        conn = open_history(path)
+        try:
+            recorded = record_forecasts(conn, forecasts_from_output(output_data), output_data["generated_at"])
+            evaluated = record_observations(conn, observations_from_features(features_for_prediction, last_feature_date))
+        finally:
+            conn.close()
+    except Exception as e:
+        console.print(f"[yellow]   Vorhersagehistorie nicht aktualisiert: {e}[/yellow]")
+        return None
+    console.print(f"   Historie: {recorded} Vorhersagewerte angehängt, {evaluated} Vorhersagen neu bewertet ({path}).")
+    return {"recorded": recorded, "evaluated": evaluated}
+
+
+def print_accuracy(accuracy: list[dict], console: Console):
+    table = Table(title="Genauigkeit der ausgegebenen Vorhersagen (Bias = Vorhersage - Messwert)")
+    for column in ["Variable", "Vorlauf (Tage)", "Fenster (Tage)", "Modell", "bis", "n", "MAE", "RMSE", "Bias"]:
+        table.add_column(column, justify="right")
+    for row in accuracy:
+        metrics = [f"{row[m]:.2f}" if row[m] is not None else "-" for m in ("mae", "rmse", "bias")]
+        table.add_row(row["variable"], str(row["lead_days"]), str(row["window_days"]), row["model"],
+                      row["end_date"], str(row["n"]), *metrics)
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeigt die gleitenden Fehlerkennzahlen der Vorhersagehistorie.")
+    parser.add_argument("--path", default=config.FORECAST_HISTORY_PATH)
+    parser.add_argument("--lead", type=int, default=None, help="nur diesen Vorlauf (Tage) zeigen")
+    parser.add_argument("--rebuild", action="store_true", help="Kennzahlen komplett aus den bewerteten Vorhersagen neu berechnen")
+    args = parser.parse_args()
+
+    console = Console()
+    if args.rebuild and os.path.exists(args.path):
+        conn = open_history(args.path)
+        rebuild_accuracy(conn)
+        conn.close()
+        console.print("[green]   ✔️ Kennzahlen neu berechnet.[/green]")
+    accuracy = load_accuracy(args.path)
+    if not accuracy:
+        console.print(f"[yellow]Noch keine bewerteten Vorhersagen in {args.path}.[/yellow]")
+        return
+    if args.lead is not None:
+        accuracy = [row for row in accuracy if row["lead_days"] == args.lead]
+    print_accuracy(accuracy, console)
+
+
+if __name__ == "__main__":
+    main()
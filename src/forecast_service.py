@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rich.console import Console
+
+import config
+from update_prediction_data import (
+    get_latest_features_for_tomorrow, load_models, predict_values, predict_horizon, build_output_data,
+    predict_intervals_json,
+)
+from prediction_intervals import INTERVALS_FILE, load_calibration
+from climatology import CLIMATOLOGY_FILE, load_climatology
+from model_registry import current_model_dir
+
+console = Console()
+
+MODEL_FILES = {'rf': 'rf_model.joblib', 'xgb': 'xgb_model.joblib', 'flat': 'flat_models.mfa', 'intervals': INTERVALS_FILE,
+               'climatology': CLIMATOLOGY_FILE}
+
+
+class ForecastService:
+    """
+    Hält Modelle und die zuletzt berechneten Features im Speicher.
+
+    Die Vorhersage wird zwischengespeichert, bis ein neuer Beobachtungstag verfügbar ist
+    (Feature-Datum < gestern). Solange der Datenanbieter den neuen Tag noch nicht liefert,
+    wird höchstens alle `refetch_seconds` erneut abgefragt. Der Abruf läuft ohne die Sperre (ein langsamer
+    Datenanbieter hält weder /reload noch andere Anfragen auf, die dann die bisherigen Features verwenden);
+    die ersten Features werden schon beim Start im Hintergrund geholt.
+    """
+
+    def __init__(self, model_dir: str = config.MODEL_SAVE_DIR, refetch_seconds: int = config.FORECAST_SERVICE_REFETCH_SECONDS):
+        self.model_dir = model_dir
+        self.refetch_seconds = refetch_seconds
+        self._lock = threading.Lock()
+        self._models = None
+        self._calibration = None
+        self._climatology = None
+        self._model_mtimes = {}
+        self._features = None # (features_for_prediction, last_feature_date)
+        self._forecast = None
+        self._last_fetch = 0.0
+        self._fetching = False
+        self._features_generation = 0
+        self._fetched = threading.Condition(self._lock) # benachrichtigt, wenn ein Abruf fertig ist
+        if not self.reload()["loaded"]:
+            raise RuntimeError(f"Modelle konnten nicht aus '{model_dir}' geladen werden.")
+        threading.Thread(target=self._refresh_features, name="forecast-warmup", daemon=True).start()
+
+    @property
+    def models(self) -> dict:
+        return self._models
+
+    @property
+    def climatology(self) -> dict | None:
+        return self._climatology
+
+    @property
+    def model_names(self) -> list:
+        return sorted(self._models or {})
+
+    def _current_mtimes(self, model_dir: str) -> dict:
+        mtimes = {"model_dir": model_dir}
+        for name, filename in MODEL_FILES.items():
+            path = os.path.join(model_dir, filename)
+            mtimes[name] = os.path.getmtime(path) if os.path.exists(path) else None
+        return mtimes
+
+    def reload(self) -> dict:
+        """
+        Lädt die Modelle neu, wenn sich die Dateien geändert haben. Die Features bleiben im Cache, außer sie
+        enthalten Anomalie-Features und climatology.json hat sich geändert.
+        """
+        with self._lock:
+            model_dir = current_model_dir(self.model_dir) # Verzeichnis der aktuellen Version (ein Zeiger)
+            mtimes = self._current_mtimes(model_dir)
+            if self._models is not None and mtimes == self._model_mtimes:
+                return {"loaded": False, "reason": "Modelldateien unverändert"}
+            models = load_models(model_dir)
+            if models is None:
+                # Alte Modelle weiter verwenden, statt den Dienst ohne Modelle zu lassen
+                return {"loaded": False, "reason": "Modelle konnten nicht geladen werden"}
+            self._models = models
+            self._calibration = load_calibration(model_dir)
+            climatology = load_climatology(model_dir)
+            climatology_changed = (mtimes["model_dir"], mtimes["climatology"]) != (
+                self._model_mtimes.get("model_dir"), self._model_mtimes.get("climatology")
+            )
+            if climatology_changed and ((climatology or {}).get("anomaly_columns") or (self._climatology or {}).get("anomaly_columns")):
+                self._features = None # andere Normalwerte -> Features neu abrufen
+                self._features_generation += 1 # ein laufender Abruf mit der alten Klimatologie wird verworfen
+                self._last_fetch = 0.0
+            self._climatology = climatology
+            self._model_mtimes = mtimes
+            self._forecast = None # Vorhersage mit neuen Modellen neu berechnen
+            return {"loaded": True, "models": sorted(models)}
+
+    def _features_outdated(self) -> bool:
+        if self._features is None:
+            return True
+        newest_possible_day = date.today() - timedelta(days=1)
+        return self._features[1] < newest_possible_day
+
+    def _refresh_features(self):
+        """Holt neue Features, wenn sie veraltet sind; die Sperre wird nur zum Prüfen und Austauschen gehalten."""
+        with self._lock:
+            if self._fetching or not self._features_outdated() or time.monotonic() - self._last_fetch < self.refetch_seconds:
+                return
+            self._fetching, self._last_fetch = True, time.monotonic()
+            climatology, generation = self._climatology, self._features_generation
+        features_for_prediction, last_feature_date = None, None
+        try:
+            features_for_prediction, _, last_feature_date = get_latest_features_for_tomorrow(climatology)
+        finally:
+            with self._lock:
+                self._fetching = False
+                # nach einem reload mit anderer Klimatologie passen die Features nicht mehr zu den Modellen
+                if (features_for_prediction is not None and generation == self._features_generation
+                        and (self._features is None or last_feature_date > self._features[1])):
+                    self._features = (features_for_prediction, last_feature_date)
+                    self._forecast = None
+                self._fetched.notify_all()
+
+    def forecast(self) -> dict:
+        self._refresh_features()
+        with self._lock:
+            while self._features is None and self._fetching: # erster Abruf (z.B. beim Start) läuft noch
+                self._fetched.wait()
+            if self._features is None:
+                raise RuntimeError("Keine Features für die Vorhersage verfügbar.")
+
+            if self._forecast is None:
+                features_for_prediction, last_feature_date = self._features
+                predictions_output = predict_values(self._models, features_for_prediction, config.TARGET_COLUMNS)
+                horizon = predict_horizon(self._models, features_for_prediction, last_feature_date, self._climatology)
+                intervals = predict_intervals_json(self._models, features_for_prediction, predictions_output, self._calibration)
+                self._forecast = build_output_data(last_feature_date + timedelta(days=1), predictions_output, horizon, intervals)
+            return self._forecast
+
+
+def make_handler(service: ForecastService):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload, indent=2).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/forecast":
+                try:
+                    self._send_json(200, service.forecast())
+                except Exception as e:
+                    self._send_json(503, {"error": str(e)})
+            elif self.path == "/accuracy":
+                from forecast_history import load_accuracy
+                self._send_json(200, {"accuracy": load_accuracy() or []})
+            elif self.path == "/health":
+                self._send_json(200, {"status": "ok", "models": service.model_names})
+            else:
+                self._send_json(404, {"error": f"Unbekannter Pfad {self.path}"})
+
+        def do_POST(self):
+            if self.path == "/reload":
+                self._send_json(200, service.reload())
+            else:
+                self._send_json(404, {"error": f"Unbekannter Pfad {self.path}"})
+
+        def log_message(self, format, *args):
+            console.print(f"   [dim]{self.address_string()} {format % args}[/dim]")
+
+    return ForecastHandler
+
+
+def serve(
+    host: str = config.FORECAST_SERVICE_HOST,
+    port: int = config.FORECAST_SERVICE_PORT,
+    model_dir: str = config.MODEL_SAVE_DIR,
+    service: ForecastService | None = None,
+):
+    """Startet den HTTP-Dienst; mit `service` (z.B. aus cli.Session) werden dessen Modelle und Features verwendet."""
+    console.rule("[bold blue]MeteoFlow Vorhersagedienst[/bold blue]")
+    if service is None:
+        try:
+            service = ForecastService(model_dir)
+        except RuntimeError as e:
+            console.print(f"[red]FEHLER: {e}[/red]")
+            sys.exit(1)
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    console.print(f"[green]   ✔️ Dienst läuft auf http://{host}:{port} (GET /forecast, GET /accuracy, POST /reload, GET /health)[/green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[bold magenta]Dienst wird beendet.[/bold magenta]")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler HTTP-Vorhersagedienst mit Modellen im Speicher.")
+    parser.add_argument("--host", default=config.FORECAST_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.FORECAST_SERVICE_PORT)
+    parser.add_argument("--model-dir", default=config.MODEL_SAVE_DIR)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.model_dir)
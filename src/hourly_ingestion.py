@@ -0,0 +1,300 @@
+import os
+import sys
+import time
+import zlib
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from station_cube import StationCube
+
+# Spalten von Meteostat Hourly (für die synthetischen Daten im Benchmark)
+HOURLY_SOURCE_COLUMNS = ['temp', 'dwpt', 'rhum', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun', 'coco']
+
+
+def fetch_hourly(station_id: str, start: datetime, end: datetime) -> pd.DataFrame:
+    """Stundenwerte einer Station von start bis end (inklusive, UTC) über Meteostat."""
+    from meteostat import Hourly
+
+    return Hourly(station_id, start, end).fetch()
+
+
+def day_chunks(start: datetime, end: datetime, chunk_days: int | None = config.HOURLY_CHUNK_DAYS) -> list[tuple]:
+    """
+    Zerlegt [start, end] in Abrufblöcke aus ganzen Tagen (erste bis letzte Stunde).
+
+    Weil kein Tag auf zwei Blöcke verteilt ist, lässt sich jeder Block für sich zu Tageswerten verdichten.
+    chunk_days=None: ein Block für den ganzen Zeitraum.
+    """
+    first_day = pd.Timestamp(start).normalize()
+    last_day = pd.Timestamp(end).normalize()
+    step = pd.Timedelta(days=chunk_days) if chunk_days else last_day - first_day + pd.Timedelta(days=1)
+    chunks = []
+    chunk_start = first_day
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + step, last_day + pd.Timedelta(days=1)) - pd.Timedelta(hours=1)
+        chunks.append((chunk_start.to_pydatetime(), chunk_end.to_pydatetime()))
+        chunk_start = chunk_end + pd.Timedelta(hours=1)
+    return chunks
+
+
+def aggregate_hourly(
+    hourly: pd.DataFrame,
+    night_hours: list[int] = config.HOURLY_NIGHT_HOURS,
+    min_hours: int = config.HOURLY_MIN_HOURS,
+) -> pd.DataFrame:
+    """
+    Verdichtet Stundenwerte zu Tageswerten (Spalten config.HOURLY_DAILY_COLUMNS, Index: Tage).
+
+    Die Stunden werden in ein Raster (Tage, 24) einsortiert, fehlende Stunden sind NaN; alle Kennzahlen sind
+    Reduktionen über die Stundenachse. Tage mit weniger als min_hours Messungen bekommen NaN, das Nachtminimum
+    braucht mindestens die Hälfte der night_hours.
+    """
+    hourly = hourly[~hourly.index.duplicated(keep="first")]
+    if hourly.empty:
+        return pd.DataFrame(columns=config.HOURLY_DAILY_COLUMNS, index=pd.DatetimeIndex([], name="time"), dtype=np.float64)
+    first_day = hourly.index.min().normalize()
+    hours = ((hourly.index - first_day) // pd.Timedelta(hours=1)).to_numpy()
+    n_days = int(hours.max()) // 24 + 1
+
+    def grid(column: str) -> np.ndarray:
+        values = np.full(n_days * 24, np.nan)
+        if column in hourly.columns:
+            values[hours] = hourly[column].to_numpy(dtype=np.float64)
+        return values.reshape(n_days, 24)
+
+    temp, wpgt, pres = grid("temp"), grid("wpgt"), grid("pres")
+
+    # fmax/fmin ignorieren NaN (ohne Warnung bei Tagen ganz ohne Werte)
+    temp_hours = (~np.isnan(temp)).sum(axis=1)
+    temp_range = np.fmax.reduce(temp, axis=1) - np.fmin.reduce(temp, axis=1)
+    night = temp[:, night_hours]
+    tmin_night = np.fmin.reduce(night, axis=1)
+    wpgt_max = np.fmax.reduce(wpgt, axis=1)
+
+    # Tendenz: letzter minus erster Druckwert des Tages, auf 24 Stunden umgerechnet
+    has_pres = ~np.isnan(pres)
+    first_hour = has_pres.argmax(axis=1)
+    last_hour = 23 - has_pres[:, ::-1].argmax(axis=1)
+    rows = np.arange(n_days)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pres_tendency = (pres[rows, last_hour] - pres[rows, first_hour]) / (last_hour - first_hour) * 24
+
+    daily = pd.DataFrame({
+        "temp_range": np.where(temp_hours >= min_hours, temp_range, np.nan),
+        "tmin_night": np.where((~np.isnan(night)).sum(axis=1) * 2 >= len(night_hours), tmin_night, np.nan),
+        "wpgt_max": np.where((~np.isnan(wpgt)).sum(axis=1) >= min_hours, wpgt_max, np.nan),
+        "pres_tendency": np.where(has_pres.sum(axis=1) >= min_hours, pres_tendency, np.nan),
+    }, index=pd.date_range(first_day, periods=n_days, freq="D", name="time"))
+    return daily[config.HOURLY_DAILY_COLUMNS]
+
+
+def ingest_hourly(
+    cube: StationCube,
+    start: datetime,
+    end: datetime,
+    console: Console,
+    fetch=fetch_hourly,
+    chunk_days: int | None = config.HOURLY_CHUNK_DAYS,
+) -> dict:
+    """
+    Lädt für alle Stationen des Würfels Stundenwerte in Blöcken und schreibt die Tageswerte in den Würfel.
+
+    Je Station ist immer nur ein Block Stundenwerte im Speicher: abrufen, verdichten, eintragen, verwerfen.
+    `fetch(station_id, start, end)` liefert die Stundenwerte eines Blocks (Standard: Meteostat). Fehler bei einem
+    Block werden gemeldet und übersprungen. Returns: Zähler (Stundenzeilen, geschriebene Werte, Zeiten).
+    """
+    missing = [col for col in config.HOURLY_DAILY_COLUMNS if col not in cube.variables]
+    if missing:
+        raise ValueError(f"Dem Würfel fehlen die Spalten {missing}.")
+    cube.extend_to(pd.Timestamp(end).normalize())
+    if pd.Timestamp(start).normalize() < cube.start_date:
+        console.print(f"   [yellow]WARNUNG: Der Würfel beginnt am {cube.start_date.date()}, frühere Tage werden nicht geladen.[/yellow]")
+        start = cube.start_date.to_pydatetime()
+
+    chunks = day_chunks(start, end, chunk_days)
+    stats = {"stations": 0, "rows": 0, "values": 0, "fetch_s": 0.0, "aggregate_s": 0.0}
+    t_start = time.perf_counter()
+    for station_id in cube.station_ids:
+        station_rows = 0
+        for chunk_start, chunk_end in chunks:
+            t0 = time.perf_counter()
+            try:
+                hourly = fetch(station_id, chunk_start, chunk_end)
+            except Exception as e:
+                console.print(f"     [red]Fehler beim Laden von {station_id} ({chunk_start.date()} - {chunk_end.date()}): {e}[/red]")
+                continue
+            t1 = time.perf_counter()
+            stats["fetch_s"] += t1 - t0
+            if hourly is None or hourly.empty:
+                continue
+            stats["values"] += cube.write_station(station_id, aggregate_hourly(hourly))
+            station_rows += len(hourly)
+            del hourly
+            stats["aggregate_s"] += time.perf_counter() - t1
+        cube.flush() # neu geöffnete Leser sehen die Station sofort
+        if station_rows:
+            stats["stations"] += 1
+            stats["rows"] += station_rows
+        else:
+            console.print(f"     [yellow]Keine Stundenwerte für Station {station_id}.[/yellow]")
+    stats["seconds"] = time.perf_counter() - t_start
+    return stats
+
+
+def open_or_create_cube(
+    path: str,
+    station_metadata: dict[str, tuple[float, float]],
+    start: datetime,
+    end: datetime,
+) -> StationCube | None:
+    """
+    Öffnet den Würfel unter `path` zum Schreiben oder legt ihn an (Tages- und Stundenspalten).
+
+    Returns None, wenn ein vorhandener Würfel nicht alle Stationen oder Spalten enthält.
+    """
+    variables = config.REQUIRED_COLUMNS + config.HOURLY_DAILY_COLUMNS
+    if os.path.exists(os.path.join(path, "meta.json")):
+        cube = StationCube.open(path, mode="r+")
+        if set(station_metadata) - set(cube.station_ids) or set(variables) - set(cube.variables):
+            return None
+        return cube
+    n_days = (pd.Timestamp(end).normalize() - pd.Timestamp(start).normalize()).days + 1
+    return StationCube.create(list(station_metadata), station_metadata, variables,
+                              pd.Timestamp(start).normalize(), n_days, path)
+
+
+# ----- Benchmark -----
+
+def synthetic_hourly(station_id: str, start: datetime, end: datetime) -> pd.DataFrame:
+    """Stundenwerte wie von Meteostat (Tages- und Jahresgang + Rauschen, ~3 % fehlende Stunden); reproduzierbar."""
+    index = pd.date_range(start, end, freq="h", name="time")
+    rng = np.random.default_rng([config.RANDOM_STATE, zlib.crc32(station_id.encode()), index[0].toordinal()])
+    n = len(index)
+    season = np.sin(2 * np.pi * index.dayofyear.to_numpy() / 365.25)
+    hours = (index - pd.Timestamp("2000-01-01")) // pd.Timedelta(hours=1)
+    diurnal = np.sin(2 * np.pi * (index.hour.to_numpy() - 9) / 24)
+    temp = 10 + 9 * season + 4 * diurnal + rng.normal(0, 1.5, n)
+    data = pd.DataFrame({
+        "temp": temp,
+        "dwpt": temp - rng.gamma(2, 2, n),
+        "rhum": rng.uniform(40, 100, n),
+        "prcp": rng.gamma(0.2, 1, n),
+        "snow": np.zeros(n),
+        "wdir": rng.uniform(0, 360, n),
+        "wspd": rng.gamma(2, 6, n),
+        "wpgt": rng.gamma(3, 8, n),
+        "pres": 1015 + 8 * np.sin(2 * np.pi * hours / (24 * 4.5)) + rng.normal(0, 0.3, n), # Tiefs alle ~4,5 Tage
+        "tsun": rng.uniform(0, 60, n),
+        "coco": rng.integers(1, 9, n).astype(np.float64),
+    }, index=index)[HOURLY_SOURCE_COLUMNS]
+    return data[rng.random(n) >= 0.03]
+
+
+def measure(years: int, n_stations: int, chunk_days: int | None) -> dict:
+    """Ein Lauf für Durchsatz, ein zweiter mit tracemalloc für den Spitzenspeicher (Würfel als Datei)."""
+    end = datetime(2024, 12, 31, 23)
+    start = end - timedelta(days=365 * years - 1, hours=23)
+    metadata = {f"S{s}": (config.TARGET_LAT + 0.1 * s, config.TARGET_LON) for s in range(n_stations)}
+    console = Console(quiet=True)
+    with tempfile.TemporaryDirectory(prefix="meteoflow_hourly_") as work_dir:
+        cube = open_or_create_cube(os.path.join(work_dir, "timing"), metadata, start, end)
+        stats = ingest_hourly(cube, start, end, console, fetch=synthetic_hourly, chunk_days=chunk_days)
+
+        cube = open_or_create_cube(os.path.join(work_dir, "memory"), metadata, start, end)
+        tracemalloc.start()
+        ingest_hourly(cube, start, end, console, fetch=synthetic_hourly, chunk_days=chunk_days)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        filled = float(cube.valid[:, :, [cube.variables.index(c) for c in config.HOURLY_DAILY_COLUMNS]].mean())
+    return {
+        "mode": f"Blöcke à {chunk_days} Tage" if chunk_days else "ganzer Zeitraum",
+        **stats,
+        "rows_per_s": stats["rows"] / stats["seconds"],
+        "aggregate_rows_per_s": stats["rows"] / stats["aggregate_s"],
+        "peak_mb": peak / 2**20,
+        "filled": filled,
+    }
+
+
+def print_benchmark(rows: list[dict], years: int, n_stations: int, console: Console):
+    table = Table(title=f"Stündliche Daten -> Tageswerte ({years} Jahre × {n_stations} Stationen)")
+    for column in ["Modus", "Stundenzeilen", "Zeit (s)", "Zeilen/s", "ohne Abruf", "Peak (MB)", "gefüllt"]:
+        table.add_column(column, justify="right")
+    for row in rows:
+        table.add_row(
+            row["mode"], f"{row['rows']:,}", f"{row['seconds']:.1f}", f"{row['rows_per_s']:,.0f}",
+            f"{row['aggregate_rows_per_s']:,.0f}", f"{row['peak_mb']:.1f}", f"{row['filled']:.1%}",
+        )
+    console.print(table)
+    console.print("   ohne Abruf: nur Verdichten und Schreiben (Abruf = Erzeugen der synthetischen Stundenwerte).")
+    console.print("   Peak per tracemalloc; gefüllt: Anteil gültiger Tageswerte im Würfel.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stündliche Meteostat-Daten blockweise laden und als Tageswerte in den StationCube schreiben."
+    )
+    parser.add_argument("--cube-dir", default=config.STATION_CUBE_DIR)
+    parser.add_argument("--radius", type=float, default=config.SEARCH_RADIUS_KM, help="Stationen im Umkreis (km)")
+    parser.add_argument("--max-stations", type=int, default=config.MAX_NEARBY_STATIONS)
+    parser.add_argument("--chunk-days", type=int, default=config.HOURLY_CHUNK_DAYS)
+    parser.add_argument("--with-daily", action="store_true",
+                        help="auch die Tageswerte (REQUIRED_COLUMNS, Meteostat Daily) in den Würfel schreiben")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Durchsatz und Spitzenspeicher mit synthetischen Stundenwerten messen")
+    parser.add_argument("--years", type=int, default=20, help="Jahre für --benchmark")
+    parser.add_argument("--stations", type=int, default=10, help="Stationen für --benchmark")
+    args = parser.parse_args()
+
+    console = Console()
+    if args.benchmark:
+        rows = []
+        for chunk_days in (args.chunk_days, None):
+            console.print(f"   Messe {args.years} Jahre × {args.stations} Stationen, {chunk_days or 'ganzer Zeitraum'}...")
+            rows.append(measure(args.years, args.stations, chunk_days))
+        print_benchmark(rows, args.years, args.stations, console)
+        return
+
+    console.rule("[bold purple4]Stündliche Daten laden[/bold purple4]")
+    from data_collection import find_stations, get_data_for_stations
+    from interpolation import get_station_data
+
+    station_ids = find_stations(console, radius_km=args.radius, max_stations=args.max_stations)
+    station_metadata = get_station_data(station_ids, console) if station_ids else {}
+    if not station_metadata:
+        console.print("[bold red]Keine Stationen mit Koordinaten gefunden. Breche ab.[/bold red]")
+        sys.exit(1)
+
+    cube = open_or_create_cube(args.cube_dir, station_metadata, config.START_DATE, config.END_DATE)
+    if cube is None:
+        console.print(f"[bold red]FEHLER: Der Würfel in {args.cube_dir} enthält nicht alle Stationen/Spalten; "
+                      f"anderes Verzeichnis mit --cube-dir wählen oder das vorhandene löschen.[/bold red]")
+        sys.exit(1)
+
+    if args.with_daily:
+        daily_data = get_data_for_stations(list(station_metadata), config.START_DATE, config.END_DATE,
+                                           config.REQUIRED_COLUMNS, config.ESSENTIAL_COLS, console)
+        cube.extend_to(config.END_DATE)
+        for station_id, station_df in daily_data.items():
+            cube.write_station(station_id, station_df)
+        cube.flush()
+
+    console.print(f"\n[cyan]Lade Stundenwerte für {len(station_metadata)} Station(en) in Blöcken à {args.chunk_days} Tage...[/cyan]")
+    stats = ingest_hourly(cube, config.START_DATE, config.END_DATE, console, chunk_days=args.chunk_days)
+    console.print(
+        f"[green]   ✔️ {stats['rows']:,} Stundenzeilen von {stats['stations']} Station(en) in {stats['seconds']:.1f} s "
+        f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} Zeilen/s, davon Abruf {stats['fetch_s']:.1f} s); "
+        f"Tageswerte in {args.cube_dir}[/green]"
+    )
+
+
+if __name__ == "__main__":
+    main()
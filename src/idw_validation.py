@@ -0,0 +1,208 @@
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from geo_utils import haversine_distance
+from interpolation import DEFAULT_IDW_POWER, MIN_STATIONS_FOR_IDW
+from station_cube import StationCube
+
+
+def station_distances(station_ids: list, station_metadata: dict) -> np.ndarray:
+    """Abstände aller Stationen untereinander in km, Form (Stationen, Stationen)."""
+    lat = np.array([station_metadata[sid][0] for sid in station_ids], dtype=np.float64)
+    lon = np.array([station_metadata[sid][1] for sid in station_ids], dtype=np.float64)
+    return haversine_distance(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def neighbour_masks(distances: np.ndarray, k_values: list) -> np.ndarray:
+    """
+    Je k die Stationen, aus denen eine Station vorhergesagt wird: ihre k nächsten (ohne sie selbst; None = alle).
+
+    Wie im Betrieb (find_stations) ist die Auswahl fest und hängt nicht davon ab, welche Stationen an einem Tag
+    Werte haben. Form (len(k_values), Ziel, Quelle).
+    """
+    n_stations = len(distances)
+    order = np.argsort(np.where(np.eye(n_stations, dtype=bool), np.inf, distances), axis=1, kind="stable")
+    masks = np.zeros((len(k_values), n_stations, n_stations), dtype=bool)
+    rows = np.arange(n_stations)[:, None]
+    for i, k in enumerate(k_values):
+        k = n_stations - 1 if k is None else min(k, n_stations - 1)
+        masks[i, rows, order[:, :k]] = True
+    return masks
+
+
+def leave_one_station_out(
+    all_station_data: dict[str, pd.DataFrame],
+    station_metadata: dict[str, tuple[float, float]],
+    variables: list[str] = config.REQUIRED_COLUMNS,
+    powers: list[float] = config.IDW_VALIDATION_POWERS,
+    k_values: list = config.IDW_VALIDATION_K,
+    chunk_days: int = config.IDW_VALIDATION_CHUNK_DAYS,
+) -> pd.DataFrame:
+    """
+    Sagt jede Station an jedem Tag und für jede Variable aus den übrigen Stationen voraus (IDW wie in
+    idw_interpolate) und vergleicht mit ihren Messwerten, für alle Kombinationen aus Potenz und k in einem Durchgang.
+
+    Die Gewichte aller Kombinationen liegen in einer Matrix (Kombinationen x Ziel, Quelle); gewichtete Summen und
+    Gewichtssummen aller Stationen und Kombinationen sind je Variable und Tagesblock eine Matrixmultiplikation,
+    statt N-mal idw_interpolate aufzurufen. Eine zweite Station am selben Ort (< 1 m) wird nicht direkt übernommen,
+    sondern bekommt nur das maximale Gewicht.
+
+    Returns:
+        Eine Zeile je (power, k, variable) mit MAE, RMSE, Bias, Anzahl Vergleiche (n), Abdeckung (Anteil der
+        Messwerte, für die eine Vorhersage möglich war) und score (RMSE / Standardabweichung der Variable).
+    """
+    station_cube = StationCube.from_station_data(all_station_data, station_metadata, variables)
+    return leave_one_station_out_cube(station_cube, powers, k_values, chunk_days)
+
+
+def leave_one_station_out_cube(
+    station_cube: StationCube,
+    powers: list[float] = config.IDW_VALIDATION_POWERS,
+    k_values: list = config.IDW_VALIDATION_K,
+    chunk_days: int = config.IDW_VALIDATION_CHUNK_DAYS,
+) -> pd.DataFrame:
+    """leave_one_station_out für einen StationCube (z.B. memory-mapped); bewertet alle Variablen des Würfels."""
+    station_ids, variables = station_cube.station_ids, station_cube.variables
+    if len(station_ids) < 2:
+        raise ValueError("Für die Validierung werden mindestens zwei Stationen mit Metadaten benötigt.")
+    cube, has_value = station_cube.values, station_cube.valid # ungültige Werte sind 0
+    reference_index = station_cube.dates
+
+    distances = station_distances(station_ids, station_cube.coordinates())
+    masks = neighbour_masks(distances, k_values)
+    combinations = [(p, k_index) for p in powers for k_index in range(len(k_values))]
+    n_combinations, n_stations = len(combinations), len(station_ids)
+    # (Kombination * Ziel, Quelle): Zeile c * n_stations + t enthält die Gewichte für Station t in Kombination c
+    weights = np.concatenate([
+        np.where(masks[k_index], 1.0 / np.maximum(distances, 0.001) ** p, 0.0) for p, k_index in combinations
+    ])
+    counts_needed = MIN_STATIONS_FOR_IDW > 1
+
+    totals = {name: np.zeros((n_combinations, len(variables))) for name in ("abs", "sq", "sum", "n")}
+    for v in range(len(variables)):
+        values = np.ascontiguousarray(cube[:, :, v])
+        present = np.ascontiguousarray(has_value[:, :, v], dtype=np.float64)
+        for start in range(0, len(reference_index), chunk_days):
+            day_slice = slice(start, start + chunk_days)
+            observed, observed_mask = values[day_slice], has_value[day_slice, :, v]
+            weighted_sum = (values[day_slice] @ weights.T).reshape(-1, n_combinations, n_stations)
+            sum_of_weights = (present[day_slice] @ weights.T).reshape(-1, n_combinations, n_stations)
+            predictable = sum_of_weights > 0
+            if counts_needed:
+                counts = present[day_slice] @ masks.reshape(-1, n_stations).T.astype(np.float64)
+                counts = counts.reshape(-1, len(k_values), n_stations)[:, [k for _, k in combinations], :]
+                predictable &= counts >= MIN_STATIONS_FOR_IDW
+            compared = predictable & observed_mask[:, None, :]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                errors = np.where(compared, weighted_sum / sum_of_weights - observed[:, None, :], 0.0)
+            totals["abs"][:, v] += np.abs(errors).sum(axis=(0, 2))
+            totals["sq"][:, v] += (errors ** 2).sum(axis=(0, 2))
+            totals["sum"][:, v] += errors.sum(axis=(0, 2))
+            totals["n"][:, v] += compared.sum(axis=(0, 2))
+
+    n_observed = has_value.sum(axis=(0, 1))
+    std = np.array([values[mask].std() if mask.any() else np.nan
+                    for values, mask in zip(np.moveaxis(cube, 2, 0), np.moveaxis(has_value, 2, 0))])
+    rows = []
+    for c, (p, k_index) in enumerate(combinations):
+        for v, var in enumerate(variables):
+            n = totals["n"][c, v]
+            rmse = np.sqrt(totals["sq"][c, v] / n) if n else np.nan
+            rows.append({
+                "power": p,
+                "k": k_values[k_index],
+                "variable": var,
+                "MAE": totals["abs"][c, v] / n if n else np.nan,
+                "RMSE": rmse,
+                "bias": totals["sum"][c, v] / n if n else np.nan,
+                "n": int(n),
+                "coverage": n / n_observed[v] if n_observed[v] else np.nan,
+                "score": rmse / std[v] if std[v] else np.nan,
+            })
+    return pd.DataFrame(rows)
+
+
+def summarize_validation(errors: pd.DataFrame) -> pd.DataFrame:
+    """RMSE je Variable und mittlerer score je Kombination (power, k), beste zuerst."""
+    errors = errors.assign(k=errors["k"].fillna(0).astype(int)) # k=None (alle Stationen) als 0
+    summary = errors.pivot_table(index=["power", "k"], columns="variable", values="RMSE", sort=False)
+    summary["score"] = errors.groupby(["power", "k"], sort=False)["score"].mean()
+    return summary.sort_values("score")
+
+
+def print_validation_summary(summary: pd.DataFrame, console: Console):
+    table = Table(title="Leave-one-station-out: RMSE je Variable")
+    table.add_column("Potenz", justify="right")
+    table.add_column("k", justify="right")
+    variables = [col for col in summary.columns if col != "score"]
+    for col in variables + ["score (RMSE/σ)"]:
+        table.add_column(col, justify="right")
+    best = summary.min()
+    for (power, k), row in summary.iterrows():
+        cells = [
+            f"[bold green]{row[col]:.3f}[/bold green]" if row[col] == best[col] else f"{row[col]:.3f}"
+            for col in variables + ["score"]
+        ]
+        table.add_row(f"{power:g}", str(k) if k else "alle", *cells)
+    console.print(table)
+    power, k = summary.index[0]
+    console.print(
+        f"   Beste Kombination: Potenz {power:g}, {k if k else 'alle'} Stationen "
+        f"(aktuell: Potenz {DEFAULT_IDW_POWER:g}, {config.MAX_NEARBY_STATIONS} Stationen)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="IDW-Parameter mit Leave-one-station-out bewerten (jede Station aus den übrigen vorhersagen)."
+    )
+    parser.add_argument("--radius", type=float, default=config.IDW_VALIDATION_RADIUS_KM,
+                        help="Stationen im Umkreis des Zielorts (km)")
+    parser.add_argument("--max-stations", type=int, default=config.IDW_VALIDATION_MAX_STATIONS)
+    parser.add_argument("--years", type=int, default=config.IDW_VALIDATION_YEARS)
+    parser.add_argument("--powers", type=float, nargs="+", default=config.IDW_VALIDATION_POWERS)
+    parser.add_argument("--k", type=int, nargs="+", default=None,
+                        help="k nächste Stationen (0 = alle; Standard: IDW_VALIDATION_K)")
+    parser.add_argument("--output", default=config.IDW_VALIDATION_RESULTS_PATH)
+    args = parser.parse_args()
+    k_values = config.IDW_VALIDATION_K if args.k is None else [k or None for k in args.k]
+
+    console = Console()
+    console.rule("[bold purple4]Validierung der IDW-Interpolation[/bold purple4]")
+    from data_collection import find_stations, get_data_for_stations
+    from interpolation import get_station_data
+
+    station_ids = find_stations(console, radius_km=args.radius, max_stations=args.max_stations)
+    end_date = config.END_DATE
+    all_station_data = get_data_for_stations(
+        station_ids, end_date - timedelta(days=365 * args.years), end_date,
+        config.REQUIRED_COLUMNS, config.ESSENTIAL_COLS, console,
+    )
+    station_metadata = get_station_data(list(all_station_data), console) if all_station_data else {}
+    if len(station_metadata) < 2:
+        console.print("[bold red]Zu wenige Stationen für die Validierung. Breche ab.[/bold red]")
+        sys.exit(1)
+
+    console.rule("[orange1]Leave-one-station-out[/orange1]")
+    start = time.perf_counter()
+    errors = leave_one_station_out(all_station_data, station_metadata, powers=args.powers, k_values=k_values)
+    console.print(
+        f"   {len(station_metadata)} Stationen, {len(args.powers) * len(k_values)} Kombinationen, "
+        f"{errors['n'].sum():,} Vergleiche in {time.perf_counter() - start:.1f} s"
+    )
+    print_validation_summary(summarize_validation(errors), console)
+
+    errors.to_csv(args.output, index=False)
+    console.print(f"[green]   ✔️ Fehler je Kombination und Variable gespeichert in {args.output}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+# Was beim Kaltstart gemessen wird: nur das Modul oder Modul + Modelle laden (Unpickling zieht weitere Bibliotheken nach)
+SCENARIOS = {
+    "entry": "import update_prediction_data",
+    "models": "import update_prediction_data; update_prediction_data.load_models()",
+}
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parst die Ausgabe von `python -X importtime` in Einträge mit self/cumulative (µs), Tiefe und Modulname."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            "module": module,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(indent) - 1) // 2,
+        })
+    return entries
+
+
+def measure_imports(code: str, cwd: str = _THIS_DIR) -> list[dict]:
+    """Startet einen frischen Interpreter und misst die Importe für `code`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Messlauf fehlgeschlagen:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries: list[dict], startup_modules: set[str]) -> dict:
+    """Gesamtzeit (Summe der Top-Level-Importe ohne Interpreter-Start) und Eigenzeit je Top-Level-Paket."""
+    entries = [e for e in entries if e["module"] not in startup_modules]
+    total_us = sum(e["cumulative_us"] for e in entries if e["depth"] == 0)
+
+    per_package = defaultdict(int)
+    for entry in entries:
+        per_package[entry["module"].split(".")[0]] += entry["self_us"]
+    return {
+        "total_ms": total_us / 1000,
+        "packages": {name: us / 1000 for name, us in per_package.items()},
+        "modules": {e["module"] for e in entries},
+    }
+
+
+def run_benchmark(scenario: str = "entry", repeat: int = 3) -> dict:
+    """Misst ein Szenario `repeat`-mal und liefert den Median der Gesamtzeit und die Paketaufteilung des Medianlaufs."""
+    # Module, die der Interpreter schon ohne Skript lädt (site, encodings, ...), zählen nicht zum Budget
+    startup_modules = {e["module"] for e in measure_imports("pass")}
+    runs = [summarize(measure_imports(SCENARIOS[scenario]), startup_modules) for _ in range(repeat)]
+    runs.sort(key=lambda r: r["total_ms"])
+    median_run = runs[len(runs) // 2]
+    median_run["runs_ms"] = [r["total_ms"] for r in runs]
+    median_run["median_ms"] = statistics.median(median_run["runs_ms"])
+    return median_run
+
+
+def print_report(scenario: str, report: dict, budget_ms: float, top: int, console: Console):
+    table = Table(title=f"Import-Zeit '{scenario}': {SCENARIOS[scenario]}")
+    table.add_column("Paket")
+    table.add_column("Eigenzeit (ms)", justify="right")
+    table.add_column("Anteil", justify="right")
+    packages = sorted(report["packages"].items(), key=lambda item: item[1], reverse=True)
+    total = sum(ms for _, ms in packages) or 1.0
+    for name, ms in packages[:top]:
+        table.add_row(name, f"{ms:.1f}", f"{ms / total:.0%}")
+    console.print(table)
+    status = "[green]OK[/green]" if report["median_ms"] <= budget_ms else "[red]ÜBERSCHRITTEN[/red]"
+    console.print(
+        f"   Median: [bold]{report['median_ms']:.0f} ms[/bold] (Läufe: {', '.join(f'{r:.0f}' for r in report['runs_ms'])}) "
+        f"- Budget {budget_ms:.0f} ms: {status}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Misst die Import-Zeit des täglichen Vorhersage-Einstiegspunkts.")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="entry")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Budget in ms (Standard: IMPORT_TIME_BUDGET_MS aus config.py für das Szenario)")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit-Code 1, wenn das Budget überschritten wird oder verbotene Module geladen werden")
+    args = parser.parse_args()
+
+    console = Console()
+    budget_ms = args.budget_ms if args.budget_ms is not None else config.IMPORT_TIME_BUDGET_MS[args.scenario]
+    report = run_benchmark(args.scenario, args.repeat)
+    print_report(args.scenario, report, budget_ms, args.top, console)
+
+    forbidden = sorted(
+        module for module in report["modules"]
+        if module.split(".")[0] in config.PREDICTION_FORBIDDEN_IMPORTS
+    )
+    if forbidden:
+        roots = sorted({module.split(".")[0] for module in forbidden})
+        console.print(f"   [red]Nicht benötigte Module im Vorhersagepfad geladen: {roots}[/red]")
+
+    if args.check and (report["median_ms"] > budget_ms or forbidden):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,9 @@
 import pandas as pd
 import numpy as np
 from rich.console import Console
-from tqdm import tqdm
-from meteostat import Stations
-import sys
-
 
 from geo_utils import haversine_distance
+from station_cube import StationCube
 
 import config
 
@@ -15,6 +12,8 @@ MIN_STATIONS_FOR_IDW = 1
 
 def get_station_data(station_ids: list, console: Console) -> dict: # Konsole hinzugefügt
     """ Holt Metadaten (Koordinaten) für die gegebenen Stations-IDs. """
+    from meteostat import Stations
+
     console.print("   Lade Stationsinventar...") # Nachricht geändert
     try:
         # Lade das *gesamte* Stationsinventar
@@ -61,88 +60,138 @@ def idw_interpolate(
     variables: list[str],
     console: Console,
     power: int = DEFAULT_IDW_POWER,
+    compact: bool = config.COMPACT_DTYPES,
 ) -> pd.DataFrame | None:
-    
-    console.print(f"\n[cyan]Starte IDW-Interpolation für {variables} (p={power})...[/cyan]")
+    """IDW-Interpolation für einen Zielort (Sonderfall von idw_interpolate_many)."""
+    results = idw_interpolate_many(
+        all_station_data,
+        station_metadata,
+        targets={"target": (target_lat, target_lon)},
+        variables=variables,
+        console=console,
+        power=power,
+        compact=compact,
+    )
+    return None if results is None else results["target"]
+
+
+def idw_interpolate_many(
+    all_station_data: dict[str, pd.DataFrame],
+    station_metadata: dict[str, tuple[float, float]],
+    targets: dict[str, tuple[float, float]],
+    variables: list[str],
+    console: Console,
+    power: int = DEFAULT_IDW_POWER,
+    station_subsets: dict[str, list] | None = None,
+    compact: bool = config.COMPACT_DTYPES,
+) -> dict[str, pd.DataFrame] | None:
+    """
+    IDW-Interpolation für mehrere Zielorte in einem Durchgang.
+
+    Alle Stationswerte liegen in einem Array (Tage, Stationen, Variablen); Gewichte und Summen werden für
+    alle Zielorte, Tage und Variablen gleichzeitig berechnet. Wie bisher gilt: liegt eine Station quasi am
+    Zielort (< 1 m) und hat an dem Tag einen Wert, wird dieser direkt übernommen (bei mehreren die erste
+    in der Reihenfolge von all_station_data); Tage mit weniger als MIN_STATIONS_FOR_IDW Werten bleiben NaN.
+
+    Args:
+        targets: {Name: (lat, lon)}.
+        station_subsets: optional {Name: [Stations-IDs]}, die für diesen Zielort verwendet werden (Standard: alle).
+        compact: Ergebnis als float32 (gerechnet wird weiter in float64).
+
+    Returns:
+        {Name: DataFrame (Index 'time', Spalten = variables)} oder None.
+    """
+    console.print(f"\n[cyan]Starte IDW-Interpolation für {len(targets)} Zielort(e), {variables} (p={power})...[/cyan]")
     if not all_station_data or not station_metadata:
         console.print("[red]FEHLER: Keine Stationsdaten oder Metadaten für Interpolation vorhanden.[/red]")
         return None
-    
-    reference_index = None
-    all_indices = []
-    for df in all_station_data.values():
-        all_indices.append(df.index)
-    if not all_indices: return None
-    # Finde den frühesten Start und das späteste Ende
-    min_date = min(idx.min() for idx in all_indices)
-    max_date = max(idx.max() for idx in all_indices)
-    reference_index = pd.date_range(start=min_date, end=max_date, freq='D') # Tagesfrequenz annehmen
-    console.print(f"   Interpoliere für Zeitraum: {min_date.date()} bis {max_date.date()}")
-    
-    interpolated_data = {}
-    
-    distances = {}
-    valid_station_ids = list(station_metadata.keys()) # IDs der Stationen mit Metadaten
-    for station_id in valid_station_ids:
-        lat, lon = station_metadata[station_id]
-        distances[station_id] = haversine_distance(lat, lon, target_lat, target_lon)
-        
+
+    # Referenzzeitraum: frühester Start bis spätestes Ende aller Stationen
+    cube = StationCube.from_station_data(all_station_data, station_metadata, variables)
+    return idw_interpolate_cube(cube, targets, console, power, station_subsets, compact)
+
+
+def idw_interpolate_cube(
+    cube: StationCube,
+    targets: dict[str, tuple[float, float]],
+    console: Console,
+    power: int = DEFAULT_IDW_POWER,
+    station_subsets: dict[str, list] | None = None,
+    compact: bool = config.COMPACT_DTYPES,
+) -> dict[str, pd.DataFrame]:
+    """
+    IDW für mehrere Zielorte direkt aus einem StationCube (z.B. memory-mapped, ohne DataFrame je Station).
+
+    Gleiche Regeln und Rückgabe wie idw_interpolate_many; interpoliert werden alle Variablen des Würfels.
+    """
+    reference_index, variables = cube.dates, cube.variables
+    console.print(f"   Interpoliere für Zeitraum: {reference_index[0].date()} bis {reference_index[-1].date()}")
+    station_ids = cube.station_ids
+    cube, has_value, lat, lon = cube.values, cube.valid, cube.lat, cube.lon # ungültige Werte sind 0
+
+    results = {}
+    for target_name, (target_lat, target_lon) in targets.items():
+        allowed = set(station_subsets[target_name]) if station_subsets and target_name in station_subsets else None
+        use = np.array([allowed is None or sid in allowed for sid in station_ids])
+        distances = haversine_distance(lat, lon, target_lat, target_lon)
+
+        exact = use & (distances < 0.001)
+        weights = np.where(use & ~exact, 1.0 / np.maximum(distances, 0.001) ** power, 0.0)
+        # Summen über die Stationen für alle Tage und Variablen auf einmal: (Tage, Variablen)
+        weighted_sum = np.einsum("dsv,s->dv", cube, weights)
+        # pro Station statt einsum über die Maske, das die ganze Maske erst nach float64 umwandeln würde
+        sum_of_weights = np.zeros_like(weighted_sum)
+        for s in np.flatnonzero(weights):
+            sum_of_weights += has_value[:, s, :] * weights[s]
+        stations_with_value = has_value[:, use, :].sum(axis=1)
+
+        # Direkte Treffer überschreiben den IDW-Wert; die erste Station mit Wert gewinnt
+        exact_value = np.zeros_like(weighted_sum)
+        has_exact = np.zeros(weighted_sum.shape, dtype=bool)
+        for s in reversed(np.flatnonzero(exact)):
+            exact_value = np.where(has_value[:, s, :], cube[:, s, :], exact_value)
+            has_exact |= has_value[:, s, :]
+
+        results[target_name] = idw_result(
+            weighted_sum, sum_of_weights, stations_with_value, exact_value, has_exact,
+            reference_index, variables, target_name, console, compact,
+        )
+
+    console.print("[green]   ✔️ IDW-Interpolation abgeschlossen.[/green]")
+    return results
+
+
+def idw_result(
+    weighted_sum: np.ndarray,
+    sum_of_weights: np.ndarray,
+    stations_with_value: np.ndarray,
+    exact_value: np.ndarray,
+    has_exact: np.ndarray,
+    reference_index: pd.DatetimeIndex,
+    variables: list[str],
+    target_name: str,
+    console: Console,
+    compact: bool = config.COMPACT_DTYPES,
+) -> pd.DataFrame:
+    """
+    Interpolierte Werte eines Zielorts aus den Summen über die Stationen (alle Arrays: Tage x Variablen).
+
+    Gemeinsamer letzter Schritt von idw_interpolate_cube und streaming_interpolation.IdwAccumulator.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        interpolated = np.where(
+            (stations_with_value >= MIN_STATIONS_FOR_IDW) & (sum_of_weights > 0),
+            weighted_sum / sum_of_weights,
+            np.nan,
+        )
+    interpolated = np.where(has_exact, exact_value, interpolated)
+
+    if compact:
+        interpolated = interpolated.astype(np.float32)
+    # interpolated gehört nur diesem Zielort, der DataFrame darf es ohne Kopie übernehmen
+    result_df = pd.DataFrame(interpolated, index=reference_index, columns=variables, copy=False)
     for var in variables:
-        console.print(f"   Interpoliere Variable: [magenta]{var}[/magenta]...")
-        interpolated_values = []
-        num_missing_days = 0
-
-        # Iteriere über jeden Tag im Referenzzeitraum (mit Fortschrittsbalken)
-        for target_date in tqdm(reference_index, desc=f"Interpolating {var}", unit="day", file=sys.stdout): # Zeige Fortschritt in Konsole
-            weighted_sum = 0.0
-            sum_of_weights = 0.0
-            stations_with_value = 0
-
-            # Iteriere über die verfügbaren Stationen
-            for station_id, station_df in all_station_data.items():
-                if station_id not in distances: continue # Überspringe, falls keine Distanz/Metadaten
-
-                # Hole Wert der Station für diesen Tag (falls vorhanden und nicht NaN)
-                if target_date in station_df.index and var in station_df.columns:
-                    value = station_df.loc[target_date, var]
-                    if pd.notna(value):
-                        dist = distances[station_id]
-                        # Vermeide Division durch Null, wenn Distanz sehr klein ist
-                        if dist < 0.001: # Wenn Station quasi am Zielpunkt liegt
-                            # Nimm direkt diesen Wert (oder behandle speziell)
-                            weighted_sum = value
-                            sum_of_weights = 1.0
-                            stations_with_value = 999 # Markierung für direkten Treffer
-                            break # Keine weitere Berechnung nötig für diesen Tag
-
-                        weight = 1.0 / (dist ** power)
-                        weighted_sum += weight * value
-                        sum_of_weights += weight
-                        stations_with_value += 1
-
-            # Berechne den interpolierten Wert für diesen Tag
-            interpolated_value = np.nan # Standardwert, falls nichts gefunden
-            if stations_with_value >= MIN_STATIONS_FOR_IDW:
-                if sum_of_weights > 0:
-                    interpolated_value = weighted_sum / sum_of_weights
-                elif stations_with_value == 999: # Direkter Treffer
-                     interpolated_value = weighted_sum # War schon der Wert selbst
-
-            if np.isnan(interpolated_value):
-                num_missing_days += 1
-
-            interpolated_values.append(interpolated_value)
-
-        interpolated_data[var] = interpolated_values
+        num_missing_days = int(result_df[var].isna().sum())
         if num_missing_days > 0:
-            console.print(f"     [yellow]Warnung: Für {var} konnten an {num_missing_days} Tagen keine Werte interpoliert werden (zu wenige Stationen?).[/yellow]")
-
-    # Erstelle den finalen DataFrame
-    try:
-        result_df = pd.DataFrame(interpolated_data, index=reference_index)
-        result_df.index.name = 'time' # Index benennen
-        console.print("[green]   ✔️ IDW-Interpolation abgeschlossen.[/green]")
-        return result_df
-    except Exception as e:
-        console.print(f"[red]FEHLER beim Erstellen des finalen interpolierten DataFrames: {e}[/red]")
-        return None
\ No newline at end of file
+            console.print(f"     [yellow]Warnung: Für {var} ({target_name}) konnten an {num_missing_days} Tagen keine Werte interpoliert werden (zu wenige Stationen?).[/yellow]")
+    return result_df
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from flat_trees import FlatTreeEnsemble, flatten_model, save_flat_models, load_flat_models
+
+# Schritte für compress_random_forest / RF_COMPRESSION (werden der Reihe nach angewendet)
+COMPRESSION_STEPS = ['prune', 'max_leaf', 'float32', 'distill_rf', 'distill_xgb']
+
+
+def prune_trees(flat: FlatTreeEnsemble, X_ref, n_keep: int) -> FlatTreeEnsemble:
+    """
+    Behält die n_keep Bäume, die zusammen die Vorhersage des ganzen Waldes am besten nachbilden.
+
+    Greedy-Vorwärtsauswahl: pro Schritt kommt der Baum dazu, der den Abstand (RMSE, je Target durch dessen
+    Streuung geteilt) zwischen Teilwald und vollem Wald auf X_ref am stärksten verkleinert. Es werden keine
+    Labels verwendet, daher kann X_ref auch die Trainingsdaten sein.
+    """
+    per_tree = flat.predict_per_tree(X_ref) # (n_trees, n_rows, n_outputs)
+    target = per_tree.mean(axis=0)
+    scale = target.std(axis=0)
+    scale[scale == 0] = 1.0
+    per_tree = per_tree / scale
+    target = target / scale
+
+    selected = []
+    running_sum = np.zeros_like(target)
+    for k in range(min(n_keep, flat.n_trees)):
+        errors = (((running_sum + per_tree) / (k + 1) - target) ** 2).mean(axis=(1, 2))
+        errors[selected] = np.inf
+        best = int(np.argmin(errors))
+        selected.append(best)
+        running_sum += per_tree[best]
+    return flat.subset(sorted(selected))
+
+
+def train_max_leaf_forest(X_train, y_train, rf_parameter: dict, max_leaf_nodes: int):
+    """Trainiert den RandomForest neu, diesmal mit höchstens max_leaf_nodes Blättern pro Baum."""
+    from sklearn.ensemble import RandomForestRegressor
+
+    model = RandomForestRegressor(**{**rf_parameter, "max_leaf_nodes": max_leaf_nodes})
+    model.fit(X_train, y_train)
+    return model
+
+
+def distill(teacher, X_train, student: str):
+    """Trainiert ein kleines Modell ('rf' oder 'xgb') auf den Vorhersagen des Lehrers statt auf den echten Targets."""
+    soft_targets = teacher.predict(np.asarray(X_train, dtype=np.float32))
+    if soft_targets.ndim == 1:
+        soft_targets = soft_targets.reshape(-1, 1)
+    if student == "rf":
+        from sklearn.ensemble import RandomForestRegressor
+        model = RandomForestRegressor(**config.RF_DISTILL_RF_PARAMETER)
+    else:
+        from xgboost import XGBRegressor
+        model = XGBRegressor(**config.RF_DISTILL_XGB_PARAMETER)
+    model.fit(X_train, soft_targets)
+    return model
+
+
+def compress_random_forest(rf_model, X_train: pd.DataFrame, y_train: pd.DataFrame, steps: list[str],
+                           rf_parameter: dict) -> FlatTreeEnsemble:
+    """
+    Wendet die Kompressionsschritte nacheinander an und liefert das Ergebnis als flaches Ensemble.
+
+    'prune' und 'float32' verändern das aktuelle Ensemble, 'max_leaf' trainiert den Wald mit rf_parameter neu
+    (dieselben Parameter wie rf_model, z.B. aus resolve_parameters), 'distill_rf'/'distill_xgb' lernen vom
+    aktuellen Ensemble.
+    """
+    feature_names = list(X_train.columns)
+    current = flatten_model(rf_model, feature_names)
+    for step in steps:
+        if step == "prune":
+            current = prune_trees(current, X_train, config.RF_COMPRESSION_PRUNE_TREES)
+        elif step == "max_leaf":
+            forest = train_max_leaf_forest(X_train, y_train, rf_parameter, config.RF_COMPRESSION_MAX_LEAF_NODES)
+            current = flatten_model(forest, feature_names)
+        elif step == "float32":
+            current = current.with_value_dtype(np.float32)
+        elif step in ("distill_rf", "distill_xgb"):
+            student = distill(current, X_train, step.split("_")[1])
+            current = flatten_model(student, feature_names)
+        else:
+            raise ValueError(f"Unbekannter Kompressionsschritt '{step}' (erlaubt: {COMPRESSION_STEPS}).")
+    return current
+
+
+def save_compressed_flat_models(models: dict, X_train: pd.DataFrame, y_train: pd.DataFrame, X_test: pd.DataFrame,
+                                y_test: pd.DataFrame, save_dir: str, steps: list[str], rf_parameter: dict,
+                                console: Console) -> bool:
+    """
+    Ersetzt den RF in save_dir/flat_models.mfa durch die komprimierte Fassung (XGB bleibt unverändert)
+    und zeigt Größe, Latenz und Genauigkeit vor/nach der Kompression auf dem Testsplit.
+    """
+    flat_rf = compress_random_forest(models["rf"], X_train, y_train, steps, rf_parameter)
+    with tempfile.TemporaryDirectory() as work_dir:
+        rows = [
+            measure_variant("flat", flatten_model(models["rf"], list(X_train.columns)), X_test, y_test, work_dir),
+            measure_variant("+".join(steps), flat_rf, X_test, y_test, work_dir),
+        ]
+    print_compression_report(rows, console)
+    return save_flat_models(
+        {"rf": flat_rf, "xgb": models["xgb"]},
+        os.path.join(save_dir, "flat_models.mfa"),
+        feature_names=list(X_train.columns),
+        compress=config.MODEL_ARTIFACT_COMPRESS,
+    )
+
+
+def _median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def measure_variant(name: str, flat: FlatTreeEnsemble, X_test: pd.DataFrame, y_test: pd.DataFrame, work_dir: str) -> dict:
+    """Dateigröße, Ladezeit, Latenz für eine Zeile und Test-RMSE je Target eines flachen Ensembles."""
+    path = os.path.join(work_dir, f"{name}.mfa")
+    save_flat_models({"rf": flat}, path)
+    X_np = X_test.to_numpy(dtype=np.float32)
+    y_pred = flat.predict(X_np).reshape(len(X_test), -1)
+    rmse = np.sqrt(((y_pred - y_test.to_numpy()) ** 2).mean(axis=0))
+    return {
+        "variant": name,
+        "n_trees": flat.n_trees,
+        "n_nodes": flat.n_nodes,
+        "size_mb": os.path.getsize(path) / 2**20,
+        "load_ms": _median_ms(lambda: load_flat_models(path, mmap_mode=None), 5),
+        "predict_ms": _median_ms(lambda: flat.predict(X_np[-1:]), 50),
+        "rmse": dict(zip(y_test.columns, rmse.tolist())),
+    }
+
+
+def measure_joblib(rf_model, X_test: pd.DataFrame, y_test: pd.DataFrame, work_dir: str) -> dict:
+    """Dieselben Kennzahlen für den ursprünglichen RandomForest als joblib-Datei (Ausgangspunkt)."""
+    import joblib
+
+    path = os.path.join(work_dir, "rf_model.joblib")
+    joblib.dump(rf_model, path)
+    y_pred = rf_model.predict(X_test).reshape(len(X_test), -1)
+    rmse = np.sqrt(((y_pred - y_test.to_numpy()) ** 2).mean(axis=0))
+    return {
+        "variant": "original (joblib)",
+        "n_trees": len(rf_model.estimators_),
+        "n_nodes": sum(est.tree_.node_count for est in rf_model.estimators_),
+        "size_mb": os.path.getsize(path) / 2**20,
+        "load_ms": _median_ms(lambda: joblib.load(path), 5),
+        "predict_ms": _median_ms(lambda: rf_model.predict(X_test.iloc[-1:]), 20),
+        "rmse": dict(zip(y_test.columns, rmse.tolist())),
+    }
+
+
+def compression_report(rf_model, X_train: pd.DataFrame, y_train: pd.DataFrame, X_test: pd.DataFrame,
+                       y_test: pd.DataFrame, rf_parameter: dict, variants: dict | None = None,
+                       console: Console | None = None) -> list[dict]:
+    """
+    Vergleicht Kompressionsvarianten ({Name: [Schritte]}) mit dem Original auf dem Testsplit.
+
+    Returns:
+        Eine Zeile pro Variante (Größe, Laden, Latenz, RMSE je Target), die erste ist das Original.
+    """
+    console = console or Console()
+    variants = variants or config.RF_COMPRESSION_REPORT_VARIANTS
+    rows = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        rows.append(measure_joblib(rf_model, X_test, y_test, work_dir))
+        rows.append(measure_variant("flat", flatten_model(rf_model, list(X_train.columns)), X_test, y_test, work_dir))
+        for name, steps in variants.items():
+            console.print(f"   Komprimiere: {name} ({' -> '.join(steps)})")
+            t0 = time.perf_counter()
+            flat = compress_random_forest(rf_model, X_train, y_train, steps, rf_parameter)
+            row = measure_variant(name, flat, X_test, y_test, work_dir)
+            row["compress_s"] = time.perf_counter() - t0
+            rows.append(row)
+    return rows
+
+
+def print_compression_report(rows: list[dict], console: Console):
+    targets = list(rows[0]["rmse"])
+    baseline = rows[0]
+    table = Table(title="RandomForest-Kompression (Testsplit)")
+    for column in ["Variante", "Bäume", "Knoten", "Datei (MB)", "Laden (ms)", "Predict 1 Zeile (ms)"]:
+        table.add_column(column, justify="right")
+    for target in targets:
+        table.add_column(f"RMSE {target}", justify="right")
+    for row in rows:
+        cells = [
+            row["variant"], str(row["n_trees"]), f"{row['n_nodes']:,}", f"{row['size_mb']:.2f}",
+            f"{row['load_ms']:.1f}", f"{row['predict_ms']:.2f}",
+        ]
+        for target in targets:
+            delta = (row["rmse"][target] / baseline["rmse"][target] - 1) * 100
+            cells.append(f"{row['rmse'][target]:.3f} ({delta:+.1f}%)")
+        table.add_row(*cells)
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht Kompressionsvarianten des RandomForest-Modells.")
+    parser.add_argument("--model-dir", default=config.MODEL_SAVE_DIR, help="Verzeichnis mit rf_model.joblib")
+    parser.add_argument("--retrain", action="store_true", help="RandomForest mit config- bzw. getunten Parametern neu trainieren")
+    args = parser.parse_args()
+
+    console = Console()
+    console.rule("[bold purple4]RandomForest-Kompression[/bold purple4]")
+
+    from dataset import load_featured_data
+    from data_splitting import split_data
+    from climatology import load_climatology
+    from model_registry import current_model_dir
+    model_dir = current_model_dir(args.model_dir)
+    data_featured = load_featured_data(console, load_climatology(model_dir))
+    if data_featured is None:
+        console.print("[bold red]Keine Daten verfügbar. Breche ab.[/bold red]")
+        sys.exit(1)
+    X_train, X_test, y_train, y_test, *_ = split_data(data_featured, console)
+
+    from model_training import build_models, resolve_parameters
+    rf_parameter, xgb_parameter = resolve_parameters(config.RF_PARAMETER, config.XGB_PARAMETER)
+    rf_parameter = {**rf_parameter, "n_jobs": -1}
+    rf_model = None
+    if not args.retrain:
+        from model_manager import load_model
+        rf_model = load_model(os.path.join(model_dir, "rf_model.joblib"), console)
+        if rf_model is not None and list(getattr(rf_model, "feature_names_in_", [])) != list(X_train.columns):
+            console.print("[yellow]Gespeichertes Modell passt nicht zu den aktuellen Features, trainiere neu.[/yellow]")
+            rf_model = None
+    if rf_model is None:
+        rf_model = build_models(rf_parameter, xgb_parameter)["rf"]
+        rf_model.fit(X_train, y_train)
+
+    console.rule("[orange1]Varianten[/orange1]")
+    rows = compression_report(rf_model, X_train, y_train, X_test, y_test, rf_parameter, console=console)
+    print_compression_report(rows, console)
+
+
+if __name__ == "__main__":
+    main()
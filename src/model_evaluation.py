@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 from plot_manager import save_plot
 
@@ -13,7 +11,13 @@ def evaluate_model(
     target_cols: list,
     # plot_target_col: str,
     save_dir: str,
+    plots: bool = True,
 ):
+    """Metriken (MAE, RMSE, R²) je Modell und Zielvariable; mit plots=False ohne Plots (und ohne matplotlib)."""
+    if plots:
+        import matplotlib.pyplot as plt
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
     results = {}
     # predictions = {}
 
@@ -60,6 +64,8 @@ def evaluate_model(
             except Exception as e:
                 print(f"FEHLER bei Metrikberechnung für {model_name} - {target}: {e}")
 
+            if not plots:
+                continue
             print(f"\nErstelle Plot für {model_name} - {target}...")
             try:
                 plt.figure(figsize=(15, 6))
@@ -110,6 +116,7 @@ def evaluate_model(
         results[model_name] = metrics  # Speichere Metriken für das Modell
 
     print("Modellbewertung abgeschlossen.")
+    return results
 
 def create_temperature_time_series(
     X_train: pd.DataFrame,
@@ -137,6 +144,8 @@ def create_temperature_time_series(
         target_cols: Liste der Zielspalten-Namen
         save_dir: Verzeichnis zum Speichern der Plots
     """
+    import matplotlib.pyplot as plt
+
     if target_col_idx >= len(target_cols):
         print(f"FEHLER: Ungültiger Target-Index {target_col_idx} für {target_cols}")
         return
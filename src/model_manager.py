@@ -1,10 +1,22 @@
 import os
-import joblib
+import json
 import sys
+import zlib
+import struct
 
+import numpy as np
 from rich.console import Console
 
+# ----- Modell-Artefakte (Arrays + Metadaten) -----
+# Aufbau: Magic | Header-Länge (uint64) | JSON-Header | Arrays, jedes an einer Seitengrenze.
+# Unkomprimierte Arrays können so direkt per mmap (read-only) eingeblendet und von mehreren Prozessen
+# über den Page-Cache geteilt werden; komprimierte Arrays (zlib) werden beim Laden entpackt.
+ARTIFACT_MAGIC = b"MFLOWART"
+ARTIFACT_PAGE_SIZE = 4096
+
 def save_model(model, filepath: str) -> bool:
+    import joblib
+
     if not filepath:
         print("\nFehler: Dateipfad ist leer.")
         return False
@@ -29,6 +41,8 @@ def save_model(model, filepath: str) -> bool:
         return False
 
 def load_model(filepath: str, console: Console):
+    import joblib
+
     if not filepath:
         console.print("\nFehler: kein Dateipfad zum Laden des Modells angegeben.")
         return None
@@ -43,4 +57,130 @@ def load_model(filepath: str, console: Console):
         return model
     except Exception as e:
         console.print(f"\nFehler beim Laden des Modells von {filepath}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def save_tuned_parameters(tuned: dict, filepath: str) -> bool:
+    """Speichert die besten Hyperparameter pro Modell ({'rf': {...}, 'xgb': {...}}) als JSON."""
+    try:
+        save_dir = os.path.dirname(filepath)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        with open(filepath, 'w') as f:
+            json.dump(tuned, f, indent=2)
+        print(f"\nGetunte Parameter gespeichert: {filepath}")
+        return True
+    except Exception as e:
+        print(f"\nFehler beim Speichern der getunten Parameter unter {filepath}: {e}")
+        return False
+
+def load_tuned_parameters(filepath: str) -> dict:
+    """Lädt getunte Hyperparameter; gibt ein leeres Dict zurück, wenn keine Datei existiert."""
+    if not filepath or not os.path.exists(filepath):
+        return {}
+    try:
+        with open(filepath) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"\nFehler beim Laden der getunten Parameter von {filepath}: {e}")
+        return {}
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ARTIFACT_PAGE_SIZE) * ARTIFACT_PAGE_SIZE
+
+
+def save_artifact(arrays: dict, meta: dict, filepath: str, compress: bool = False, compress_level: int = 6) -> bool:
+    """
+    Speichert benannte NumPy-Arrays plus JSON-Metadaten als Artefakt.
+
+    Args:
+        arrays: {name: np.ndarray}, numerische/bool Arrays.
+        meta: JSON-serialisierbare Metadaten.
+        compress: zlib-Kompression für die Ablage (dann kein mmap beim Laden).
+    """
+    try:
+        blobs = {}
+        entries = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            data = array.tobytes()
+            if compress:
+                data = zlib.compress(data, compress_level)
+            blobs[name] = data
+            entries[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "codec": "zlib" if compress else "raw",
+                "nbytes": len(data),
+            }
+
+        # Offsets hängen von der Header-Länge ab, die wiederum die Offsets enthält -> Platz großzügig reservieren
+        header_reserved = _align(len(json.dumps({"arrays": entries, "meta": meta})) + 64 * len(entries) + 1024)
+        offset = header_reserved
+        for name in entries:
+            entries[name]["offset"] = offset
+            offset = _align(offset + entries[name]["nbytes"])
+        header = json.dumps({"arrays": entries, "meta": meta}).encode("utf-8")
+        prefix = ARTIFACT_MAGIC + struct.pack("<Q", len(header))
+        if len(prefix) + len(header) > header_reserved:
+            raise ValueError("Artefakt-Header größer als reservierter Platz.")
+
+        save_dir = os.path.dirname(filepath)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        # Erst in eine temporäre Datei schreiben und dann ersetzen: Prozesse, die die alte Datei
+        # gerade eingeblendet haben, lesen weiter eine vollständige Version
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(prefix + header)
+            for name, data in blobs.items():
+                f.seek(entries[name]["offset"])
+                f.write(data)
+            f.truncate(offset)
+        os.replace(tmp_path, filepath)
+        print(f"\nArtefakt gespeichert ({'zlib' if compress else 'mmap-fähig'}): {filepath}")
+        return True
+    except Exception as e:
+        print(f"\nFehler beim Speichern des Artefakts unter {filepath}: {e}")
+        return False
+
+
+def load_artifact(filepath: str, mmap_mode: str | None = "r") -> tuple[dict, dict] | None:
+    """
+    Lädt ein Artefakt aus save_artifact.
+
+    Mit mmap_mode='r' sind unkomprimierte Arrays schreibgeschützte Views auf die eingeblendete Datei
+    (kein Einlesen, Seiten werden erst bei Zugriff geladen). mmap_mode=None liest alles in den Speicher.
+
+    Returns:
+        (arrays, meta) oder None, wenn die Datei fehlt oder ungültig ist.
+    """
+    if not filepath or not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath, "rb") as f:
+            magic = f.read(len(ARTIFACT_MAGIC))
+            if magic != ARTIFACT_MAGIC:
+                raise ValueError("Keine MeteoFlow-Artefaktdatei.")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+
+        entries = header["arrays"]
+        needs_file = any(e["codec"] == "raw" for e in entries.values())
+        if mmap_mode is not None and needs_file:
+            buffer = np.memmap(filepath, dtype=np.uint8, mode=mmap_mode)
+        else:
+            with open(filepath, "rb") as f:
+                buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+        arrays = {}
+        for name, entry in entries.items():
+            raw = buffer[entry["offset"]:entry["offset"] + entry["nbytes"]]
+            if entry["codec"] == "zlib":
+                raw = np.frombuffer(zlib.decompress(raw), dtype=np.uint8)
+            arrays[name] = raw.view(np.dtype(entry["dtype"])).reshape(entry["shape"])
+        return arrays, header["meta"]
+    except Exception as e:
+        print(f"\nFehler beim Laden des Artefakts von {filepath}: {e}")
+        return None
@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+from importlib import metadata as importlib_metadata
+
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from model_manager import load_model
+
+# Dateien einer Modellversion; werden beim Befördern nach MODEL_SAVE_DIR kopiert (für Leser ohne Registry,
+# z.B. den GitHub-Actions-Job). flat_models.mfa zuletzt, damit ältere Dateien ohne Hashes nicht als veraltet gelten.
+VERSION_FILES = ['rf_model.joblib', 'xgb_model.joblib', 'flat_models.mfa']
+# Nur in neueren Versionen vorhanden; fehlt eine, wird die alte Kopie in MODEL_SAVE_DIR entfernt
+OPTIONAL_VERSION_FILES = ['intervals.json', 'climatology.json', 'model_sources.json']
+_METADATA_FILE = 'metadata.json'
+_CURRENT_FILE = 'current.json'
+# Zeiger in MODEL_SAVE_DIR auf das Verzeichnis der aktuellen Version (relativ), siehe current_model_dir
+MODEL_POINTER_FILE = 'current_version.json'
+_LIBRARIES = ['numpy', 'pandas', 'scikit-learn', 'xgboost']
+
+
+def library_versions() -> dict:
+    """Versionen der Bibliotheken, die das Modell beeinflussen (ohne sie zu importieren)."""
+    versions = {}
+    for name in _LIBRARIES:
+        try:
+            versions[name] = importlib_metadata.version(name)
+        except importlib_metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def compute_fingerprint(
+    X_train: pd.DataFrame,
+    y_train: pd.DataFrame,
+    rf_parameter: dict,
+    xgb_parameter: dict,
+    extra: dict | None = None,
+) -> str:
+    """
+    SHA-256 über Trainingsdaten (Werte, Index, Spalten), Hyperparameter und Bibliotheksversionen.
+
+    Gleicher Fingerprint = gleiches Training, das Modell kann wiederverwendet werden.
+    `extra` nimmt weitere Einstellungen auf, die die gespeicherten Dateien verändern (z.B. RF-Kompression).
+    """
+    digest = hashlib.sha256()
+    for frame in (X_train, y_train):
+        digest.update(json.dumps(list(frame.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    settings = {"rf": rf_parameter, "xgb": xgb_parameter, "libraries": library_versions(), "extra": extra or {}}
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_json_atomic(payload: dict, filepath: str):
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, filepath)
+
+
+def _read_json(filepath: str) -> dict | None:
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"\nFehler beim Lesen von {filepath}: {e}")
+        return None
+
+
+def version_dir(version_id: str, registry_dir: str = config.MODEL_REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, version_id)
+
+
+def create_version(fingerprint: str, registry_dir: str = config.MODEL_REGISTRY_DIR) -> tuple[str, str]:
+    """Legt ein leeres Verzeichnis für eine neue Version an -> (version_id, Pfad)."""
+    version_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{fingerprint[:8]}"
+    path = version_dir(version_id, registry_dir)
+    os.makedirs(path, exist_ok=True)
+    return version_id, path
+
+
+def register_version(
+    version_id: str,
+    fingerprint: str,
+    X_train: pd.DataFrame,
+    target_cols: list,
+    rf_parameter: dict,
+    xgb_parameter: dict,
+    registry_dir: str = config.MODEL_REGISTRY_DIR,
+) -> dict | None:
+    """Schreibt die Metadaten einer fertig trainierten Version. Erst danach gilt sie als vorhanden."""
+    path = version_dir(version_id, registry_dir)
+    missing = [name for name in VERSION_FILES if not os.path.exists(os.path.join(path, name))]
+    if missing:
+        print(f"\nFehler: Version {version_id} unvollständig, es fehlen {missing}.")
+        return None
+    entry = {
+        "version": version_id,
+        "fingerprint": fingerprint,
+        "created_at": datetime.now().isoformat(),
+        "features_cols": list(X_train.columns),
+        "target_cols": list(target_cols),
+        "train_start": X_train.index.min().strftime("%Y-%m-%d"),
+        "train_end": X_train.index.max().strftime("%Y-%m-%d"),
+        "n_train_rows": len(X_train),
+        "parameters": {"rf": rf_parameter, "xgb": xgb_parameter},
+        "libraries": library_versions(),
+        "metrics": {},
+    }
+    _write_json_atomic(entry, os.path.join(path, _METADATA_FILE))
+    return entry
+
+
+def update_metrics(version_id: str, metrics: dict, registry_dir: str = config.MODEL_REGISTRY_DIR) -> bool:
+    """Ergänzt die Testmetriken ({model: {target: {MAE, RMSE, R2}}}) einer Version."""
+    metadata_path = os.path.join(version_dir(version_id, registry_dir), _METADATA_FILE)
+    entry = _read_json(metadata_path)
+    if entry is None:
+        return False
+    entry["metrics"] = {
+        model_name: {target: {k: float(v) for k, v in values.items()} for target, values in target_metrics.items()}
+        for model_name, target_metrics in (metrics or {}).items()
+    }
+    _write_json_atomic(entry, metadata_path)
+    return True
+
+
+def list_versions(registry_dir: str = config.MODEL_REGISTRY_DIR) -> list[dict]:
+    """Alle vollständig registrierten Versionen, älteste zuerst."""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        entry = _read_json(os.path.join(registry_dir, name, _METADATA_FILE))
+        if entry is not None:
+            versions.append(entry)
+    return versions
+
+
+def find_version(fingerprint: str, registry_dir: str = config.MODEL_REGISTRY_DIR) -> dict | None:
+    """Neueste Version mit diesem Fingerprint, deren Dateien noch alle vorhanden sind."""
+    for entry in reversed(list_versions(registry_dir)):
+        path = version_dir(entry["version"], registry_dir)
+        if entry["fingerprint"] == fingerprint and all(os.path.exists(os.path.join(path, n)) for n in VERSION_FILES):
+            return entry
+    return None
+
+
+def get_current(registry_dir: str = config.MODEL_REGISTRY_DIR) -> dict | None:
+    """Zeiger auf die aktuelle Version ({'version': ..., 'promoted_at': ...}) oder None."""
+    return _read_json(os.path.join(registry_dir, _CURRENT_FILE))
+
+
+def current_model_dir(model_dir: str = config.MODEL_SAVE_DIR) -> str:
+    """
+    Verzeichnis, aus dem die aktuellen Modelle samt intervals.json und climatology.json gelesen werden.
+
+    Das ist das Verzeichnis der aktuellen Version in der Registry, auf das model_dir/current_version.json zeigt.
+    Es ist vollständig, seine Modelle ändern sich nach dem Registrieren nicht mehr (die Pipeline ersetzt höchstens
+    intervals.json per os.replace, neu kalibriert für dieselben Modelle). Beim Befördern wird nur dieser Zeiger mit einem
+    os.replace umgestellt, wer hierüber liest, sieht also nie Dateien aus zwei Versionen. Ohne Zeiger oder
+    Registry (z.B. im GitHub-Actions-Job, der nur die Kopien auscheckt) ist es model_dir selbst.
+    """
+    pointer = _read_json(os.path.join(model_dir, MODEL_POINTER_FILE))
+    if pointer is None:
+        return model_dir
+    path = os.path.normpath(os.path.join(model_dir, pointer["path"]))
+    if not os.path.exists(os.path.join(path, _METADATA_FILE)):
+        return model_dir
+    return path
+
+
+def promote(version_id: str, registry_dir: str = config.MODEL_REGISTRY_DIR, model_dir: str = config.MODEL_SAVE_DIR) -> bool:
+    """
+    Macht eine Version zur aktuellen.
+
+    Umgestellt wird mit einem einzigen os.replace: dem Zeiger model_dir/current_version.json auf das Verzeichnis
+    der Version (siehe current_model_dir). Vorher werden die Dateien für Leser ohne Registry nach model_dir
+    kopiert, erst alle als .tmp, dann ausgetauscht; current.json der Registry folgt nach dem Zeiger.
+    """
+    path = version_dir(version_id, registry_dir)
+    if _read_json(os.path.join(path, _METADATA_FILE)) is None:
+        print(f"\nFehler: Version {version_id} ist nicht registriert.")
+        return False
+    try:
+        os.makedirs(model_dir, exist_ok=True)
+        names = VERSION_FILES + [name for name in OPTIONAL_VERSION_FILES if os.path.exists(os.path.join(path, name))]
+        for name in names:
+            # copyfile statt copy2: neue mtime, damit forecast_service die Änderung erkennt
+            shutil.copyfile(os.path.join(path, name), os.path.join(model_dir, f"{name}.tmp"))
+        for name in names:
+            os.replace(os.path.join(model_dir, f"{name}.tmp"), os.path.join(model_dir, name))
+        for name in OPTIONAL_VERSION_FILES:
+            if name not in names and os.path.exists(os.path.join(model_dir, name)):
+                os.remove(os.path.join(model_dir, name))
+        _write_json_atomic(
+            {"version": version_id, "path": os.path.relpath(path, model_dir)},
+            os.path.join(model_dir, MODEL_POINTER_FILE),
+        )
+        _write_json_atomic(
+            {"version": version_id, "promoted_at": datetime.now().isoformat()},
+            os.path.join(registry_dir, _CURRENT_FILE),
+        )
+        print(f"\nModellversion {version_id} ist jetzt aktuell.")
+        return True
+    except Exception as e:
+        print(f"\nFehler beim Befördern der Version {version_id}: {e}")
+        return False
+
+
+def load_version_models(version_id: str, console: Console, registry_dir: str = config.MODEL_REGISTRY_DIR) -> dict | None:
+    """Lädt RF- und XGB-Modell einer Version (joblib, für Evaluierung und Plots)."""
+    path = version_dir(version_id, registry_dir)
+    models = {name: load_model(os.path.join(path, f"{name}_model.joblib"), console) for name in ("rf", "xgb")}
+    if any(model is None for model in models.values()):
+        return None
+    return models
+
+
+def print_versions(console: Console, registry_dir: str = config.MODEL_REGISTRY_DIR):
+    current = (get_current(registry_dir) or {}).get("version")
+    table = Table(title=f"Modellversionen in {registry_dir}")
+    for column in ["", "Version", "Trainingszeitraum", "Zeilen", "Fingerprint", "RMSE tavg (rf/xgb)"]:
+        table.add_column(column)
+    for entry in list_versions(registry_dir):
+        rmse = [
+            entry["metrics"].get(name, {}).get("tavg_target", {}).get("RMSE") for name in ("rf", "xgb")
+        ]
+        table.add_row(
+            "*" if entry["version"] == current else "",
+            entry["version"],
+            f"{entry['train_start']} - {entry['train_end']}",
+            str(entry["n_train_rows"]),
+            entry["fingerprint"][:12],
+            " / ".join(f"{r:.2f}" if r is not None else "-" for r in rmse),
+        )
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modellversionen anzeigen oder eine Version zur aktuellen machen.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Alle Versionen anzeigen (* = aktuell)")
+    promote_parser = subparsers.add_parser("promote", help="Version zur aktuellen machen (z.B. Rollback)")
+    promote_parser.add_argument("version")
+    args = parser.parse_args()
+
+    console = Console()
+    if args.command == "list":
+        print_versions(console)
+    elif not promote(args.version):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,64 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
 import os
 
-from model_manager import save_model
+import config
+from model_manager import save_model, load_tuned_parameters
+from flat_trees import save_flat_models
+
+def build_models(rf_parameter: dict, xgb_parameter: dict) -> dict:
+    """Erstellt untrainierte Modelle mit den übergebenen Parametern."""
+    from sklearn.ensemble import RandomForestRegressor
+    from xgboost import XGBRegressor
+
+    return {
+        "rf": RandomForestRegressor(**rf_parameter),
+        "xgb": XGBRegressor(**xgb_parameter),
+    }
+
+def xgb_train_params(params: dict) -> dict:
+    """Übersetzt XGBRegressor-Parameter in Parameter für xgb.train (ohne n_estimators)."""
+    translated = {k: v for k, v in params.items() if k not in ("n_estimators", "random_state", "n_jobs")}
+    translated["seed"] = params.get("random_state", config.RANDOM_STATE)
+    translated["nthread"] = params.get("n_jobs", 1)
+    translated.setdefault("objective", "reg:squarederror")
+    translated.setdefault("tree_method", "hist")
+    return translated
+
+def resolve_parameters(
+    rf_parameter: dict,
+    xgb_parameter: dict,
+    tuned_params_path: str | None = config.TUNED_PARAMS_PATH,
+) -> tuple[dict, dict]:
+    """Getunte Parameter (aus tuning.py) überschreiben die Werte aus config.py."""
+    tuned = load_tuned_parameters(tuned_params_path)
+    if tuned:
+        print(f"Verwende getunte Parameter aus {tuned_params_path}")
+        rf_parameter = {**rf_parameter, **tuned.get("rf", {}).get("params", {})}
+        xgb_parameter = {**xgb_parameter, **tuned.get("xgb", {}).get("params", {})}
+    return rf_parameter, xgb_parameter
+
+def train_single_model(
+    model_name: str,
+    X_train: pd.DataFrame,
+    y_train: pd.DataFrame,
+    rf_parameter: dict,
+    xgb_parameter: dict,
+    save_dir: str,
+    n_jobs: int | None = None,
+):
+    """
+    Trainiert nur eines der Modelle ('rf' oder 'xgb') und speichert es als <name>_model.joblib in save_dir.
+
+    n_jobs überschreibt die Kernzahl aus den Parametern (z.B. wenn RF und XGB gleichzeitig trainiert werden).
+    """
+    if n_jobs is not None:
+        rf_parameter = {**rf_parameter, "n_jobs": n_jobs}
+        xgb_parameter = {**xgb_parameter, "n_jobs": n_jobs}
+    model = build_models(rf_parameter, xgb_parameter)[model_name]
+    print(f"Training {type(model).__name__}...")
+    model.fit(X_train, y_train)
+    save_model(model, os.path.join(save_dir, f'{model_name}_model.joblib'))
+    return model
 
 def train_models(
     X_train: pd.DataFrame,
@@ -11,12 +66,16 @@ def train_models(
     rf_parameter: dict,
     xgb_parameter: dict,
     save_dir: str,
+    tuned_params_path: str | None = config.TUNED_PARAMS_PATH,
 ) -> dict:
     models = {}
+    rf_parameter, xgb_parameter = resolve_parameters(rf_parameter, xgb_parameter, tuned_params_path)
+
+    untrained = build_models(rf_parameter, xgb_parameter)
 
     # ----- Random Forest -----
     print("Training RandomForestRegressor...")
-    rf_model = RandomForestRegressor(**rf_parameter)
+    rf_model = untrained["rf"]
     rf_model.fit(X_train, y_train)
     models["rf"] = rf_model
     print("\nRandomForestRegressor trainiert.")
@@ -29,7 +88,7 @@ def train_models(
     
     # ----- XGBoost -----
     print("Training XGBoostRegressor...")
-    xgb_model = XGBRegressor(**xgb_parameter)
+    xgb_model = untrained["xgb"]
     xgb_model.fit(X_train, y_train)
     models["xgb"] = xgb_model
     print("\nXGBoostRegressor trainiert.")
@@ -41,6 +100,15 @@ def train_models(
         print("\nKein Speicherverzeichnis angegeben, RandomForest-Modell wird nicht gespeichert.")
 
     
+    if save_dir:
+        # Flache Kopie der Bäume für den täglichen Vorhersagepfad (ohne sklearn/xgboost)
+        save_flat_models(
+            models,
+            os.path.join(save_dir, 'flat_models.mfa'),
+            feature_names=list(X_train.columns),
+            compress=config.MODEL_ARTIFACT_COMPRESS,
+        )
+
     print("\nModelltraining abgeschlossen!")
 
     return models
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from data_collection import find_stations, get_data_for_stations
+from interpolation import get_station_data, idw_interpolate_many, DEFAULT_IDW_POWER
+from dataset import build_featured_data
+from data_splitting import split_data
+from model_training import train_models, resolve_parameters
+from multistep_forecast import recursive_forecast, horizon_to_json
+from update_prediction_data import predict_values, build_output_data
+
+
+def find_stations_for_locations(locations: dict, console: Console) -> tuple[dict, list]:
+    """
+    Sucht die Stationen je Standort und vereinigt sie ohne Duplikate.
+
+    Returns:
+        ({Standort: [Stations-IDs]}, [alle Stations-IDs, jede nur einmal]).
+    """
+    stations_by_location = {}
+    union = []
+    for name, (lat, lon, _) in locations.items():
+        station_ids = find_stations(console=console, lat=lat, lon=lon, name=name)
+        stations_by_location[name] = station_ids
+        union.extend(sid for sid in station_ids if sid not in union)
+    n_requested = sum(len(ids) for ids in stations_by_location.values())
+    console.print(
+        f"   {n_requested} Stationen für {len(locations)} Standorte, davon [bold]{len(union)}[/bold] verschiedene "
+        f"({n_requested - len(union)} Downloads gespart)."
+    )
+    return stations_by_location, union
+
+
+def load_locations_interpolated(locations: dict, console: Console) -> dict | None:
+    """Lädt jede Station genau einmal und interpoliert alle Standorte in einem Durchgang."""
+    console.rule("[orange1]1. Stationssuche & Datenerfassung (alle Standorte)[/orange1]")
+    stations_by_location, union = find_stations_for_locations(locations, console)
+    if not union:
+        console.print("[bold red]Keine Stationen gefunden.[/bold red]")
+        return None
+
+    all_station_data = get_data_for_stations(
+        station_ids=union,
+        start_date=config.START_DATE,
+        end_date=config.END_DATE,
+        required_columns=config.REQUIRED_COLUMNS,
+        essential_columns=config.ESSENTIAL_COLS,
+        console=console,
+    )
+    if not all_station_data:
+        console.print("[bold red]Keine Daten für relevante Stationen geladen.[/bold red]")
+        return None
+
+    console.rule("[orange1]1.5 Räumliche Interpolation (IDW, alle Standorte)[/orange1]")
+    station_metadata = get_station_data(list(all_station_data), console=console)
+    if not station_metadata:
+        console.print("[bold red]FEHLER: Konnte keine Metadaten für Interpolation laden.[/bold red]")
+        return None
+    return idw_interpolate_many(
+        all_station_data=all_station_data,
+        station_metadata=station_metadata,
+        targets={name: (lat, lon) for name, (lat, lon, _) in locations.items()},
+        variables=config.REQUIRED_COLUMNS,
+        console=console,
+        power=DEFAULT_IDW_POWER,
+        station_subsets=stations_by_location,
+    )
+
+
+def add_location_features(data_featured: pd.DataFrame, location: tuple) -> pd.DataFrame:
+    """Hängt Breite, Länge und Höhe als konstante Features an (für das gemeinsame Modell)."""
+    data = data_featured.copy()
+    for col, value in zip(config.LOCATION_FEATURE_COLUMNS, location):
+        data[col] = float(value)
+    return data
+
+
+def _train_location(task: tuple) -> tuple:
+    """Worker für 'per_location': trainiert RF und XGB für einen Standort und speichert sie."""
+    name, X_train, y_train, rf_parameter, xgb_parameter, save_dir = task
+    models = train_models(X_train, y_train, rf_parameter, xgb_parameter, save_dir, tuned_params_path=None)
+    return name, models
+
+
+def _rmse_by_target(model, X_test: pd.DataFrame, y_test: pd.DataFrame) -> dict:
+    y_pred = np.asarray(model.predict(X_test)).reshape(len(X_test), -1)
+    rmse = np.sqrt(((y_pred - y_test.to_numpy()) ** 2).mean(axis=0))
+    return dict(zip(y_test.columns, rmse.tolist()))
+
+
+def run_multi_location(
+    locations: dict = config.FORECAST_LOCATIONS,
+    mode: str = config.MULTI_LOCATION_MODE,
+    n_workers: int = config.MULTI_LOCATION_WORKERS,
+    model_dir: str = config.MULTI_LOCATION_MODEL_DIR,
+    output_path: str = config.MULTI_LOCATION_OUTPUT_PATH,
+    console: Console | None = None,
+    interpolated: dict | None = None,
+) -> dict | None:
+    """
+    Training, Bewertung und Vorhersage für alle Standorte; schreibt eine gemeinsame JSON-Datei.
+
+    mode='pooled': ein RF/XGB-Paar für alle Standorte (Standort-Features in LOCATION_FEATURE_COLUMNS).
+    mode='per_location': ein Paar je Standort, parallel in n_workers Prozessen.
+    `interpolated` ({Standort: DataFrame}) überspringt den Download, z.B. für Tests.
+    """
+    console = console or Console()
+    if mode not in ("pooled", "per_location"):
+        raise ValueError(f"Unbekannter Modus '{mode}' (erlaubt: pooled, per_location).")
+    if interpolated is None:
+        interpolated = load_locations_interpolated(locations, console)
+    if not interpolated:
+        return None
+
+    # ----- Features und Split je Standort (gleicher Testzeitraum für alle) -----
+    splits = {}
+    for name, interpolated_df in interpolated.items():
+        console.rule(f"[orange1]Features: {name}[/orange1]")
+        data_featured = build_featured_data(interpolated_df, console)
+        if data_featured is None:
+            console.print(f"[yellow]Überspringe {name}: keine Features.[/yellow]")
+            continue
+        if mode == "pooled":
+            data_featured = add_location_features(data_featured, locations[name])
+        X_train, X_test, y_train, y_test, features_cols, target_cols, *_ = split_data(data_featured, console)
+        splits[name] = {
+            "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test,
+            "features_cols": features_cols, "target_cols": target_cols,
+            "last_row": data_featured.iloc[-1:],
+        }
+    if not splits:
+        console.print("[bold red]Für keinen Standort sind Daten verfügbar.[/bold red]")
+        return None
+
+    # ----- Training -----
+    console.rule(f"[orange1]Modelltraining ({mode})[/orange1]")
+    rf_parameter, xgb_parameter = resolve_parameters(config.RF_PARAMETER, config.XGB_PARAMETER)
+    if mode == "pooled":
+        X_train = pd.concat([split["X_train"] for split in splits.values()])
+        y_train = pd.concat([split["y_train"] for split in splits.values()])
+        console.print(f"   Gemeinsames Modell auf {len(X_train)} Zeilen aus {len(splits)} Standorten")
+        pooled_models = train_models(
+            X_train, y_train, rf_parameter, xgb_parameter, os.path.join(model_dir, "pooled"), tuned_params_path=None
+        )
+        models_by_location = {name: pooled_models for name in splits}
+    else:
+        tasks = [
+            (name, split["X_train"], split["y_train"], rf_parameter, xgb_parameter, os.path.join(model_dir, name))
+            for name, split in splits.items()
+        ]
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            models_by_location = dict(executor.map(_train_location, tasks))
+
+    # ----- Bewertung und Vorhersage -----
+    console.rule("[orange1]Bewertung & Vorhersage[/orange1]")
+    table = Table(title=f"Test-RMSE je Standort ({mode})")
+    table.add_column("Standort")
+    target_cols = next(iter(splits.values()))["target_cols"]
+    for model_name in ("rf", "xgb"):
+        for target in target_cols:
+            table.add_column(f"{model_name} {target}", justify="right")
+
+    output = {"generated_at": datetime.now().isoformat(), "mode": mode, "locations": {}}
+    for name, split in splits.items():
+        models = models_by_location[name]
+        row = [name]
+        for model_name in ("rf", "xgb"):
+            rmse = _rmse_by_target(models[model_name], split["X_test"], split["y_test"])
+            row.extend(f"{rmse[target]:.3f}" for target in target_cols)
+        table.add_row(*row)
+
+        last_row = split["last_row"]
+        features_for_prediction = last_row[split["features_cols"]]
+        last_feature_date = last_row.index[0].date()
+        predictions_output = predict_values(models, features_for_prediction, split["target_cols"])
+        horizon = horizon_to_json(recursive_forecast(
+            models, features_for_prediction, split["features_cols"], last_feature_date, target_cols=split["target_cols"]
+        ))
+        output["locations"][name] = build_output_data(
+            last_feature_date + timedelta(days=1), predictions_output, horizon
+        )
+    console.print(table)
+
+    try:
+        with open(output_path, 'w') as f:
+            json.dump(output, f, indent=2)
+        console.print(f"[green]   ✔️ Vorhersagen für {len(output['locations'])} Standorte in '{output_path}' gespeichert.[/green]")
+    except Exception as e:
+        console.print(f"[red]   FEHLER beim Speichern der JSON-Datei: {e}[/red]")
+        return None
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vorhersage für mehrere Standorte in einem Lauf.")
+    parser.add_argument("--locations", nargs="+", choices=list(config.FORECAST_LOCATIONS),
+                        default=list(config.FORECAST_LOCATIONS))
+    parser.add_argument("--mode", choices=["pooled", "per_location"], default=config.MULTI_LOCATION_MODE)
+    parser.add_argument("--workers", type=int, default=config.MULTI_LOCATION_WORKERS)
+    parser.add_argument("--output", default=config.MULTI_LOCATION_OUTPUT_PATH)
+    args = parser.parse_args()
+
+    console = Console()
+    console.rule("[bold purple4]⛅ Wettervorhersage für mehrere Standorte ⛅[/bold purple4]")
+    locations = {name: config.FORECAST_LOCATIONS[name] for name in args.locations}
+    if run_multi_location(locations, args.mode, args.workers, output_path=args.output, console=console) is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import re
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import config
+from climatology import climatology_values
+
+_LAG_PATTERN = re.compile(r"^(.*)_lag_(\d+)$")
+_ANOMALY_PATTERN = re.compile(r"^(.*)_anomaly$")
+_CALENDAR_COLUMNS = ['month', 'dayofyear', 'weekday']
+
+
+def build_step_plan(
+    features_cols: list,
+    target_cols: list = config.TARGET_COLUMNS,
+    target_base_cols: list = config.ORIGINAL_TARGET_BASE_COLUMNS,
+) -> dict:
+    """
+    Beschreibt, wie aus der Feature-Zeile von Tag t die Zeile von Tag t+1 entsteht.
+
+    Der Zustand wird pro Schritt um die Vorhersagen und die Szenariowerte der exogenen Spalten erweitert:
+    [Features | Vorhersagen (n_targets) | exogene Werte für t+1]. `source` gibt für jede Feature-Spalte
+    an, aus welcher Spalte dieses erweiterten Zustands sie am nächsten Tag kommt:
+
+    - c_lag_k (k > 1) <- c_lag_{k-1}
+    - c_lag_1 <- Wert von c an Tag t (Feature, Vorhersage oder bei tavg/wspd: tavg_target_lag_1 usw.)
+    - exogene Spalten (tmin, tmax, prcp, pres) <- Szenariowert
+    - c_anomaly <- Wert von c an Tag t+1 (Szenariowert oder Vorhersage); der Normalwert des Tages wird danach
+      abgezogen (recursive_forecast)
+    - Kalenderspalten werden aus dem Datum neu berechnet.
+    """
+    n_features, n_targets = len(features_cols), len(target_cols)
+    position = {col: i for i, col in enumerate(features_cols)}
+    lags = {col: _LAG_PATTERN.match(col) for col in features_cols}
+    calendar = [col for col in features_cols if col in _CALENDAR_COLUMNS]
+    anomalies = {col: match.group(1) for col in features_cols if (match := _ANOMALY_PATTERN.match(col))}
+    exogenous = [col for col in features_cols if lags[col] is None and col not in _CALENDAR_COLUMNS and col not in anomalies]
+
+    def current_value(base: str) -> int:
+        """Index im erweiterten Zustand, der den Wert von `base` an Tag t enthält."""
+        if base in position:
+            return position[base]
+        if base in target_cols:
+            return n_features + target_cols.index(base) # Vorhersage aus der Zeile von Tag t
+        if base in target_base_cols:
+            # tavg(t) steht nicht in den Features, aber tavg_target(t-1) = tavg(t)
+            target_lag = f"{target_cols[target_base_cols.index(base)]}_lag_1"
+            if target_lag in position:
+                return position[target_lag]
+        raise ValueError(f"Wert von '{base}' an Tag t lässt sich aus den Features nicht bestimmen.")
+
+    source = np.arange(n_features)
+    for col, match in lags.items():
+        if match is None:
+            continue
+        base, k = match.group(1), int(match.group(2))
+        if k == 1:
+            source[position[col]] = current_value(base)
+        elif f"{base}_lag_{k - 1}" in position:
+            source[position[col]] = position[f"{base}_lag_{k - 1}"]
+        else:
+            raise ValueError(f"Für '{col}' fehlt die Spalte '{base}_lag_{k - 1}'.")
+    for i, col in enumerate(exogenous):
+        source[position[col]] = n_features + n_targets + i
+    for col, base in anomalies.items():
+        if base in exogenous:
+            source[position[col]] = n_features + n_targets + exogenous.index(base)
+        elif base in target_base_cols and target_base_cols.index(base) < n_targets:
+            source[position[col]] = n_features + target_base_cols.index(base) # Vorhersage von Tag t = Wert an t+1
+        else:
+            raise ValueError(f"Wert von '{base}' für '{col}' lässt sich für den nächsten Tag nicht bestimmen.")
+
+    # Für das Szenario 'mean': Wert an Tag t und die vorherigen Tage aus den Lags
+    window = {
+        col: [position[col]] + [position[f"{col}_lag_{k}"] for k in range(1, config.LAG_DAYS) if f"{col}_lag_{k}" in position]
+        for col in exogenous
+    }
+    anchors = {}
+    for col, anchor in config.MULTISTEP_ANCHORS.items():
+        anchor_target = f"{anchor}_target"
+        if col in exogenous and anchor_target in target_cols:
+            anchors[col] = (current_value(anchor), n_features + target_cols.index(anchor_target))
+
+    return {
+        "n_features": n_features,
+        "n_targets": n_targets,
+        "source": source,
+        "exogenous": [position[col] for col in exogenous],
+        "exogenous_names": exogenous,
+        "window": [window[col] for col in exogenous],
+        "anchors": [anchors.get(col) for col in exogenous],
+        "calendar": {col: position[col] for col in calendar},
+        "anomalies": {col: (position[col], base) for col, base in anomalies.items()},
+    }
+
+
+def _exogenous_values(scenario: str, plan: dict, state: np.ndarray) -> np.ndarray:
+    """
+    Werte der exogenen Spalten für den nächsten Tag, state = erweiterter Zustand (n_rows, n_ext).
+
+    'persistence': letzter Wert bleibt. 'mean': Mittel über die letzten LAG_DAYS Tage.
+    'anchored': tmin/tmax verschieben sich um die vorhergesagte Änderung von tavg, Rest wie 'persistence'.
+    """
+    current = state[:, plan["exogenous"]]
+    if scenario == "persistence":
+        return current
+    if scenario == "mean":
+        return np.stack([state[:, idx].mean(axis=1) for idx in plan["window"]], axis=1)
+    if scenario == "anchored":
+        values = current.copy()
+        for i, anchor in enumerate(plan["anchors"]):
+            if anchor is not None:
+                anchor_today, anchor_tomorrow = anchor
+                values[:, i] += state[:, anchor_tomorrow] - state[:, anchor_today]
+        return values
+    raise ValueError(f"Unbekanntes Szenario '{scenario}' (erlaubt: persistence, mean, anchored).")
+
+
+def _calendar_values(day: date) -> dict:
+    return {"month": day.month, "dayofyear": day.timetuple().tm_yday, "weekday": day.weekday()}
+
+
+def recursive_forecast(
+    models: dict,
+    features_row,
+    features_cols: list,
+    feature_date: date,
+    horizon: int = config.FORECAST_HORIZON_DAYS,
+    scenarios: list = config.MULTISTEP_SCENARIOS,
+    target_cols: list = config.TARGET_COLUMNS,
+    climatology: dict | None = None,
+) -> dict:
+    """
+    Mehrtägige Vorhersage: die Vorhersage jedes Tages wird in die Lag-Features des nächsten Tages zurückgeführt.
+
+    Alle Zeilen (Modelle x Szenarien x Tage) liegen in einem vorab angelegten Array; die Lags werden per
+    Index-Array aus der Vortageszeile übernommen (np.take, kein DataFrame-Umbau). Jedes Modell wird pro Tag
+    genau einmal aufgerufen, mit einer Zeile pro Szenario.
+
+    Args:
+        features_row: Feature-Zeile von `feature_date` (DataFrame mit einer Zeile oder Array).
+        feature_date: Datum der Feature-Zeile; der erste Vorhersagetag ist feature_date + 1.
+        climatology: Normalwerte (climatology.py), nötig, wenn die Features Anomalie-Spalten enthalten.
+
+    Returns:
+        {'dates', 'models', 'scenarios', 'target_cols', 'predictions' (horizon, n_models, n_scenarios, n_targets)}
+    """
+    plan = build_step_plan(features_cols, target_cols)
+    n_features, n_targets = plan["n_features"], plan["n_targets"]
+    if plan["anomalies"] and climatology is None:
+        raise ValueError("Die Features enthalten Anomalie-Spalten, dafür wird die Klimatologie (climatology.json) gebraucht.")
+    model_names = list(models)
+    n_models, n_scenarios = len(model_names), len(scenarios)
+
+    X = np.empty((horizon, n_models, n_scenarios, n_features))
+    X[0] = np.asarray(features_row, dtype=np.float64).reshape(n_features)
+    state = np.empty((n_models, n_scenarios, n_features + n_targets + len(plan["exogenous"])))
+    predictions = np.empty((horizon, n_models, n_scenarios, n_targets))
+    dates = [feature_date + timedelta(days=step + 1) for step in range(horizon)]
+
+    with warnings.catch_warnings():
+        # sklearn-Modelle wurden mit DataFrames trainiert und warnen bei Arrays ohne Spaltennamen
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        for step in range(horizon):
+            for m, model_name in enumerate(model_names):
+                predictions[step, m] = np.asarray(models[model_name].predict(X[step, m])).reshape(n_scenarios, n_targets)
+            if step == horizon - 1:
+                break
+
+            state[..., :n_features] = X[step]
+            state[..., n_features:n_features + n_targets] = predictions[step]
+            for s, scenario in enumerate(scenarios):
+                state[:, s, n_features + n_targets:] = _exogenous_values(scenario, plan, state[:, s])
+            np.take(state, plan["source"], axis=-1, out=X[step + 1])
+            for col, value in _calendar_values(dates[step]).items():
+                if col in plan["calendar"]:
+                    X[step + 1, ..., plan["calendar"][col]] = value
+            for col, (position, base) in plan["anomalies"].items():
+                X[step + 1, ..., position] -= climatology_values(climatology, [dates[step]], base)[0]
+
+    return {
+        "dates": dates,
+        "models": model_names,
+        "scenarios": list(scenarios),
+        "target_cols": list(target_cols),
+        "predictions": predictions,
+    }
+
+
+def _value(result: dict, step: int, m: int, s: int, target: str) -> float | None:
+    if target not in result["target_cols"]:
+        return None
+    value = result["predictions"][step, m, s, result["target_cols"].index(target)]
+    return None if np.isnan(value) else float(value)
+
+
+def horizon_to_json(result: dict) -> list[dict]:
+    """
+    Ein Eintrag pro Tag mit denselben Schlüsseln wie prediction.json (erstes Szenario)
+    und allen Szenarien unter 'scenarios'.
+    """
+    keys = {"temp_c": "tavg_target", "wspd_kmh": "wspd_target"}
+    horizon = []
+    for step, day in enumerate(result["dates"]):
+        per_scenario = {}
+        for s, scenario in enumerate(result["scenarios"]):
+            per_scenario[scenario] = {
+                f"{model_name}_{key}": _value(result, step, m, s, target)
+                for m, model_name in enumerate(result["models"])
+                for key, target in keys.items()
+            }
+        entry = {"date": day.strftime("%Y-%m-%d"), **per_scenario[result["scenarios"][0]]}
+        if len(per_scenario) > 1:
+            entry["scenarios"] = per_scenario
+        horizon.append(entry)
+    return horizon
+
+
+def print_horizon(result: dict, console: Console):
+    """Tabelle: pro Tag und Modell Temperatur/Wind im ersten Szenario, dazu die Spanne über alle Szenarien."""
+    table = Table(title=f"Mehrtagesvorhersage (Szenario '{result['scenarios'][0]}', Spanne über alle Szenarien)")
+    table.add_column("Datum")
+    for model_name in result["models"]:
+        table.add_column(f"{model_name} Temp (°C)", justify="right")
+        table.add_column(f"{model_name} Wind (km/h)", justify="right")
+    for step, day in enumerate(result["dates"]):
+        cells = [day.strftime("%Y-%m-%d")]
+        for m in range(len(result["models"])):
+            for target in ("tavg_target", "wspd_target"):
+                values = [_value(result, step, m, s, target) for s in range(len(result["scenarios"]))]
+                if values[0] is None:
+                    cells.append("-")
+                elif len(values) > 1:
+                    cells.append(f"{values[0]:.1f} ({min(values):.1f}–{max(values):.1f})")
+                else:
+                    cells.append(f"{values[0]:.1f}")
+        table.add_row(*cells)
+    console.print(table)
@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from rich.console import Console
+from rich.table import Table
+
+import config
+from model_manager import save_model
+from model_training import xgb_train_params
+from flat_trees import save_flat_models
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_TIME_COLUMN = 'time'
+
+
+# ----- Chunk-Ablage (Parquet) -----
+
+def write_parquet_chunks(data_featured: pd.DataFrame, out_dir: str, chunk_rows: int = config.OOC_CHUNK_ROWS) -> list[str]:
+    """
+    Schreibt Feature-Daten als nummerierte Parquet-Dateien mit höchstens chunk_rows Zeilen.
+
+    Neue Dateien werden hinter vorhandene gehängt, so können mehrere Standorte oder Zeiträume
+    nacheinander in dasselbe Verzeichnis geschrieben werden, ohne alles gleichzeitig im Speicher zu halten.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    next_part = len(list_chunks(out_dir))
+    paths = []
+    data = data_featured.rename_axis(_TIME_COLUMN)
+    for start in range(0, len(data), chunk_rows):
+        path = os.path.join(out_dir, f"part-{next_part:05d}.parquet")
+        data.iloc[start:start + chunk_rows].to_parquet(path, index=True)
+        paths.append(path)
+        next_part += 1
+    return paths
+
+
+def list_chunks(chunk_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(chunk_dir, "part-*.parquet")))
+
+
+def _time_filter(start=None, end=None) -> list | None:
+    filters = []
+    if start is not None:
+        filters.append((_TIME_COLUMN, ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append((_TIME_COLUMN, "<", pd.Timestamp(end)))
+    return filters or None
+
+
+def iter_chunks(paths: list[str], columns: list[str], start=None, end=None):
+    """Liest die Dateien nacheinander (nur die angegebenen Spalten, Zeitraum [start, end))."""
+    for path in paths:
+        chunk = pd.read_parquet(path, columns=columns, filters=_time_filter(start, end))
+        if len(chunk):
+            yield chunk
+
+
+def chunk_time_range(paths: list[str]) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """Frühester und spätester Tag aller Dateien (liest nur die Zeitspalte)."""
+    bounds = [pd.read_parquet(path, columns=[]).index for path in paths]
+    return min(index.min() for index in bounds), max(index.max() for index in bounds)
+
+
+def default_split_date(paths: list[str], test_days: int = config.TEST_PERIOD_DAYS) -> pd.Timestamp:
+    """Wie split_data: die letzten test_days Tage sind Testdaten."""
+    _, last_day = chunk_time_range(paths)
+    return last_day - pd.Timedelta(days=test_days - 1)
+
+
+# ----- Training -----
+
+class ParquetChunkIter(xgb.DataIter):
+    """Liefert XGBoost die Trainingsdaten Datei für Datei (float32), ohne sie zusammenzuführen."""
+
+    def __init__(self, paths: list[str], features_cols: list, target_cols: list, end=None, cache_dir: str | None = None):
+        self.paths = paths
+        self.features_cols = features_cols
+        self.target_cols = target_cols
+        self.end = end
+        self._position = 0
+        cache_prefix = os.path.join(cache_dir, "xgb_cache") if cache_dir else None
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def next(self, input_data) -> bool:
+        while self._position < len(self.paths):
+            path = self.paths[self._position]
+            self._position += 1
+            chunk = pd.read_parquet(path, columns=self.features_cols + self.target_cols, filters=_time_filter(end=self.end))
+            if len(chunk):
+                input_data(
+                    data=chunk[self.features_cols].to_numpy(dtype=np.float32),
+                    label=chunk[self.target_cols].to_numpy(dtype=np.float32),
+                )
+                return True
+        return False
+
+    def reset(self):
+        self._position = 0
+
+
+def train_xgb_external(paths: list[str], features_cols: list, target_cols: list, xgb_parameter: dict,
+                       end=None, cache_dir: str | None = None):
+    """
+    Trainiert XGBoost über XGBoosts External-Memory-Schnittstelle (ExtMemQuantileDMatrix).
+
+    Pro Datei wird nur ein Chunk gelesen und quantisiert; die Seiten landen im Cache auf der Platte.
+    Das Ergebnis ist ein XGBRegressor wie aus train_models.
+    """
+    with tempfile.TemporaryDirectory(dir=cache_dir) as work_dir:
+        iterator = ParquetChunkIter(paths, features_cols, target_cols, end=end, cache_dir=work_dir)
+        dtrain = xgb.ExtMemQuantileDMatrix(iterator, max_bin=xgb_parameter.get("max_bin", 256))
+        booster = xgb.train(xgb_train_params(xgb_parameter), dtrain, num_boost_round=xgb_parameter["n_estimators"])
+        booster.feature_names = list(features_cols)
+        del dtrain
+
+    model = xgb.XGBRegressor(**xgb_parameter)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def train_rf_sampled(paths: list[str], features_cols: list, target_cols: list, rf_parameter: dict,
+                     end=None, max_rows: int = config.OOC_RF_MAX_ROWS):
+    """
+    RandomForest auf einer gleichmäßigen Stichprobe von genau min(max_rows, Trainingszeilen) Zeilen.
+
+    sklearn hat keinen External-Memory-Modus; die Stichprobe wird Chunk für Chunk gezogen, damit der
+    Speicherbedarf unabhängig von der Länge der Historie bleibt. Gezählt werden nur Zeilen vor end
+    (nur die Zeitspalte wird gelesen), die Testdaten verkleinern die Stichprobe also nicht.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    chunk_rows = [len(pd.read_parquet(path, columns=[], filters=_time_filter(end=end))) for path in paths]
+    n_train = sum(chunk_rows)
+    n_sample = min(max_rows, n_train)
+    rng = np.random.default_rng(rf_parameter.get("random_state", config.RANDOM_STATE))
+    # Positionen über alle Trainingszeilen hinweg (sortiert), pro Chunk wird der passende Ausschnitt genommen
+    positions = np.sort(rng.choice(n_train, size=n_sample, replace=False))
+    samples, offset = [], 0
+    for path, n_rows in zip(paths, chunk_rows):
+        lo, hi = np.searchsorted(positions, [offset, offset + n_rows])
+        if hi > lo:
+            chunk = pd.read_parquet(path, columns=features_cols + target_cols, filters=_time_filter(end=end))
+            samples.append(chunk.iloc[positions[lo:hi] - offset])
+        offset += n_rows
+    sample = pd.concat(samples)
+    print(f"   RandomForest auf Stichprobe von {len(sample)} Zeilen ({len(sample) / max(n_train, 1):.1%})")
+    model = RandomForestRegressor(**rf_parameter)
+    model.fit(sample[features_cols], sample[target_cols])
+    return model
+
+
+def train_models_out_of_core(paths: list[str], features_cols: list, target_cols: list, rf_parameter: dict,
+                             xgb_parameter: dict, save_dir: str, split_date=None) -> dict:
+    """Gegenstück zu train_models, liest aber nur Chunks von der Platte. Trainiert auf allem vor split_date."""
+    models = {}
+    print("Training RandomForestRegressor (Stichprobe)...")
+    models["rf"] = train_rf_sampled(paths, features_cols, target_cols, rf_parameter, end=split_date)
+    print("Training XGBoostRegressor (External Memory)...")
+    models["xgb"] = train_xgb_external(paths, features_cols, target_cols, xgb_parameter, end=split_date)
+
+    if save_dir:
+        save_model(models["rf"], os.path.join(save_dir, 'rf_model.joblib'))
+        save_model(models["xgb"], os.path.join(save_dir, 'xgb_model.joblib'))
+        save_flat_models(models, os.path.join(save_dir, 'flat_models.mfa'), feature_names=list(features_cols),
+                         compress=config.MODEL_ARTIFACT_COMPRESS)
+    print("\nModelltraining (out-of-core) abgeschlossen!")
+    return models
+
+
+# ----- Bewertung -----
+
+def evaluate_chunked(models: dict, paths: list[str], features_cols: list, target_cols: list, start=None, end=None) -> dict:
+    """
+    MAE, RMSE und R² wie evaluate_model, aber Chunk für Chunk über laufende Summen.
+
+    Returns:
+        {model_name: {target: {'MAE', 'RMSE', 'R2'}}}
+    """
+    n_targets = len(target_cols)
+    sums = {name: {"abs": np.zeros(n_targets), "sq": np.zeros(n_targets)} for name in models}
+    count, y_sum, y_sq_sum = 0, np.zeros(n_targets), np.zeros(n_targets)
+    for chunk in iter_chunks(paths, features_cols + target_cols, start=start, end=end):
+        X = chunk[features_cols]
+        y = chunk[target_cols].to_numpy(dtype=np.float64)
+        count += len(y)
+        y_sum += y.sum(axis=0)
+        y_sq_sum += (y ** 2).sum(axis=0)
+        for name, model in models.items():
+            residual = np.asarray(model.predict(X)).reshape(len(y), -1) - y
+            sums[name]["abs"] += np.abs(residual).sum(axis=0)
+            sums[name]["sq"] += (residual ** 2).sum(axis=0)
+
+    results = {}
+    if count == 0:
+        return results
+    total_ss = y_sq_sum - y_sum ** 2 / count
+    for name in models:
+        results[name] = {
+            target: {
+                "MAE": sums[name]["abs"][i] / count,
+                "RMSE": np.sqrt(sums[name]["sq"][i] / count),
+                "R2": 1 - sums[name]["sq"][i] / total_ss[i] if total_ss[i] > 0 else float("nan"),
+            }
+            for i, target in enumerate(target_cols)
+        }
+    return results
+
+
+# ----- Synthetische Daten und Speichervergleich -----
+
+def write_synthetic_chunks(out_dir: str, years: int, n_locations: int = 1, n_features: int = 47,
+                           chunk_rows: int = config.OOC_CHUNK_ROWS) -> tuple[list, list]:
+    """Erzeugt zufällige Feature-Daten (years Jahre je Standort) direkt als Chunks, ohne sie ganz im Speicher zu halten."""
+    features_cols = [f"x{i}" for i in range(n_features)]
+    target_cols = list(config.TARGET_COLUMNS)
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    days = pd.date_range("1900-01-01", periods=int(years * 365.25), freq="D")
+    for _ in range(n_locations):
+        for start in range(0, len(days), chunk_rows):
+            index = days[start:start + chunk_rows]
+            X = rng.normal(size=(len(index), n_features))
+            y = np.column_stack([X[:, :5].sum(axis=1), X[:, 5:10].sum(axis=1)]) + rng.normal(size=(len(index), 2))
+            frame = pd.DataFrame(np.column_stack([X, y]), index=index, columns=features_cols + target_cols)
+            write_parquet_chunks(frame, out_dir, chunk_rows)
+    return features_cols, target_cols
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(mode: str, chunk_dir: str, features_cols: list, target_cols: list, xgb_parameter: dict) -> dict:
+    """Läuft im Kindprozess: trainiert XGBoost in-memory oder out-of-core und misst den Spitzen-Speicher."""
+    paths = list_chunks(chunk_dir)
+    split_date = default_split_date(paths)
+    baseline = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "in_memory":
+        data = pd.concat(pd.read_parquet(path) for path in paths)
+        train = data[data.index < split_date]
+        model = xgb.XGBRegressor(**xgb_parameter)
+        model.fit(train[features_cols], train[target_cols])
+        models = {"xgb": model}
+        test = data[data.index >= split_date]
+        y_pred = model.predict(test[features_cols]).reshape(len(test), -1)
+        rmse = float(np.sqrt(((y_pred - test[target_cols].to_numpy()) ** 2).mean()))
+    else:
+        model = train_xgb_external(paths, features_cols, target_cols, xgb_parameter, end=split_date)
+        models = {"xgb": model}
+        metrics = evaluate_chunked(models, paths, features_cols, target_cols, start=split_date)
+        rmse = float(np.sqrt(np.mean([m["RMSE"] ** 2 for m in metrics["xgb"].values()])))
+    return {
+        "mode": mode,
+        "seconds": time.perf_counter() - t0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+        "rmse": rmse,
+    }
+
+
+def compare_memory(chunk_dir: str, features_cols: list, target_cols: list, xgb_parameter: dict) -> list[dict]:
+    """Misst beide Pfade in je einem frischen Prozess (ru_maxrss ist pro Prozess)."""
+    rows = []
+    for mode in ("in_memory", "out_of_core"):
+        args = json.dumps({"mode": mode, "chunk_dir": chunk_dir, "features_cols": features_cols,
+                           "target_cols": target_cols, "xgb_parameter": xgb_parameter})
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", args],
+                                cwd=_THIS_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Messung '{mode}' fehlgeschlagen:\n{result.stderr[-2000:]}")
+        rows.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return rows
+
+
+def print_memory_comparison(rows: list[dict], n_rows: int, console: Console):
+    table = Table(title=f"XGBoost-Training: in-memory vs. out-of-core ({n_rows:,} Zeilen)")
+    for column in ["Pfad", "Spitzen-RSS (MB)", "davon Training (MB)", "Zeit (s)", "Test-RMSE"]:
+        table.add_column(column, justify="right")
+    for row in rows:
+        table.add_row(row["mode"], f"{row['peak_rss_mb']:.0f}", f"{row['peak_rss_mb'] - row['baseline_rss_mb']:.0f}",
+                      f"{row['seconds']:.1f}", f"{row['rmse']:.3f}")
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core-Training aus Parquet-Chunks (XGBoost External Memory).")
+    parser.add_argument("--chunk-dir", default=config.OOC_CHUNK_DIR)
+    parser.add_argument("--write-chunks", action="store_true",
+                        help="Featured-Daten (alle FORECAST_LOCATIONS) laden und als Chunks schreiben")
+    parser.add_argument("--synthetic-years", type=int, default=None,
+                        help="Zufallsdaten mit so vielen Jahren je Standort erzeugen (statt echter Daten)")
+    parser.add_argument("--synthetic-locations", type=int, default=1)
+    parser.add_argument("--compare", action="store_true", help="Spitzen-Speicher in-memory vs. out-of-core messen")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        options = json.loads(args.measure)
+        print(json.dumps(_measure(**options)))
+        return
+
+    console = Console()
+    console.rule("[bold purple4]Out-of-core-Training[/bold purple4]")
+    if args.synthetic_years:
+        work_dir = tempfile.mkdtemp(prefix="meteoflow_ooc_")
+        features_cols, target_cols = write_synthetic_chunks(work_dir, args.synthetic_years, args.synthetic_locations)
+        chunk_dir = work_dir
+    else:
+        chunk_dir = args.chunk_dir
+        if args.write_chunks:
+            from multi_location import load_locations_interpolated, add_location_features
+            from dataset import build_featured_data
+            interpolated = load_locations_interpolated(config.FORECAST_LOCATIONS, console)
+            if not interpolated:
+                sys.exit(1)
+            for name, interpolated_df in interpolated.items():
+                data_featured = build_featured_data(interpolated_df, console)
+                if data_featured is not None:
+                    write_parquet_chunks(add_location_features(data_featured, config.FORECAST_LOCATIONS[name]), chunk_dir)
+        paths = list_chunks(chunk_dir)
+        if not paths:
+            console.print(f"[red]FEHLER: Keine Chunks in {chunk_dir} (zuerst --write-chunks).[/red]")
+            sys.exit(1)
+        from data_splitting import get_feature_target_columns
+        features_cols, target_cols = get_feature_target_columns(pd.read_parquet(paths[0]).iloc[:1])
+
+    paths = list_chunks(chunk_dir)
+    import pyarrow.parquet as pq
+    n_rows = sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+    console.print(f"   {len(paths)} Chunks, {n_rows:,} Zeilen, {len(features_cols)} Features in {chunk_dir}")
+
+    if args.compare:
+        rows = compare_memory(chunk_dir, features_cols, target_cols, config.XGB_PARAMETER)
+        print_memory_comparison(rows, n_rows, console)
+        return
+
+    split_date = default_split_date(paths)
+    models = train_models_out_of_core(paths, features_cols, target_cols, config.RF_PARAMETER, config.XGB_PARAMETER,
+                                      os.path.join(config.MULTI_LOCATION_MODEL_DIR, "out_of_core"), split_date)
+    results = evaluate_chunked(models, paths, features_cols, target_cols, start=split_date)
+    for model_name, metrics in results.items():
+        for target, values in metrics.items():
+            console.print(f"   {model_name} {target}: MAE {values['MAE']:.2f}, RMSE {values['RMSE']:.2f}, R² {values['R2']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
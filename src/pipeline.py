@@ -0,0 +1,922 @@
+import os
+import json
+import time
+import hashlib
+import warnings
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+
+# Stufen von main.py in einer gültigen Reihenfolge; jede speichert ihre Ergebnisse in <Laufverzeichnis>/<Stufe>/.
+# Die Abhängigkeiten ergeben sich aus den Artefakten, die eine Stufe liest (_stage_needs).
+STAGES = [
+    'stations', 'interpolation', 'eda', 'preprocessing', 'climatology', 'features', 'split',
+    'version', 'train_rf', 'train_xgb', 'training', 'evaluation', 'prediction',
+]
+# Stufen mit Plots laufen in eigenen Prozessen (pyplot ist nicht threadsicher), alle anderen in Threads
+PROCESS_STAGES = ['eda', 'evaluation']
+
+# Artefakt -> (erzeugende Stufe, Format)
+ARTIFACTS = {
+    'station_data': ('stations', 'frames'),
+    'station_metadata': ('stations', 'json'),
+    'interpolated': ('interpolation', 'frame'),
+    'eda': ('eda', 'json'),
+    'processed': ('preprocessing', 'frame'),
+    'climatology': ('climatology', 'json'),
+    'featured': ('features', 'frame'),
+    'split': ('split', 'json'),
+    'version': ('version', 'json'),
+    'rf_model': ('train_rf', 'json'),
+    'xgb_model': ('train_xgb', 'json'),
+    'training': ('training', 'json'),
+    'metrics': ('evaluation', 'json'),
+    'prediction': ('prediction', 'json'),
+}
+_EXTENSIONS = {'frame': 'parquet', 'frames': 'parquet', 'json': 'json'}
+_MANIFEST_FILE = 'manifest.json'
+
+
+# ----- Einstellungen und Eingaben je Stufe (bestimmen den Eingabe-Hash) -----
+
+def _stage_needs(stage: str) -> list[str]:
+    """Artefakte, die eine Stufe von früheren Stufen braucht."""
+    polars = config.DATA_BACKEND == "polars"
+    streaming = config.INTERPOLATION_MODE == "streaming"
+    needs = {
+        'stations': [],
+        # im Streaming lädt die Interpolation selbst, 'stations' liefert nur Stationen mit Koordinaten
+        'interpolation': ['station_metadata'] if streaming else ['station_data', 'station_metadata'],
+        'eda': ['interpolated'],
+        'preprocessing': [] if polars else ['interpolated'], # mit Polars Teil der Stufe 'features'
+        'climatology': ['interpolated'] if polars else ['processed'],
+        'features': ['interpolated', 'climatology'] if polars else ['processed', 'climatology'],
+        'split': ['featured'],
+        'version': ['featured', 'split'],
+        'train_rf': ['featured', 'split', 'version'],
+        'train_xgb': ['featured', 'split', 'version'],
+        'training': ['featured', 'split', 'version', 'rf_model', 'xgb_model', 'climatology'],
+        'evaluation': ['featured', 'split', 'training', 'climatology'],
+        'prediction': ['featured', 'split', 'training', 'climatology'],
+    }
+    return needs[stage]
+
+
+def stage_dependencies(stage: str) -> list[str]:
+    """Stufen, die vor `stage` fertig sein müssen (die Erzeuger ihrer Artefakte)."""
+    return sorted({ARTIFACTS[name][0] for name in _stage_needs(stage)}, key=STAGES.index)
+
+
+def _ancestors(stage: str) -> set:
+    found = set()
+    for dependency in stage_dependencies(stage):
+        found |= {dependency} | _ancestors(dependency)
+    return found
+
+
+def _descendants(stage: str) -> set:
+    return {other for other in STAGES if stage in _ancestors(other)}
+
+
+def _stage_cores(stage: str, core_budget: int) -> int:
+    """
+    Kerne, die eine Stufe belegt: RF und XGB teilen sich das Budget, 'training' bekommt es ganz, wenn die
+    RF-Kompression den Wald neu trainiert ('max_leaf'); alle anderen Stufen nutzen einen Kern.
+    """
+    if stage in ('train_rf', 'train_xgb'):
+        return max(1, core_budget // 2)
+    if stage == 'training' and 'max_leaf' in (config.RF_COMPRESSION or []):
+        return core_budget
+    return 1
+
+
+def _stage_settings(stage: str) -> dict:
+    """Einstellungen aus config.py, von denen das Ergebnis einer Stufe abhängt."""
+    download = {
+        # nur das Datum: END_DATE ist datetime.now(), am selben Tag sind es dieselben Daten
+        "period": (config.START_DATE.date(), config.END_DATE.date()),
+        "columns": config.REQUIRED_COLUMNS,
+        "essential": config.ESSENTIAL_COLS,
+    }
+    if stage == 'stations':
+        return {
+            "location": (config.TARGET_LAT, config.TARGET_LON),
+            "radius_km": config.SEARCH_RADIUS_KM,
+            "max_stations": config.MAX_NEARBY_STATIONS,
+            "interpolation_mode": config.INTERPOLATION_MODE,
+            **({} if config.INTERPOLATION_MODE == "streaming" else download),
+        }
+    if stage == 'interpolation':
+        from interpolation import DEFAULT_IDW_POWER
+        return {
+            "power": DEFAULT_IDW_POWER,
+            "columns": config.REQUIRED_COLUMNS,
+            "compact": config.COMPACT_DTYPES,
+            "interpolation_mode": config.INTERPOLATION_MODE,
+            **(download if config.INTERPOLATION_MODE == "streaming" else {}),
+        }
+    if stage == 'eda':
+        return {"plot_columns": config.EDA_PLOT_COLUMNS}
+    if stage == 'preprocessing':
+        return {"backend": config.DATA_BACKEND, "compact": config.COMPACT_DTYPES}
+    if stage == 'climatology':
+        return {
+            "smoothing_days": config.CLIMATOLOGY_SMOOTHING_DAYS,
+            "percentiles": config.CLIMATOLOGY_PERCENTILES,
+            "anomaly_columns": config.CLIMATOLOGY_ANOMALY_COLUMNS,
+            "test_days": config.TEST_PERIOD_DAYS,
+        }
+    if stage == 'features':
+        return {
+            "backend": config.DATA_BACKEND,
+            "compact": config.COMPACT_DTYPES,
+            "targets": (config.TARGET_COLUMNS, config.ORIGINAL_TARGET_BASE_COLUMNS),
+            "lag_days": config.LAG_DAYS,
+        }
+    if stage == 'split':
+        return {"test_days": config.TEST_PERIOD_DAYS, "compact": config.COMPACT_DTYPES}
+    if stage == 'version':
+        from model_manager import load_tuned_parameters
+        return {
+            "rf": config.RF_PARAMETER,
+            "xgb": config.XGB_PARAMETER,
+            "tuned": load_tuned_parameters(config.TUNED_PARAMS_PATH),
+            "rf_compression": config.RF_COMPRESSION,
+        }
+    if stage == 'training':
+        return {
+            "interval_coverage": config.PREDICTION_INTERVAL_COVERAGE,
+            "interval_calibration_fraction": config.PREDICTION_INTERVAL_CALIBRATION_FRACTION,
+        }
+    if stage == 'prediction':
+        return {
+            "horizon": config.FORECAST_HORIZON_DAYS,
+            "scenarios": config.MULTISTEP_SCENARIOS,
+            "anchors": config.MULTISTEP_ANCHORS,
+        }
+    return {}
+
+
+def input_hash(stage: str, manifest: dict) -> str:
+    """SHA-256 über die Einstellungen der Stufe und die Ausgabe-Hashes der Stufen, deren Artefakte sie liest."""
+    upstream = stage_dependencies(stage)
+    payload = {
+        "stage": stage,
+        "settings": _stage_settings(stage),
+        "inputs": {name: manifest["stages"].get(name, {}).get("output_hash") for name in upstream},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# ----- Artefakte speichern und laden -----
+
+def _artifact_path(run_dir: str, name: str) -> str:
+    stage, fmt = ARTIFACTS[name]
+    return os.path.join(run_dir, stage, f"{name}.{_EXTENSIONS[fmt]}")
+
+
+def _save_artifact(run_dir: str, name: str, value) -> str:
+    path = _artifact_path(run_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fmt = ARTIFACTS[name][1]
+    tmp_path = f"{path}.tmp"
+    if fmt == 'frame':
+        value.to_parquet(tmp_path)
+    elif fmt == 'frames':
+        # ein DataFrame mit Index (Station, Zeit); die Reihenfolge der Stationen bleibt erhalten
+        pd.concat(value, names=["station", value[next(iter(value))].index.name]).to_parquet(tmp_path)
+    else:
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_artifact(run_dir: str, name: str):
+    path = _artifact_path(run_dir, name)
+    fmt = ARTIFACTS[name][1]
+    if fmt == 'frame':
+        return pd.read_parquet(path)
+    if fmt == 'frames':
+        combined = pd.read_parquet(path)
+        stations = combined.index.get_level_values(0).unique()
+        return {station: combined.xs(station, level=0) for station in stations}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _output_hash(paths: list[str]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# ----- Laufverzeichnis und Manifest -----
+
+def new_run_dir(base_dir: str = config.PIPELINE_RUN_DIR) -> str:
+    path = os.path.join(base_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def latest_run_dir(base_dir: str = config.PIPELINE_RUN_DIR) -> str | None:
+    """Jüngstes Laufverzeichnis mit Manifest oder None."""
+    if not os.path.isdir(base_dir):
+        return None
+    runs = [name for name in sorted(os.listdir(base_dir)) if os.path.exists(os.path.join(base_dir, name, _MANIFEST_FILE))]
+    return os.path.join(base_dir, runs[-1]) if runs else None
+
+
+def load_manifest(run_dir: str) -> dict:
+    path = os.path.join(run_dir, _MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"run_dir": run_dir, "created_at": datetime.now().isoformat(), "stages": {}}
+
+
+def _write_manifest(run_dir: str, manifest: dict):
+    path = os.path.join(run_dir, _MANIFEST_FILE)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _is_reusable(stage: str, manifest: dict, run_dir: str, stage_input_hash: str) -> bool:
+    entry = manifest["stages"].get(stage)
+    return (
+        entry is not None
+        and entry["input_hash"] == stage_input_hash
+        and all(os.path.exists(os.path.join(run_dir, path)) for path in entry["artifacts"].values())
+    )
+
+
+def load_checkpoint(name: str, run_dir: str | None = None):
+    """
+    Artefakt aus dem (letzten) Laufverzeichnis, z.B. für cli.py; None, wenn es fehlt oder nicht mehr zu config.py passt.
+
+    Gültig ist der Checkpoint nur, wenn die erzeugende Stufe und alle Stufen davor mit den aktuellen Einstellungen
+    übersprungen würden.
+    """
+    run_dir = run_dir or latest_run_dir()
+    if run_dir is None:
+        return None
+    manifest = load_manifest(run_dir)
+    stage = ARTIFACTS[name][0]
+    for needed in sorted(_ancestors(stage) | {stage}, key=STAGES.index):
+        if not _is_reusable(needed, manifest, run_dir, input_hash(needed, manifest)):
+            return None
+    return _load_artifact(run_dir, name)
+
+
+# ----- Zustand: geladene Artefakte und daraus abgeleitete Objekte -----
+
+# Stufen in Threads teilen sich den Zustand; geladen bzw. abgeleitet wird jedes Objekt nur einmal
+_STATE_LOCK = threading.RLock()
+
+
+def _require(state: dict, names: list[str], run_dir: str):
+    """Lädt fehlende Artefakte aus dem Laufverzeichnis (nur die, die die Stufe wirklich braucht)."""
+    with _STATE_LOCK:
+        for name in names:
+            if name not in state:
+                state[name] = _load_artifact(run_dir, name)
+
+
+def _split_frames(state: dict) -> tuple:
+    """X_train, X_test, y_train, y_test aus dem Feature-DataFrame und den gespeicherten Split-Infos."""
+    with _STATE_LOCK:
+        if "frames" not in state:
+            from data_splitting import split_frames
+            split = state["split"]
+            state["frames"] = split_frames(state["featured"], split["features_cols"], split["target_cols"], split["n_train"])
+        return state["frames"]
+
+
+def _models(state: dict, console: Console) -> dict:
+    with _STATE_LOCK:
+        if "models" not in state:
+            import model_registry
+            models = model_registry.load_version_models(state["training"]["version_id"], console)
+            if models is None:
+                raise RuntimeError(f"Modellversion {state['training']['version_id']} konnte nicht geladen werden.")
+            state["models"] = models
+        return state["models"]
+
+
+# ----- Stufen: erhalten den Zustand, liefern {Artefakt: Wert} oder None bei Fehler -----
+
+def _run_stations(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    from data_collection import find_stations, get_data_for_stations
+    from interpolation import get_station_data
+
+    console.rule("\n[orange1]1. Stationssuche & Datenerfassung[/orange1]")
+    station_ids = find_stations(console=console)
+    if not station_ids:
+        console.print("[bold red]Keine Stationen gefunden.[/bold red]")
+        return None
+    if config.INTERPOLATION_MODE == "streaming":
+        # Daten lädt erst die Interpolation, Station für Station
+        station_metadata = get_station_data(station_ids, console=console)
+        if not station_metadata:
+            console.print("[bold red]FEHLER: Konnte keine Metadaten für Interpolation laden.[/bold red]")
+            return None
+        return {"station_metadata": station_metadata}
+    station_data = get_data_for_stations(
+        station_ids=station_ids,
+        start_date=config.START_DATE,
+        end_date=config.END_DATE,
+        required_columns=config.REQUIRED_COLUMNS,
+        essential_columns=config.ESSENTIAL_COLS,
+        console=console,
+    )
+    if not station_data:
+        console.print("[bold red]Keine Daten für relevante Stationen geladen.[/bold red]")
+        return None
+    console.print("   Hole Metadaten für Interpolation...")
+    station_metadata = get_station_data(list(station_data.keys()), console=console)
+    if not station_metadata:
+        console.print("[bold red]FEHLER: Konnte keine Metadaten für Interpolation laden.[/bold red]")
+        return None
+    return {"station_data": station_data, "station_metadata": station_metadata}
+
+
+def _run_interpolation(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    from interpolation import idw_interpolate, DEFAULT_IDW_POWER
+
+    console.rule("[orange1]1.5 Räumliche Interpolation (IDW)[/orange1]")
+    station_metadata = {sid: tuple(latlon) for sid, latlon in state["station_metadata"].items()}
+    if config.INTERPOLATION_MODE == "streaming":
+        from streaming_interpolation import download_and_interpolate
+        results = download_and_interpolate(
+            station_metadata, {"target": (config.TARGET_LAT, config.TARGET_LON)}, console, DEFAULT_IDW_POWER,
+        )
+        interpolated = None if results is None else results["target"]
+    else:
+        interpolated = idw_interpolate(
+            all_station_data=state["station_data"],
+            station_metadata=station_metadata,
+            target_lat=config.TARGET_LAT,
+            target_lon=config.TARGET_LON,
+            variables=config.REQUIRED_COLUMNS,
+            console=console,
+            power=DEFAULT_IDW_POWER,
+        )
+    if interpolated is None:
+        console.print("[bold red]FEHLER: IDW-Interpolation fehlgeschlagen.[/bold red]")
+        return None
+    console.print("   Beispiel der interpolierten Daten für Berlin:")
+    console.print(interpolated.head())
+    console.print(interpolated.info())
+    return {"interpolated": interpolated}
+
+
+def _run_eda(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    from eda import start_eda
+
+    console.rule("[orange1]2. Explorative Datenanalyse (EDA)[/orange1]")
+    start_eda(state["interpolated"], plot_columns=config.EDA_PLOT_COLUMNS, save_dir=config.EDA_PLOT_DIR, console=console)
+    return {"eda": {"plot_dir": config.EDA_PLOT_DIR, "plot_columns": config.EDA_PLOT_COLUMNS}}
+
+
+def _run_preprocessing(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    if config.DATA_BACKEND == "polars":
+        console.print("   DATA_BACKEND='polars': Vorverarbeitung läuft zusammen mit dem Feature Engineering.")
+        return {}
+    from data_preprocessing import preprocess_data
+
+    console.rule("[orange1]3. Datenvorverarbeitung[/orange1]")
+    processed = preprocess_data(state["interpolated"], console)
+    return None if processed is None else {"processed": processed}
+
+
+def _run_climatology(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    """Normalwerte und Perzentile je Tag des Jahres aus dem Trainingszeitraum (366-Zeilen-Tabelle)."""
+    from climatology import training_history, compute_climatology, climatology_to_json
+
+    console.rule("[orange1]3b. Klimatologie[/orange1]")
+    data = state["interpolated"] if config.DATA_BACKEND == "polars" else state["processed"]
+    history = training_history(data, config.TEST_PERIOD_DAYS)
+    if history.empty:
+        console.print("[red] Keine Daten vor dem Testzeitraum für die Klimatologie [/red]")
+        return None
+    climatology = compute_climatology(
+        history, config.REQUIRED_COLUMNS, config.CLIMATOLOGY_SMOOTHING_DAYS,
+        config.CLIMATOLOGY_PERCENTILES, config.CLIMATOLOGY_ANOMALY_COLUMNS,
+    )
+    console.print(
+        f"   Normalwerte ({climatology['smoothing_days']}-Tage-Fenster) und Perzentile {climatology['percentiles']} "
+        f"aus {climatology['start']} bis {climatology['end']}, Anomalie-Features: {climatology['anomaly_columns']}"
+    )
+    # als JSON-Form (gerundet) weitergeben: Training, Fortsetzen und climatology.json sehen dieselben Werte
+    return {"climatology": climatology_to_json(climatology)}
+
+
+def _climatology(state: dict) -> dict:
+    from climatology import climatology_from_json
+    return climatology_from_json(state["climatology"])
+
+
+def _run_features(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    if config.DATA_BACKEND == "polars":
+        from polars_backend import build_featured_data_polars
+        from climatology import add_anomaly_features
+
+        console.rule("[orange1]3./4. Datenvorverarbeitung & Feature Engineering (Polars)[/orange1]")
+        featured = build_featured_data_polars(state["interpolated"], console)
+        if featured is not None:
+            featured = add_anomaly_features(featured, _climatology(state))
+    else:
+        from feature_engineering import engineer_features
+
+        console.rule("[orange1]4. Feature Engineering[/orange1]")
+        featured = engineer_features(
+            data=state["processed"],
+            target_cols=config.TARGET_COLUMNS,
+            target_base_cols=config.ORIGINAL_TARGET_BASE_COLUMNS,
+            lag_days=config.LAG_DAYS,
+            climatology=_climatology(state),
+        )
+    if featured is None or featured.empty:
+        console.print("[red] Nach dem Feature Engineering sind keine Daten mehr verfügbar [/red]")
+        return None
+    return {"featured": featured}
+
+
+def _run_split(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    from data_splitting import split_data
+
+    console.rule("[orange1]5. Train/Test Split[/orange1]")
+    X_train, X_test, y_train, y_test, features_cols, target_cols, split_date, train_percentage, test_percentage = split_data(
+        state["featured"], console
+    )
+    state["frames"] = (X_train, X_test, y_train, y_test)
+    return {"split": {
+        "features_cols": features_cols,
+        "target_cols": target_cols,
+        "n_train": len(X_train),
+        "n_test": len(X_test),
+        "split_date": split_date.strftime("%Y-%m-%d"),
+        "train_percentage": train_percentage,
+        "test_percentage": test_percentage,
+    }}
+
+
+def _run_version(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    """Fingerprint der Trainingsdaten + Parameter; vorhandene Version wiederverwenden oder eine neue anlegen."""
+    import model_registry
+    from model_training import resolve_parameters
+
+    console.rule("[orange1]6. Modelltraining[/orange1]")
+    X_train, X_test, y_train, y_test = _split_frames(state)
+    rf_parameter, xgb_parameter = resolve_parameters(config.RF_PARAMETER, config.XGB_PARAMETER)
+    fingerprint = model_registry.compute_fingerprint(
+        X_train, y_train, rf_parameter, xgb_parameter, extra={"rf_compression": config.RF_COMPRESSION}
+    )
+    existing = model_registry.find_version(fingerprint) if config.MODEL_REGISTRY_REUSE else None
+    if existing is not None:
+        console.print(f"[green]   ✔️ Trainingsdaten und Parameter unverändert, verwende Version {existing['version']}.[/green]")
+        return {"version": {"version_id": existing["version"], "fingerprint": fingerprint, "reused": True}}
+    version_id, _ = model_registry.create_version(fingerprint)
+    return {"version": {"version_id": version_id, "fingerprint": fingerprint, "reused": False}}
+
+
+def _train_one(model_name: str, state: dict, console: Console, n_jobs: int) -> dict | None:
+    import model_registry
+    from model_training import train_single_model, resolve_parameters
+
+    version = state["version"]
+    path = os.path.join(model_registry.version_dir(version["version_id"]), f"{model_name}_model.joblib")
+    if not version["reused"]:
+        X_train, X_test, y_train, y_test = _split_frames(state)
+        rf_parameter, xgb_parameter = resolve_parameters(config.RF_PARAMETER, config.XGB_PARAMETER)
+        console.print(f"   Trainiere {model_name} mit {n_jobs} Kern(en)...")
+        model = train_single_model(
+            model_name, X_train, y_train, rf_parameter, xgb_parameter, os.path.dirname(path), n_jobs=n_jobs
+        )
+        with _STATE_LOCK:
+            state.setdefault("trained", {})[model_name] = model
+    return {f"{model_name}_model": {"path": path}}
+
+
+def _run_train_rf(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    return _train_one("rf", state, console, n_jobs)
+
+
+def _run_train_xgb(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    return _train_one("xgb", state, console, n_jobs)
+
+
+def _run_training(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    """Schließt die Version ab: flache Modelle, optional RF-Kompression, Registrierung und Beförderung."""
+    import model_registry
+    from model_manager import load_model
+    from model_training import resolve_parameters
+    from flat_trees import save_flat_models
+
+    version = state["version"]
+    version_id, fingerprint = version["version_id"], version["fingerprint"]
+    files_written = False # Dateien der Version neu geschrieben -> auch als aktuelle Version erneut befördern
+    if version["reused"]:
+        trained_models = _models({"training": version}, console)
+        from prediction_intervals import load_calibration
+        version_path = model_registry.version_dir(version_id)
+        calibration = load_calibration(version_path) or {}
+        if (calibration.get("coverage"), calibration.get("calibration_fraction")) != (
+            config.PREDICTION_INTERVAL_COVERAGE, config.PREDICTION_INTERVAL_CALIBRATION_FRACTION
+        ):
+            # ältere Version ohne (getrennte) Kalibrierung oder andere Einstellung: nur die Intervalle neu kalibrieren
+            X_train, X_test, y_train, y_test = _split_frames(state)
+            _calibrate_intervals(version_path, X_test, y_test, state["split"]["target_cols"], console)
+            files_written = True
+        files_written = _save_version_climatology(version_path, state["climatology"]) or files_written
+    else:
+        X_train, X_test, y_train, y_test = _split_frames(state)
+        trained = state.get("trained", {})
+        trained_models = {
+            name: trained[name] if name in trained else load_model(state[f"{name}_model"]["path"], console)
+            for name in ("rf", "xgb")
+        }
+        version_path = model_registry.version_dir(version_id)
+        # Flache Kopie der Bäume für den täglichen Vorhersagepfad (ohne sklearn/xgboost)
+        save_flat_models(
+            trained_models,
+            os.path.join(version_path, 'flat_models.mfa'),
+            feature_names=list(X_train.columns),
+            compress=config.MODEL_ARTIFACT_COMPRESS,
+        )
+        rf_parameter, xgb_parameter = resolve_parameters(config.RF_PARAMETER, config.XGB_PARAMETER)
+        if config.RF_COMPRESSION:
+            # Nur der flache RF für den täglichen Vorhersagepfad wird komprimiert, die joblib-Dateien bleiben vollständig.
+            # 'max_leaf' trainiert mit denselben (ggf. getunten) Parametern neu, die register_version festhält.
+            console.rule("[orange1]6b. RandomForest-Kompression[/orange1]")
+            from model_compression import save_compressed_flat_models
+            save_compressed_flat_models(
+                trained_models, X_train, y_train, X_test, y_test, version_path, config.RF_COMPRESSION,
+                {**rf_parameter, "n_jobs": n_jobs}, console,
+            )
+        target_cols = state["split"]["target_cols"]
+        _calibrate_intervals(version_path, X_test, y_test, target_cols, console)
+        _save_version_climatology(version_path, state["climatology"])
+        files_written = True
+        if model_registry.register_version(version_id, fingerprint, X_train, target_cols, rf_parameter, xgb_parameter) is None:
+            return None
+
+    if files_written or (model_registry.get_current() or {}).get("version") != version_id:
+        model_registry.promote(version_id)
+    with _STATE_LOCK:
+        state["models"] = trained_models
+    # die Abdeckung gehört zum Ergebnis, damit 'prediction' bei neuer Kalibrierung neu läuft
+    return {"training": {
+        "version_id": version_id, "fingerprint": fingerprint, "interval_coverage": config.PREDICTION_INTERVAL_COVERAGE,
+        "interval_calibration_fraction": config.PREDICTION_INTERVAL_CALIBRATION_FRACTION,
+    }}
+
+
+def _save_version_climatology(version_path: str, climatology: dict) -> bool:
+    """climatology.json der Version schreiben, wenn sie fehlt oder abweicht; True, wenn geschrieben wurde."""
+    from climatology import CLIMATOLOGY_FILE, save_climatology
+
+    path = os.path.join(version_path, CLIMATOLOGY_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            if json.load(f) == climatology:
+                return False
+    return save_climatology(climatology, version_path)
+
+
+def _calibrate_intervals(version_path: str, X_test, y_test, target_cols: list, console: Console):
+    """Vorhersageintervalle auf dem Testzeitraum kalibrieren, mit den flachen Modellen des täglichen Pfads."""
+    from flat_trees import load_flat_models
+    from prediction_intervals import calibrate_intervals, save_calibration
+
+    flat_models = load_flat_models(os.path.join(version_path, 'flat_models.mfa'), mmap_mode=None)
+    if flat_models is None:
+        return
+    calibration = calibrate_intervals(
+        flat_models, X_test, y_test, target_cols,
+        config.PREDICTION_INTERVAL_COVERAGE, config.PREDICTION_INTERVAL_CALIBRATION_FRACTION,
+    )
+    if save_calibration(calibration, version_path):
+        observed = ", ".join(
+            f"{model_name} {sum(values.values()) / len(values):.0%}" for model_name, values in calibration["observed_coverage"].items()
+        )
+        console.print(
+            f"   Intervalle ({calibration['coverage']:.0%}) auf {calibration['n_calibration']} Tagen kalibriert, "
+            f"Abdeckung auf den übrigen {calibration['n_coverage']} Tagen des Testzeitraums: {observed}"
+        )
+
+
+def _run_evaluation(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    import model_registry
+    from model_evaluation import evaluate_model, create_temperature_time_series
+    from climatology import ClimatologyBaseline
+
+    console.rule("[orange1]7. Modellbewertung[/orange1]")
+    X_train, X_test, y_train, y_test = _split_frames(state)
+    target_cols = state["split"]["target_cols"]
+    models = dict(_models(state, console))
+    if config.RF_COMPRESSION:
+        # bewertet wird der komprimierte flache RF, den der tägliche Pfad verwendet; der vollständige als Vergleich
+        from flat_trees import load_flat_models
+        version_path = model_registry.version_dir(state["training"]["version_id"])
+        flat_models = load_flat_models(os.path.join(version_path, 'flat_models.mfa'), mmap_mode=None)
+        if flat_models is None:
+            raise RuntimeError(f"flat_models.mfa der Version {state['training']['version_id']} fehlt.")
+        models = {"rf": flat_models["rf"], "xgb": models["xgb"], "rf_uncompressed": models["rf"]}
+    # die Klimatologie als Vergleich ohne Modell: Normalwert des Zieltags
+    models["climatology"] = ClimatologyBaseline(_climatology(state), target_cols)
+    metrics = evaluate_model(models=models, X_test=X_test, y_test=y_test, target_cols=target_cols, save_dir=config.EDA_PLOT_DIR)
+    model_registry.update_metrics(state["training"]["version_id"], metrics)
+
+    console.rule("[orange1]Temperatur-Zeitreihe erstellen[/orange1]")
+    temp_target_idx = next((i for i, col in enumerate(target_cols) if "tavg" in col), -1)
+    if temp_target_idx != -1:
+        console.print("[green]Erstelle Temperatur-Zeitreihe...[/green]")
+        create_temperature_time_series(
+            X_train=X_train,
+            y_train=y_train,
+            X_test=X_test,
+            y_test=y_test,
+            models=models,
+            target_col_idx=temp_target_idx,
+            target_cols=target_cols,
+            save_dir=config.EDA_PLOT_DIR,
+        )
+    else:
+        console.print("[yellow]Keine Temperaturspalte gefunden. Überspringe Temperatur-Zeitreihe.[/yellow]")
+    return {"metrics": {
+        model_name: {target: {k: float(v) for k, v in values.items()} for target, values in target_metrics.items()}
+        for model_name, target_metrics in (metrics or {}).items()
+    }}
+
+
+def _run_prediction(state: dict, console: Console, n_jobs: int = 1) -> dict | None:
+    from prediction import predict_next_day
+    from multistep_forecast import recursive_forecast, print_horizon, horizon_to_json
+    import model_registry
+    from update_prediction_data import predict_values
+    from prediction_intervals import load_calibration, predict_intervals, intervals_to_json
+
+    console.rule("[reverse green]8. Vorhersage für den nächsten Tag[/reverse green]")
+    features_cols = state["split"]["features_cols"]
+    target_cols = state["split"]["target_cols"]
+    models = _models(state, console)
+    last_available_data_row = state["featured"].iloc[-1:]
+
+    console.print("\n[bold yellow]--- DEBUG: Features für Vorhersage aus main.py ---[/bold yellow]")
+    console.print(f"Letzter Datenpunkt Index (main.py): {last_available_data_row.index[0]}")
+    console.print("Feature-Werte (main.py):")
+    console.print(last_available_data_row[features_cols].iloc[0].to_dict()) # Zeige Werte als Dictionary
+    console.print("[bold yellow]-----------------------------------------------------[/bold yellow]\n")
+
+    predict_next_day(
+        models=models,
+        last_available_data_row=last_available_data_row,
+        features_cols=features_cols,
+        target_cols=target_cols,
+    )
+
+    console.print(f"\n[cyan]Mehrtagesvorhersage für {config.FORECAST_HORIZON_DAYS} Tage...[/cyan]")
+    horizon_result = recursive_forecast(
+        models,
+        last_available_data_row[features_cols],
+        features_cols,
+        last_available_data_row.index[0].date(),
+        horizon=config.FORECAST_HORIZON_DAYS,
+        target_cols=target_cols,
+        climatology=_climatology(state),
+    )
+    print_horizon(horizon_result, console)
+    with warnings.catch_warnings():
+        # predict_values übergibt ein Array, die sklearn-Modelle wurden mit Spaltennamen trainiert
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        next_day = predict_values(models, last_available_data_row[features_cols], target_cols)
+    calibration = load_calibration(model_registry.version_dir(state["training"]["version_id"]))
+    intervals, latency_ms = predict_intervals(models, last_available_data_row[features_cols], next_day, calibration, target_cols)
+    return {"prediction": {
+        "feature_date": last_available_data_row.index[0].strftime("%Y-%m-%d"),
+        "next_day": next_day,
+        "intervals": intervals_to_json(intervals, (calibration or {}).get("coverage", config.PREDICTION_INTERVAL_COVERAGE), latency_ms),
+        "horizon": horizon_to_json(horizon_result),
+    }}
+
+
+_STAGE_FUNCTIONS = {
+    'stations': _run_stations,
+    'interpolation': _run_interpolation,
+    'eda': _run_eda,
+    'preprocessing': _run_preprocessing,
+    'climatology': _run_climatology,
+    'features': _run_features,
+    'split': _run_split,
+    'version': _run_version,
+    'train_rf': _run_train_rf,
+    'train_xgb': _run_train_xgb,
+    'training': _run_training,
+    'evaluation': _run_evaluation,
+    'prediction': _run_prediction,
+}
+
+
+
+
+# ----- Ablauf: Stufen als Abhängigkeitsgraph, unabhängige Stufen gleichzeitig -----
+
+def _execute_stage(stage: str, state: dict, run_dir: str, console: Console, n_jobs: int) -> dict:
+    """Führt eine Stufe aus und speichert ihre Artefakte -> {'paths', 'start', 'end'} (None in 'paths' = Fehler)."""
+    start = time.time()
+    _require(state, _stage_needs(stage), run_dir)
+    artifacts = _STAGE_FUNCTIONS[stage](state, console, n_jobs)
+    paths = None
+    if artifacts is not None:
+        paths = {name: _save_artifact(run_dir, name, value) for name, value in artifacts.items()}
+        with _STATE_LOCK:
+            state.update(artifacts)
+    return {"paths": paths, "start": start, "end": time.time()}
+
+
+def _execute_stage_process(stage: str, run_dir: str, n_jobs: int) -> dict:
+    """Wie _execute_stage, aber in einem eigenen Prozess: Eingaben kommen aus dem Laufverzeichnis."""
+    return _execute_stage(stage, {}, run_dir, Console(), n_jobs)
+
+
+def critical_path(durations: dict) -> tuple[list[str], float]:
+    """Längste Kette (Summe der Dauern) durch den Graphen -> (Stufen, Sekunden)."""
+    finish, previous = {}, {}
+    for stage in STAGES:
+        if stage not in durations:
+            continue
+        dependencies = [dep for dep in stage_dependencies(stage) if dep in finish]
+        previous[stage] = max(dependencies, key=finish.get) if dependencies else None
+        finish[stage] = durations[stage] + (finish[previous[stage]] if previous[stage] else 0.0)
+    if not finish:
+        return [], 0.0
+    stage = max(finish, key=finish.get)
+    length = finish[stage]
+    path = []
+    while stage is not None:
+        path.append(stage)
+        stage = previous[stage]
+    return path[::-1], length
+
+
+def run_pipeline(
+    run_dir: str | None = None,
+    resume: bool = False,
+    from_stage: str | None = None,
+    to_stage: str | None = None,
+    console: Console | None = None,
+    core_budget: int = config.PIPELINE_CORE_BUDGET,
+) -> bool:
+    """
+    Führt die Stufen als Abhängigkeitsgraph aus und speichert nach jeder Stufe deren Artefakte und das Manifest.
+
+    Eine Stufe startet, sobald alle Stufen fertig sind, deren Artefakte sie liest, und genug Kerne aus
+    core_budget frei sind (_stage_cores); EDA und Bewertung laufen in Prozessen, der Rest in Threads.
+    resume=True (oder from_stage) arbeitet im letzten Laufverzeichnis weiter: Stufen, deren Eingabe-Hash
+    (Einstellungen + Ausgabe-Hashes der Vorgängerstufen) zum Manifest passt, werden übersprungen; ihre Artefakte
+    werden erst geladen, wenn eine spätere Stufe sie braucht. from_stage und alle davon abhängigen Stufen werden
+    neu ausgeführt; mit to_stage nur diese Stufe und ihre Vorgänger.
+
+    Returns:
+        True, wenn alle angeforderten Stufen erfolgreich waren.
+    """
+    console = console or Console()
+    core_budget = max(1, core_budget)
+    selected = set(STAGES) if to_stage is None else _ancestors(to_stage) | {to_stage}
+    forced = set() if from_stage is None else _descendants(from_stage) | {from_stage}
+    if from_stage is not None and not forced & selected:
+        raise ValueError(f"--to-stage {to_stage} hängt nicht von --from-stage {from_stage} ab.")
+
+    if run_dir is None and (resume or from_stage):
+        run_dir = latest_run_dir()
+        if run_dir is None:
+            console.print("[yellow]Kein früherer Lauf gefunden, starte einen neuen.[/yellow]")
+    run_dir = run_dir or new_run_dir()
+    os.makedirs(run_dir, exist_ok=True)
+    manifest = load_manifest(run_dir)
+    console.print(f"   Laufverzeichnis: [cyan]{run_dir}[/cyan], Kernbudget: {core_budget}")
+
+    state = {}
+    pending = [stage for stage in STAGES if stage in selected]
+    finished, timeline = set(), {}
+    running = {} # future -> (stage, cores)
+    cores_in_use = 0
+    failed = False
+    t_start = time.time()
+    threads = ThreadPoolExecutor(max_workers=core_budget)
+    processes = None
+
+    try:
+        while pending or running:
+            # Bereite Stufen starten (übernehmen, falls der Checkpoint gilt), solange Kerne frei sind
+            for stage in list(pending):
+                if failed or not all(dep in finished for dep in stage_dependencies(stage)):
+                    continue
+                stage_input_hash = input_hash(stage, manifest)
+                if stage not in forced and _is_reusable(stage, manifest, run_dir, stage_input_hash):
+                    pending.remove(stage)
+                    finished.add(stage)
+                    timeline[stage] = {"status": "übernommen"}
+                    continue
+                cores = min(_stage_cores(stage, core_budget), core_budget)
+                if running and cores_in_use + cores > core_budget:
+                    continue
+                if stage in PROCESS_STAGES:
+                    if processes is None:
+                        context = multiprocessing.get_context(config.PIPELINE_START_METHOD)
+                        processes = ProcessPoolExecutor(max_workers=core_budget, mp_context=context)
+                    future = processes.submit(_execute_stage_process, stage, run_dir, cores)
+                else:
+                    future = threads.submit(_execute_stage, stage, state, run_dir, console, cores)
+                running[future] = (stage, cores, stage_input_hash)
+                cores_in_use += cores
+                pending.remove(stage)
+            if failed:
+                pending.clear()
+            if not running:
+                if pending: # nur möglich, wenn eine Abhängigkeit außerhalb der Auswahl liegt
+                    console.print(f"[red]   Stufen ohne erfüllbare Abhängigkeiten: {pending}[/red]")
+                    failed = True
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, cores, stage_input_hash = running.pop(future)
+                cores_in_use -= cores
+                try:
+                    result = future.result()
+                except Exception as e:
+                    console.print(f"[red]   Fehler in Stufe '{stage}': {e}[/red]")
+                    traceback.print_exception(e)
+                    result = {"paths": None, "start": t_start, "end": time.time()}
+                executor = "Prozess" if stage in PROCESS_STAGES else "Thread"
+                timeline[stage] = {"start": result["start"] - t_start, "end": result["end"] - t_start,
+                                   "cores": cores, "executor": executor}
+                if result["paths"] is None:
+                    timeline[stage]["status"] = "fehlgeschlagen"
+                    failed = True
+                    continue
+                if stage in PROCESS_STAGES:
+                    # im Prozess erzeugt: erst bei Bedarf aus dem Laufverzeichnis laden
+                    for name in result["paths"]:
+                        state.pop(name, None)
+                manifest["stages"][stage] = {
+                    "input_hash": stage_input_hash,
+                    "output_hash": _output_hash(list(result["paths"].values())),
+                    "artifacts": {name: os.path.relpath(path, run_dir) for name, path in result["paths"].items()},
+                    "completed_at": datetime.now().isoformat(),
+                    "seconds": result["end"] - result["start"],
+                }
+                _write_manifest(run_dir, manifest)
+                timeline[stage]["status"] = "ausgeführt"
+                finished.add(stage)
+    finally:
+        threads.shutdown(wait=True)
+        if processes is not None:
+            processes.shutdown(wait=True)
+
+    print_summary(timeline, time.time() - t_start, run_dir, console)
+    return not failed
+
+
+def print_summary(timeline: dict, wall_seconds: float, run_dir: str, console: Console):
+    """Zeitleiste der Stufen und kritischer Pfad (längste Kette, die Untergrenze für die Laufzeit)."""
+    durations = {stage: entry["end"] - entry["start"] for stage, entry in timeline.items() if "end" in entry}
+    path, path_seconds = critical_path(durations)
+
+    table = Table(title=f"Pipeline-Stufen ({run_dir})")
+    for column in ["Stufe", "Status", "Ausführung", "Kerne", "Start (s)", "Ende (s)", "Dauer (s)", "Kritischer Pfad"]:
+        table.add_column(column, justify="left" if column in ("Stufe", "Status", "Ausführung") else "right")
+    for stage in STAGES:
+        if stage not in timeline:
+            continue
+        entry = timeline[stage]
+        status = {"ausgeführt": "[green]ausgeführt[/green]", "fehlgeschlagen": "[red]fehlgeschlagen[/red]"}.get(
+            entry["status"], entry["status"]
+        )
+        if "end" in entry:
+            cells = [entry["executor"], str(entry["cores"]), f"{entry['start']:.1f}", f"{entry['end']:.1f}",
+                     f"{durations[stage]:.1f}"]
+        else:
+            cells = ["-", "-", "-", "-", "-"]
+        table.add_row(stage, status, *cells, "*" if stage in path else "")
+    console.print(table)
+    if durations:
+        console.print(
+            f"   Laufzeit {wall_seconds:.1f} s, Summe aller Stufen {sum(durations.values()):.1f} s, "
+            f"kritischer Pfad {path_seconds:.1f} s: {' -> '.join(path)}"
+        )
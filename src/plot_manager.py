@@ -1,8 +1,9 @@
-import matplotlib.pyplot as plt
 import os
 import sys
 
 def save_plot(filename: str, save_dir: str):
+    import matplotlib.pyplot as plt
+
     if not save_dir:
         print("Kein Speicherverzeichnis angegeben. Plot wird nicht gespeichert", file=sys.stderr)
         try:
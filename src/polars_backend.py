@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+import config
+
+WINSORIZE_LIMIT = 0.05 # wie preprocess_data: 5%/95%
+_ROW = "_row"
+_TIME = "_time"
+CALENDAR_COLUMNS = ['month', 'dayofyear', 'weekday']
+
+
+def winsorize_positions(n: int, limit: float = WINSORIZE_LIMIT) -> tuple[int, int]:
+    """
+    Positionen der Grenzwerte im sortierten Vektor, wie bei scipy.stats.mstats.winsorize(limits=(limit, limit)).
+
+    winsorize setzt die untersten int(limit * n) Werte auf den Wert an dieser Position und die obersten
+    int(n * limit) auf den Wert an Position n - int(n * limit) - 1; das entspricht einem Clipping auf diese Werte.
+    """
+    return int(limit * n), n - int(n * limit) - 1
+
+
+def build_feature_plan(
+    data: pd.DataFrame,
+    target_cols: list = config.TARGET_COLUMNS,
+    target_base_cols: list = config.ORIGINAL_TARGET_BASE_COLUMNS,
+    lag_days: int = config.LAG_DAYS,
+    compact: bool = config.COMPACT_DTYPES,
+):
+    """
+    preprocess_data + engineer_features als eine Polars-Abfrage (LazyFrame, noch nicht ausgeführt).
+
+    Imputation (ffill, dann bfill), Winsorizing, Zielspalten, Lags und Kalenderspalten sind Ausdrücke derselben
+    Abfrage; Polars berechnet die Spalten parallel und legt keine Zwischen-DataFrames an. Die Spalte _row
+    enthält die ursprüngliche Zeilennummer (für den Index des Ergebnisses). Kalenderspalten haben die Datentypen
+    des pandas-Pfads (int32, kompakt int8/int16).
+    """
+    import polars as pl
+
+    if len(target_cols) != len(target_base_cols):
+        raise ValueError("target_cols und target_base_cols müssen die gleiche Länge haben.")
+    value_cols = list(data.columns)
+    for target, base in zip(target_cols, target_base_cols):
+        if base not in value_cols:
+            raise ValueError(f"Basisspalte '{base}' für Zielvariable '{target}' nicht gefunden.")
+
+    value_dtype = pl.Float32 if compact else pl.Float64
+    month_dtype, day_dtype = (pl.Int8, pl.Int16) if compact else (pl.Int32, pl.Int32)
+    # Spalten ganz ohne Werte überspringt preprocess_data beim Winsorizing (dropna am Ende leert dann alles)
+    winsorize_cols = [col for col in value_cols if data[col].notna().any()]
+    low, high = winsorize_positions(len(data))
+
+    frame = pl.DataFrame({_ROW: np.arange(len(data), dtype=np.int64), _TIME: data.index.to_numpy()})
+    frame = frame.with_columns(pl.from_pandas(data.reset_index(drop=True), nan_to_null=True))
+    plan = (
+        frame.lazy()
+        .with_columns(pl.col(col).cast(value_dtype).forward_fill().backward_fill() for col in value_cols)
+        .with_columns(pl.col(col).clip(pl.col(col).sort().get(low), pl.col(col).sort().get(high)) for col in winsorize_cols)
+        .with_columns(pl.col(base).shift(-1).alias(target) for target, base in zip(target_cols, target_base_cols))
+        .with_columns(
+            pl.col(col).shift(i).alias(f"{col}_lag_{i}")
+            for col in value_cols + list(target_cols)
+            for i in range(1, lag_days + 1)
+        )
+        .with_columns(
+            pl.col(_TIME).dt.month().cast(month_dtype).alias("month"),
+            pl.col(_TIME).dt.ordinal_day().cast(day_dtype).alias("dayofyear"),
+            (pl.col(_TIME).dt.weekday() - 1).cast(month_dtype).alias("weekday"), # Polars: Montag = 1
+        )
+        .drop(_TIME)
+        .drop_nulls()
+    )
+    return plan
+
+
+def build_featured_data_polars(
+    data: pd.DataFrame,
+    console: Console,
+    target_cols: list = config.TARGET_COLUMNS,
+    target_base_cols: list = config.ORIGINAL_TARGET_BASE_COLUMNS,
+    lag_days: int = config.LAG_DAYS,
+    compact: bool = config.COMPACT_DTYPES,
+) -> pd.DataFrame | None:
+    """
+    Vorverarbeitung und Feature Engineering mit Polars; Ergebnis spaltengleich zu
+    engineer_features(preprocess_data(data)) (gleiche Spalten, Reihenfolge, Datentypen und Werte).
+
+    Die Wertspalten werden einmal in ein float-Array (Fortran-Reihenfolge) geschrieben, das der DataFrame ohne
+    Kopie übernimmt; mit compact=True gibt split_data davon Views an die Modelle weiter.
+    """
+    try:
+        import polars as pl
+    except ImportError:
+        console.print("[red]FEHLER: Für DATA_BACKEND='polars' wird das Paket 'polars' benötigt.[/red]")
+        return None
+
+    plan = build_feature_plan(data, target_cols, target_base_cols, lag_days, compact)
+    console.print(f"   Polars-Abfrage mit {len(plan.collect_schema()) - 1} Spalten, {pl.thread_pool_size()} Threads")
+    result = plan.collect()
+    if result.height == 0:
+        raise ValueError("\nNach Feature Engineering sind keine Daten mehr verfügbar.")
+
+    rows = result[_ROW].to_numpy()
+    contiguous = rows[-1] - rows[0] + 1 == len(rows)
+    index = data.index[rows[0]:rows[-1] + 1] if contiguous else data.index[rows]
+
+    value_names = [col for col in result.columns if col not in [_ROW] + CALENDAR_COLUMNS]
+    values = result.select(value_names).to_numpy(order="fortran")
+    featured = pd.DataFrame(values, index=index, columns=value_names, copy=False)
+    for col in CALENDAR_COLUMNS:
+        featured[col] = result[col].to_numpy()
+
+    rows_dropped = len(data) - len(featured)
+    console.print(f"   {rows_dropped} Zeilen mit NaN-Werten entfernt, Dimensionen: {featured.shape}")
+    console.print("[green]   ✔️ Vorverarbeitung und Feature Engineering (Polars) abgeschlossen.[/green]")
+    return featured
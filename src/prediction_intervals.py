@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import weakref
+
+import numpy as np
+
+import config
+from flat_trees import FlatTreeEnsemble, flatten_model
+
+INTERVALS_FILE = 'intervals.json'
+# Zielspalte -> Schlüssel in predict_values / prediction.json
+_TARGET_KEYS = {'tavg_target': 'temp', 'wspd_target': 'wspd'}
+_FLAT_CACHE = weakref.WeakKeyDictionary() # sklearn-RF -> flaches Ensemble (Export nur einmal pro Modell)
+
+
+def _flat_forest(model) -> FlatTreeEnsemble | None:
+    """Flaches Ensemble eines RandomForest (flach geladen oder einmalig exportiert); None bei Boosting."""
+    if isinstance(model, FlatTreeEnsemble):
+        return model if model.aggregation == "mean" else None
+    if not hasattr(model, "estimators_"):
+        return None
+    if model not in _FLAT_CACHE:
+        _FLAT_CACHE[model] = flatten_model(model)
+    return _FLAT_CACHE[model]
+
+
+def forest_quantiles(model, X, quantiles: list[float]) -> np.ndarray:
+    """
+    Quantile über die Vorhersagen der einzelnen Bäume, Form (len(quantiles), n_rows, n_outputs).
+
+    Alle Bäume laufen in einem Durchgang über die flachen Arrays (predict_per_tree), die Quantile sind ein
+    np.quantile über die Baumachse - keine Schleife über estimators_.
+    """
+    flat = _flat_forest(model)
+    if flat is None:
+        raise TypeError(f"{type(model).__name__} ist kein RandomForest.")
+    per_tree = flat.predict_per_tree(X) # (n_trees, n_rows, n_outputs)
+    return np.quantile(per_tree, quantiles, axis=0)
+
+
+def conformal_halfwidths(y_true: np.ndarray, y_pred: np.ndarray, coverage: float) -> np.ndarray:
+    """
+    Split-Conformal: halbe Intervallbreite je Output aus den absoluten Residuen eines nicht trainierten Zeitraums.
+
+    Quantil ceil((n+1) * coverage) / n der Residuen, damit die Abdeckung auf neuen Tagen mindestens `coverage` ist
+    (solange sich die Fehler nicht ändern).
+    """
+    residuals = np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64))
+    n = len(residuals)
+    level = min(1.0, np.ceil((n + 1) * coverage) / n)
+    return np.quantile(residuals, level, axis=0, method="higher")
+
+
+def calibrate_intervals(
+    models: dict,
+    X_test,
+    y_test,
+    target_cols: list,
+    coverage: float = config.PREDICTION_INTERVAL_COVERAGE,
+    calibration_fraction: float = config.PREDICTION_INTERVAL_CALIBRATION_FRACTION,
+) -> dict:
+    """
+    Kalibrierung für prediction.json: Conformal-Breiten für XGBoost aus dem ersten Teil des Testzeitraums
+    (calibration_fraction, zeitlich geordnet) und die Abdeckung beider Intervalle auf dem Rest. Auf den Tagen der
+    Kalibrierung läge die XGBoost-Abdeckung per Konstruktion über `coverage`; beim RF zeigt sie, wie gut die
+    Streuung der Bäume die Fehler erklärt.
+    """
+    y_true = np.asarray(y_test, dtype=np.float64).reshape(len(y_test), -1)
+    X_test = np.asarray(X_test)
+    n_calibration = int(round(len(y_true) * calibration_fraction))
+    if not 0 < n_calibration < len(y_true):
+        raise ValueError(f"Testzeitraum ({len(y_true)} Tage) zu kurz für Kalibrierung und Abdeckung.")
+    lower, upper = (1 - coverage) / 2, (1 + coverage) / 2
+    calibration = {
+        "coverage": coverage, "calibration_fraction": calibration_fraction, "n_calibration": n_calibration,
+        "n_coverage": len(y_true) - n_calibration, "xgb_halfwidth": {}, "observed_coverage": {},
+    }
+
+    xgb_pred = np.asarray(models["xgb"].predict(X_test)).reshape(len(y_true), -1)
+    halfwidths = conformal_halfwidths(y_true[:n_calibration], xgb_pred[:n_calibration], coverage)
+    calibration["xgb_halfwidth"] = dict(zip(target_cols, map(float, halfwidths)))
+    inside = np.abs(y_true[n_calibration:] - xgb_pred[n_calibration:]) <= halfwidths
+    calibration["observed_coverage"]["xgb"] = dict(zip(target_cols, map(float, inside.mean(axis=0))))
+
+    if _flat_forest(models["rf"]) is not None:
+        low, high = forest_quantiles(models["rf"], X_test[n_calibration:], [lower, upper])
+        inside = (y_true[n_calibration:] >= low) & (y_true[n_calibration:] <= high)
+        calibration["observed_coverage"]["rf"] = dict(zip(target_cols, map(float, inside.mean(axis=0))))
+    return calibration
+
+
+def save_calibration(calibration: dict, model_dir: str) -> bool:
+    filepath = os.path.join(model_dir, INTERVALS_FILE)
+    try:
+        with open(f"{filepath}.tmp", "w") as f:
+            json.dump(calibration, f, indent=2)
+        os.replace(f"{filepath}.tmp", filepath)
+        return True
+    except Exception as e:
+        print(f"\nFehler beim Speichern der Intervall-Kalibrierung: {e}")
+        return False
+
+
+def load_calibration(model_dir: str = config.MODEL_SAVE_DIR) -> dict | None:
+    """Kalibrierung aus model_dir/intervals.json; None, wenn es keine gibt (ältere Modellversionen)."""
+    filepath = os.path.join(model_dir, INTERVALS_FILE)
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"\nFehler beim Laden der Intervall-Kalibrierung: {e}")
+        return None
+
+
+def predict_intervals(
+    models: dict,
+    features_for_prediction,
+    point_predictions: dict,
+    calibration: dict | None,
+    target_cols: list = config.TARGET_COLUMNS,
+) -> tuple[dict, float]:
+    """
+    Intervalle für eine Feature-Zeile -> ({model_name: {'temp': [unten, oben], 'wspd': [...]}}, Millisekunden).
+
+    RF: Quantile über die Bäume (Abdeckung aus der Kalibrierung, sonst PREDICTION_INTERVAL_COVERAGE).
+    XGB: Punktvorhersage aus predict_values ± Conformal-Breite; ohne Kalibrierung kein XGB-Intervall.
+    Die Zeit ist der Mehraufwand gegenüber der Punktvorhersage.
+    """
+    start = time.perf_counter()
+    coverage = calibration["coverage"] if calibration else config.PREDICTION_INTERVAL_COVERAGE
+    intervals = {}
+    if "rf" in models and _flat_forest(models["rf"]) is not None:
+        low, high = forest_quantiles(models["rf"], np.asarray(features_for_prediction), [(1 - coverage) / 2, (1 + coverage) / 2])
+        intervals["rf"] = {
+            _TARGET_KEYS[col]: [float(low[0, i]), float(high[0, i])] for i, col in enumerate(target_cols) if col in _TARGET_KEYS
+        }
+    if "xgb" in models and calibration:
+        intervals["xgb"] = {}
+        for col, halfwidth in calibration["xgb_halfwidth"].items():
+            point = point_predictions.get("xgb", {}).get(_TARGET_KEYS.get(col))
+            if point is not None:
+                intervals["xgb"][_TARGET_KEYS[col]] = [point - halfwidth, point + halfwidth]
+    return intervals, (time.perf_counter() - start) * 1000
+
+
+def intervals_to_json(intervals: dict, coverage: float, latency_ms: float) -> dict:
+    """Format von prediction.json['intervals']: Schlüssel wie die Punktwerte (rf_temp_c, ...)."""
+    units = {'temp': 'temp_c', 'wspd': 'wspd_kmh'}
+    output = {"coverage": coverage, "latency_ms": round(latency_ms, 2)}
+    for model_name, values in intervals.items():
+        for key, bounds in values.items():
+            output[f"{model_name}_{units[key]}"] = bounds
+    return output
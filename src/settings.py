@@ -0,0 +1,108 @@
+import ast
+import json
+from dataclasses import dataclass, fields, replace
+
+import config
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Die Einstellungen aus config.py, die ein Lauf verändern kann (z.B. eine Variante in sweep.py).
+
+    Feldnamen entsprechen den Konstanten in config.py, klein geschrieben (IDW_POWER ist der Standard aus
+    interpolation.py). Überschreibungen verwenden die Namen aus config.py; bei RF_PARAMETER/XGB_PARAMETER werden
+    die angegebenen Schlüssel in die bestehenden Parameter übernommen.
+    """
+
+    search_radius_km: float
+    max_nearby_stations: int
+    idw_power: float
+    lag_days: int
+    compact_dtypes: bool
+    data_backend: str
+    test_period_days: int
+    rf_parameter: dict
+    xgb_parameter: dict
+
+    @classmethod
+    def from_config(cls) -> "Settings":
+        """Aktuelle Werte aus config.py (gelesen beim Aufruf, nicht beim Import)."""
+        from interpolation import DEFAULT_IDW_POWER
+
+        return cls(
+            search_radius_km=config.SEARCH_RADIUS_KM,
+            max_nearby_stations=config.MAX_NEARBY_STATIONS,
+            idw_power=DEFAULT_IDW_POWER,
+            lag_days=config.LAG_DAYS,
+            compact_dtypes=config.COMPACT_DTYPES,
+            data_backend=config.DATA_BACKEND,
+            test_period_days=config.TEST_PERIOD_DAYS,
+            rf_parameter=dict(config.RF_PARAMETER),
+            xgb_parameter=dict(config.XGB_PARAMETER),
+        )
+
+    def with_overrides(self, overrides: dict) -> "Settings":
+        """Neue Settings mit überschriebenen Werten, z.B. {'LAG_DAYS': 14, 'RF_PARAMETER': {'max_depth': 10}}."""
+        names = {f.name for f in fields(self)}
+        changes = {}
+        for key, value in overrides.items():
+            name = key.lower()
+            if name not in names:
+                raise ValueError(f"Unbekannte Einstellung '{key}' (erlaubt: {', '.join(sorted(n.upper() for n in names))}).")
+            if isinstance(getattr(self, name), dict):
+                if not isinstance(value, dict):
+                    raise ValueError(f"{key} erwartet ein Dictionary, erhalten: {value!r}")
+                value = {**changes.get(name, getattr(self, name)), **value}
+            changes[name] = value
+        return replace(self, **changes)
+
+    def changed_from(self, other: "Settings") -> dict:
+        """Abweichungen gegenüber `other` in der Schreibweise von config.py (Parameter nur die geänderten Schlüssel)."""
+        changed = {}
+        for f in fields(self):
+            value, other_value = getattr(self, f.name), getattr(other, f.name)
+            if isinstance(value, dict):
+                value = {k: v for k, v in value.items() if other_value.get(k) != v}
+                if value:
+                    changed[f.name.upper()] = value
+            elif value != other_value:
+                changed[f.name.upper()] = value
+        return changed
+
+
+def parse_value(text: str):
+    """Python-Literal (Zahl, Liste, Dictionary, True/None ...) oder, falls keines, der Text selbst."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_assignments(items: list[str]) -> dict:
+    """['LAG_DAYS=14', 'RF_PARAMETER={"max_depth": 10}'] -> {'LAG_DAYS': 14, 'RF_PARAMETER': {'max_depth': 10}}."""
+    overrides = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Erwartet NAME=WERT, erhalten: '{item}'")
+        overrides[key.strip()] = parse_value(value.strip())
+    return overrides
+
+
+def load_overrides(filepath: str) -> dict:
+    """Überschreibungen aus einer JSON-Datei ({"LAG_DAYS": 14, ...})."""
+    with open(filepath) as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise ValueError(f"{filepath}: erwartet ein JSON-Objekt mit Einstellungen.")
+    return overrides
+
+
+def load_variants(filepath: str) -> list[dict]:
+    """Liste von Überschreibungen aus einer JSON-Datei ([{"LAG_DAYS": 5}, {"LAG_DAYS": 14}]), z.B. für sweep.py."""
+    with open(filepath) as f:
+        variants = json.load(f)
+    if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+        raise ValueError(f"{filepath}: erwartet eine JSON-Liste von Objekten mit Einstellungen.")
+    return variants
@@ -0,0 +1,281 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+_META_FILE = "meta.json"
+_VALUES_FILE = "values.dat"
+_VALID_FILE = "valid.dat"
+GROW_DAYS = 366 # Dateien wachsen mindestens um so viele Tage, damit nicht jedes Anhängen neu mappt
+
+
+class StationCube:
+    """
+    Werte aller Stationen als dichtes Array (Tage, Stationen, Variablen) mit Gültigkeitsmaske gleicher Form.
+
+    Achsen: Tage ab start_date (täglich, lückenlos), Stationen mit Koordinaten (lat, lon), Variablen. Ungültige
+    Einträge haben den Wert 0 und valid=False, Summen über Stationen brauchen also keine NaN-Behandlung.
+
+    Mit `path` liegen Werte und Maske in Dateien (values.dat, valid.dat, meta.json) und werden per Memory-Map
+    gelesen: Tage können an Ort und Stelle angehängt werden, Zeit- und Stationsausschnitte (select) sind Views ohne
+    Kopie, und andere Prozesse öffnen dieselben Dateien schreibgeschützt (StationCube.open), ohne die Daten zu
+    kopieren; beim Pickeln (z.B. für einen ProcessPoolExecutor) wird nur der Pfad übertragen. Der Tag liegt auf
+    der ersten Achse, weil nur so angehängte Tage ans Dateiende geschrieben werden können.
+    """
+
+    def __init__(self, values, valid, start_date, station_ids, lat, lon, variables, n_days=None, path=None):
+        self._values = values # bei Dateien: die ganze Kapazität, gültig sind die ersten n_days Tage
+        self._valid = valid
+        self.start_date = pd.Timestamp(start_date)
+        self.station_ids = list(station_ids)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.variables = list(variables)
+        self.n_days = len(values) if n_days is None else n_days
+        self.path = path
+
+    # ----- Erzeugen und Öffnen -----
+
+    @classmethod
+    def create(
+        cls,
+        station_ids: list,
+        coordinates: dict[str, tuple[float, float]],
+        variables: list[str],
+        start_date,
+        n_days: int = 0,
+        path: str | None = None,
+        dtype=np.float64,
+    ) -> "StationCube":
+        """Leerer Würfel (alles ungültig); mit `path` als Dateien in diesem Verzeichnis, sonst im Speicher."""
+        lat = [coordinates[sid][0] for sid in station_ids]
+        lon = [coordinates[sid][1] for sid in station_ids]
+        shape = (n_days, len(station_ids), len(variables))
+        if path is None:
+            return cls(np.zeros(shape, dtype=dtype), np.zeros(shape, dtype=bool), start_date, station_ids, lat, lon, variables)
+
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "start_date": pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+            "n_days": n_days,
+            "capacity_days": n_days,
+            "station_ids": list(station_ids),
+            "lat": lat,
+            "lon": lon,
+            "variables": list(variables),
+            "dtype": np.dtype(dtype).name,
+        }
+        for filename, itemsize in ((_VALUES_FILE, np.dtype(dtype).itemsize), (_VALID_FILE, 1)):
+            with open(os.path.join(path, filename), "wb") as f:
+                f.truncate(n_days * len(station_ids) * len(variables) * itemsize)
+        _write_meta(path, meta)
+        return cls.open(path, mode="r+")
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r") -> "StationCube":
+        """Öffnet einen Würfel aus Dateien; mode='r' schreibgeschützt (z.B. in Worker-Prozessen), 'r+' zum Anhängen."""
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        values, valid = _map_arrays(path, meta, mode)
+        return cls(
+            values, valid, meta["start_date"], meta["station_ids"], meta["lat"], meta["lon"], meta["variables"],
+            n_days=meta["n_days"], path=path,
+        )
+
+    @classmethod
+    def from_station_data(
+        cls,
+        all_station_data: dict[str, pd.DataFrame],
+        station_metadata: dict[str, tuple[float, float]],
+        variables: list[str],
+        path: str | None = None,
+        dtype=np.float64,
+    ) -> "StationCube":
+        """
+        Würfel aus {Station: DataFrame} über den gemeinsamen Zeitraum (frühester Start bis spätestes Ende).
+
+        Stationen ohne Metadaten werden übersprungen; die Reihenfolge bleibt die von all_station_data.
+        """
+        station_ids = [sid for sid in all_station_data if sid in station_metadata]
+        if not station_ids:
+            raise ValueError("Keine Stationen mit Daten und Metadaten.")
+        min_date = min(all_station_data[sid].index.min() for sid in station_ids)
+        max_date = max(all_station_data[sid].index.max() for sid in station_ids)
+        n_days = (max_date.normalize() - min_date.normalize()).days + 1
+        cube = cls.create(station_ids, station_metadata, variables, min_date.normalize(), n_days, path, dtype)
+        for station_id in station_ids:
+            cube.write_station(station_id, all_station_data[station_id])
+        cube.flush()
+        return cube
+
+    def __reduce__(self):
+        # Dateibasierte Würfel werden im Zielprozess neu gemappt statt kopiert
+        if self.path is not None:
+            return (StationCube.open, (self.path, "r"))
+        return (StationCube, (self._values[:self.n_days], self._valid[:self.n_days], self.start_date,
+                              self.station_ids, self.lat, self.lon, self.variables))
+
+    # ----- Achsen und Daten -----
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:self.n_days]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self._valid[:self.n_days]
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.date_range(self.start_date, periods=self.n_days, freq="D", name="time")
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return (self.n_days, len(self.station_ids), len(self.variables))
+
+    def coordinates(self) -> dict[str, tuple[float, float]]:
+        return {sid: (float(lat), float(lon)) for sid, lat, lon in zip(self.station_ids, self.lat, self.lon)}
+
+    def day_position(self, date) -> int:
+        return (pd.Timestamp(date).normalize() - self.start_date).days
+
+    def select(self, start=None, end=None, stations: list | None = None) -> "StationCube":
+        """
+        Ausschnitt von start bis end (inklusive) und optional nur `stations`.
+
+        Zeitausschnitte sind immer Views; Stationen auch, solange sie im Würfel direkt aufeinander folgen
+        (sonst muss NumPy kopieren).
+        """
+        first = 0 if start is None else max(0, self.day_position(start))
+        last = self.n_days if end is None else min(self.n_days, self.day_position(end) + 1)
+        station_index = slice(None)
+        station_ids = self.station_ids
+        if stations is not None:
+            positions = [self.station_ids.index(sid) for sid in stations]
+            contiguous = positions == list(range(positions[0], positions[0] + len(positions))) if positions else True
+            station_index = slice(positions[0], positions[-1] + 1) if positions and contiguous else positions
+            station_ids = list(stations)
+        return StationCube(
+            self._values[first:last, station_index],
+            self._valid[first:last, station_index],
+            self.start_date + pd.Timedelta(days=first),
+            station_ids,
+            self.lat[station_index],
+            self.lon[station_index],
+            self.variables,
+        )
+
+    def station_frame(self, station_id: str) -> pd.DataFrame:
+        """Daten einer Station als DataFrame (ungültige Werte als NaN, daher eine Kopie)."""
+        s = self.station_ids.index(station_id)
+        values = np.where(self.valid[:, s, :], self.values[:, s, :], np.nan)
+        return pd.DataFrame(values, index=self.dates, columns=self.variables)
+
+    def to_station_data(self) -> dict[str, pd.DataFrame]:
+        """Zurück in das Format von get_data_for_stations (ohne Tage, an denen eine Station keinen Wert hat)."""
+        station_data = {}
+        for sid in self.station_ids:
+            frame = self.station_frame(sid).dropna(how="all")
+            if not frame.empty:
+                station_data[sid] = frame
+        return station_data
+
+    # ----- Schreiben -----
+
+    def write_station(self, station_id: str, station_df: pd.DataFrame) -> int:
+        """
+        Trägt die Werte einer Station ein (nach Datum ausgerichtet; Tage außerhalb des Würfels werden ignoriert,
+        vorher ggf. extend_to aufrufen). NaN bleibt ungültig. Returns: Anzahl geschriebener Werte.
+        """
+        s = self.station_ids.index(station_id)
+        station_df = station_df[~station_df.index.duplicated(keep="first")]
+        positions = (station_df.index.normalize() - self.start_date).days.to_numpy()
+        inside = (positions >= 0) & (positions < self.n_days)
+        written = 0
+        for v, var in enumerate(self.variables):
+            if var not in station_df.columns:
+                continue
+            column = station_df[var].to_numpy(dtype=np.float64)
+            ok = inside & ~np.isnan(column)
+            self._values[positions[ok], s, v] = column[ok]
+            self._valid[positions[ok], s, v] = True
+            written += int(ok.sum())
+        return written
+
+    def extend_to(self, date):
+        """Verlängert die Tagesachse bis einschließlich `date` (neue Tage ungültig)."""
+        needed = self.day_position(date) + 1
+        if needed > self.n_days:
+            self._grow(needed)
+            self.n_days = needed
+
+    def append_days(self, values: np.ndarray, valid: np.ndarray | None = None):
+        """
+        Hängt Tage (Form: neue Tage, Stationen, Variablen) ans Ende an; ohne `valid` gilt NaN als ungültig.
+
+        Bei Dateien wird an Ort und Stelle geschrieben (die Dateien wachsen um mindestens GROW_DAYS Tage),
+        im Speicher muss das Array kopiert werden.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[1:] != self.shape[1:]:
+            raise ValueError(f"Erwartet Form (Tage, {self.shape[1]}, {self.shape[2]}), erhalten: {values.shape}")
+        valid = ~np.isnan(values) if valid is None else np.asarray(valid, dtype=bool)
+        first = self.n_days
+        self._grow(first + len(values))
+        self._values[first:first + len(values)] = np.where(valid, values, 0.0)
+        self._valid[first:first + len(values)] = valid
+        self.n_days = first + len(values)
+
+    def flush(self):
+        """Schreibt Daten und Tagesanzahl auf die Platte (erst dann sehen neu geöffnete Leser die neuen Tage)."""
+        if self.path is None:
+            return
+        if isinstance(self._values, np.memmap): # bei Kapazität 0 noch kein Mapping
+            self._values.flush()
+            self._valid.flush()
+        meta = _read_meta(self.path)
+        meta["n_days"] = self.n_days
+        _write_meta(self.path, meta)
+
+    def _grow(self, n_days: int):
+        capacity = len(self._values)
+        if n_days <= capacity:
+            return
+        if self.path is None:
+            extra = n_days - capacity
+            self._values = np.concatenate([self._values, np.zeros((extra,) + self.shape[1:], self._values.dtype)])
+            self._valid = np.concatenate([self._valid, np.zeros((extra,) + self.shape[1:], bool)])
+            return
+
+        # Dateien verlängern (mit Nullen = ungültig) und neu mappen; alte Views bleiben gültig
+        self.flush()
+        meta = _read_meta(self.path)
+        meta["capacity_days"] = max(n_days, capacity + GROW_DAYS)
+        day_size = len(self.station_ids) * len(self.variables)
+        for filename, itemsize in ((_VALUES_FILE, self._values.dtype.itemsize), (_VALID_FILE, 1)):
+            with open(os.path.join(self.path, filename), "r+b") as f:
+                f.truncate(meta["capacity_days"] * day_size * itemsize)
+        _write_meta(self.path, meta)
+        self._values, self._valid = _map_arrays(self.path, meta, "r+")
+
+
+def _read_meta(path: str) -> dict:
+    with open(os.path.join(path, _META_FILE)) as f:
+        return json.load(f)
+
+
+def _write_meta(path: str, meta: dict):
+    filepath = os.path.join(path, _META_FILE)
+    with open(f"{filepath}.tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f"{filepath}.tmp", filepath)
+
+
+def _map_arrays(path: str, meta: dict, mode: str) -> tuple[np.ndarray, np.ndarray]:
+    shape = (meta.get("capacity_days", meta["n_days"]), len(meta["station_ids"]), len(meta["variables"]))
+    if shape[0] == 0: # eine leere Datei lässt sich nicht mappen
+        return np.zeros(shape, dtype=meta["dtype"]), np.zeros(shape, dtype=bool)
+    values = np.memmap(os.path.join(path, _VALUES_FILE), dtype=meta["dtype"], mode=mode, shape=shape)
+    valid = np.memmap(os.path.join(path, _VALID_FILE), dtype=np.bool_, mode=mode, shape=shape)
+    return values, valid
@@ -0,0 +1,257 @@
+import time
+import argparse
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from geo_utils import haversine_distance
+from interpolation import DEFAULT_IDW_POWER, idw_result
+
+
+class IdwAccumulator:
+    """
+    IDW-Summen für feste Zielorte, in die Stationen einzeln eingerechnet werden, sobald ihre Daten vorliegen.
+
+    Je Zielort gibt es gewichtete Summe, Gewichtssumme und Anzahl Stationen mit Wert (je Tage x Variablen) sowie
+    den Wert einer Station direkt am Zielort (< 1 m). Der Speicher hängt nur von Zeitraum, Variablen und
+    Zielorten ab, nicht von der Zahl der Stationen. Das Ergebnis entspricht idw_interpolate_many über dieselben
+    Stationen (bis auf die Rundung der Summen, deren Reihenfolge der Ankunft folgt).
+    """
+
+    def __init__(
+        self,
+        targets: dict[str, tuple[float, float]],
+        variables: list[str],
+        start_date,
+        end_date,
+        power: int = DEFAULT_IDW_POWER,
+        station_ids: list | None = None,
+    ):
+        self.targets = targets
+        self.variables = list(variables)
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self.n_days = (pd.Timestamp(end_date).normalize() - self.start_date).days + 1
+        self.power = power
+        # Reihenfolge wie in all_station_data: bei mehreren Stationen am Zielort gewinnt die erste
+        self._rank = {sid: i for i, sid in enumerate(station_ids or [])}
+        shape = (self.n_days, len(self.variables))
+        self._sums = {
+            name: {
+                "weighted_sum": np.zeros(shape),
+                "sum_of_weights": np.zeros(shape),
+                "stations_with_value": np.zeros(shape, dtype=np.int32),
+                "exact_value": np.zeros(shape),
+                "exact_rank": np.full(shape, np.iinfo(np.int64).max),
+            }
+            for name in targets
+        }
+        self.first_position, self.last_position = None, None # Zeitraum aller eingerechneten Stationen
+        self.stations = []
+
+    def add(self, station_id: str, lat: float, lon: float, station_df: pd.DataFrame) -> int:
+        """Rechnet eine Station ein (Tage außerhalb des Zeitraums werden ignoriert). Returns: Anzahl Werte."""
+        station_df = station_df[~station_df.index.duplicated(keep="first")]
+        positions = (station_df.index.normalize() - self.start_date).days.to_numpy()
+        inside = (positions >= 0) & (positions < self.n_days)
+        if not inside.any():
+            return 0
+        positions = positions[inside]
+        values = station_df.reindex(columns=self.variables).to_numpy(dtype=np.float64)[inside]
+        has_value = ~np.isnan(values)
+        values = np.where(has_value, values, 0.0)
+        rank = self._rank.setdefault(station_id, len(self._rank))
+
+        for name, (target_lat, target_lon) in self.targets.items():
+            sums = self._sums[name]
+            distance = float(haversine_distance(lat, lon, target_lat, target_lon))
+            sums["stations_with_value"][positions] += has_value
+            if distance < 0.001:
+                take = has_value & (rank < sums["exact_rank"][positions])
+                sums["exact_value"][positions] = np.where(take, values, sums["exact_value"][positions])
+                sums["exact_rank"][positions] = np.where(take, rank, sums["exact_rank"][positions])
+            else:
+                weight = 1.0 / max(distance, 0.001) ** self.power
+                sums["weighted_sum"][positions] += values * weight
+                sums["sum_of_weights"][positions] += has_value * weight
+
+        # wie StationCube.from_station_data: Zeitraum über alle Zeilen der Stationen, auch ohne Werte
+        first, last = int(positions.min()), int(positions.max())
+        self.first_position = first if self.first_position is None else min(self.first_position, first)
+        self.last_position = last if self.last_position is None else max(self.last_position, last)
+        self.stations.append(station_id)
+        return int(has_value.sum())
+
+    def result(self, console: Console, compact: bool = config.COMPACT_DTYPES) -> dict[str, pd.DataFrame] | None:
+        """{Zielort: DataFrame} wie idw_interpolate_many, oder None, wenn keine Station eingerechnet wurde."""
+        if not self.stations:
+            console.print("[red]FEHLER: Keine Stationsdaten für Interpolation vorhanden.[/red]")
+            return None
+        days = slice(self.first_position, self.last_position + 1)
+        reference_index = pd.date_range(
+            self.start_date + pd.Timedelta(days=self.first_position), periods=days.stop - days.start,
+            freq="D", name="time",
+        )
+        console.print(f"   Interpoliere für Zeitraum: {reference_index[0].date()} bis {reference_index[-1].date()}")
+        results = {}
+        for name, sums in self._sums.items():
+            results[name] = idw_result(
+                sums["weighted_sum"][days], sums["sum_of_weights"][days], sums["stations_with_value"][days],
+                sums["exact_value"][days], sums["exact_rank"][days] < np.iinfo(np.int64).max,
+                reference_index, self.variables, name, console, compact,
+            )
+        console.print("[green]   ✔️ IDW-Interpolation abgeschlossen.[/green]")
+        return results
+
+
+def iter_downloads(station_ids: list, fetch, workers: int = config.STREAMING_DOWNLOAD_WORKERS):
+    """
+    Lädt Stationen in `workers` Threads und liefert (Station, DataFrame) in der Reihenfolge der Fertigstellung.
+
+    Es laufen höchstens 2 * workers Abrufe gleichzeitig, damit fertige Frames sich nicht stapeln, wenn der
+    Verbraucher langsamer ist. `fetch(station_id)` liefert einen DataFrame oder None (Station übersprungen).
+    """
+    pending_ids = list(station_ids)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as executor:
+        running = {}
+        try:
+            while pending_ids or running:
+                while pending_ids and len(running) < 2 * workers:
+                    station_id = pending_ids.pop(0)
+                    running[executor.submit(fetch, station_id)] = station_id
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    station_id = running.pop(future)
+                    station_df = future.result()
+                    if station_df is not None:
+                        yield station_id, station_df
+        finally:
+            for future in running:
+                future.cancel()
+
+
+def stream_interpolate(
+    station_frames,
+    station_metadata: dict[str, tuple[float, float]],
+    targets: dict[str, tuple[float, float]],
+    variables: list[str],
+    start_date,
+    end_date,
+    console: Console,
+    power: int = DEFAULT_IDW_POWER,
+    compact: bool = config.COMPACT_DTYPES,
+) -> dict[str, pd.DataFrame] | None:
+    """
+    IDW für mehrere Zielorte aus einem Strom von (Station, DataFrame), z.B. iter_downloads.
+
+    Jede Station wird eingerechnet und verworfen, sobald sie ankommt; Stationen ohne Metadaten werden
+    übersprungen. Reihenfolge bei Stationen am Zielort: die von station_metadata.
+    """
+    console.print(f"\n[cyan]Starte IDW-Interpolation (Streaming) für {len(targets)} Zielort(e), {variables} (p={power})...[/cyan]")
+    accumulator = IdwAccumulator(targets, variables, start_date, end_date, power, list(station_metadata))
+    for station_id, station_df in station_frames:
+        if station_id not in station_metadata:
+            console.print(f"     [yellow]Keine Metadaten für Station {station_id}, überspringe.[/yellow]")
+            continue
+        lat, lon = station_metadata[station_id]
+        accumulator.add(station_id, lat, lon, station_df)
+    console.print(f"   {len(accumulator.stations)} von {len(station_metadata)} Stationen eingerechnet: {accumulator.stations}")
+    return accumulator.result(console, compact)
+
+
+def download_and_interpolate(
+    station_metadata: dict[str, tuple[float, float]],
+    targets: dict[str, tuple[float, float]],
+    console: Console,
+    power: int = DEFAULT_IDW_POWER,
+    workers: int = config.STREAMING_DOWNLOAD_WORKERS,
+) -> dict[str, pd.DataFrame] | None:
+    """Lädt die Stationen (START_DATE bis END_DATE) und interpoliert dabei, ohne alle Frames zu sammeln."""
+    from data_collection import fetch_station_data
+
+    console.print(
+        f"\n[cyan]Lade Daten für {len(station_metadata)} Station(en) vom {config.START_DATE.strftime('%Y-%m-%d')} "
+        f"bis {config.END_DATE.strftime('%Y-%m-%d')} ({workers} Downloads gleichzeitig)...[/cyan]"
+    )
+
+    def fetch(station_id):
+        return fetch_station_data(station_id, config.START_DATE, config.END_DATE,
+                                  config.REQUIRED_COLUMNS, config.ESSENTIAL_COLS, console)
+
+    return stream_interpolate(
+        iter_downloads(list(station_metadata), fetch, workers), station_metadata, targets,
+        config.REQUIRED_COLUMNS, config.START_DATE, config.END_DATE, console, power,
+    )
+
+
+# ----- Benchmark -----
+
+def measure(mode: str, n_stations: int, years: int, latency: float, workers: int, trace: bool = False) -> dict:
+    """Lädt synthetische Stationen (mit `latency` s pro Abruf) und interpoliert gesammelt oder im Streaming."""
+    from compact_benchmark import synthetic_station
+    from interpolation import idw_interpolate
+
+    console = Console(quiet=True)
+    station_metadata = {
+        f"S{s}": synthetic_station(s, 1, np.random.default_rng(0))[1] for s in range(n_stations)
+    }
+
+    def fetch(station_id):
+        time.sleep(latency)
+        s = int(station_id[1:])
+        return synthetic_station(s, years, np.random.default_rng([config.RANDOM_STATE, s]))[0]
+
+    start_date = pd.Timestamp("1900-01-01")
+    end_date = start_date + pd.Timedelta(days=years * 365 - 1)
+    target = {"target": (config.TARGET_LAT, config.TARGET_LON)}
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    if mode == "batch":
+        all_station_data = dict(iter_downloads(list(station_metadata), fetch, workers))
+        result = idw_interpolate(all_station_data, station_metadata, *target["target"], config.REQUIRED_COLUMNS, console)
+    else:
+        result = stream_interpolate(iter_downloads(list(station_metadata), fetch, workers), station_metadata,
+                                    target, config.REQUIRED_COLUMNS, start_date, end_date, console)["target"]
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    return {"mode": mode, "seconds": seconds, "peak_mb": peak / 2**20, "result": result}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vergleicht IDW nach dem Laden aller Stationen mit Streaming (Einrechnen während des Downloads)."
+    )
+    parser.add_argument("--stations", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulierte Dauer eines Abrufs (s)")
+    parser.add_argument("--workers", type=int, default=config.STREAMING_DOWNLOAD_WORKERS)
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table(title=f"IDW: gesammelt vs. Streaming ({args.years} Jahre, {args.latency * 1000:.0f} ms pro Abruf, "
+                        f"{args.workers} Downloads gleichzeitig)")
+    for column in ["Stationen", "Modus", "Zeit (s)", "Peak (MB)", "max. Abweichung"]:
+        table.add_column(column, justify="right")
+    for n_stations in args.stations:
+        console.print(f"   Messe {n_stations} Stationen...")
+        runs = {}
+        for mode in ("batch", "streaming"):
+            timing = measure(mode, n_stations, args.years, args.latency, args.workers)
+            memory = measure(mode, n_stations, args.years, args.latency, args.workers, trace=True)
+            runs[mode] = {**memory, "seconds": timing["seconds"]}
+        difference = float(np.nanmax(np.abs(runs["streaming"]["result"].to_numpy() - runs["batch"]["result"].to_numpy())))
+        for mode, run in runs.items():
+            table.add_row(str(n_stations), mode, f"{run['seconds']:.2f}", f"{run['peak_mb']:.1f}",
+                          f"{difference:.1e}" if mode == "streaming" else "")
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+import contextlib
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+import config
+from settings import Settings, parse_assignments, parse_value, load_overrides, load_variants
+
+
+def expand_grid(grid: dict) -> list[dict]:
+    """{'LAG_DAYS': [5, 14], 'IDW_POWER': [1, 2]} -> vier Überschreibungen (kartesisches Produkt)."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+class SharedStages:
+    """
+    Stufenergebnisse, die sich mehrere Varianten teilen, werden nur einmal berechnet.
+
+    Der Schlüssel enthält alle Einstellungen, von denen das Ergebnis abhängt. Braucht eine Variante ein Ergebnis,
+    das gerade eine andere berechnet, wartet sie darauf, statt es ein zweites Mal zu rechnen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {} # (Stufe, Schlüssel) -> Future
+        self.seconds = {} # (Stufe, Schlüssel) -> Rechenzeit
+
+    def get(self, stage: str, key, compute) -> tuple:
+        """-> (Ergebnis, True wenn der Aufrufer es selbst berechnet hat)."""
+        with self._lock:
+            future = self._results.get((stage, key))
+            owner = future is None
+            if owner:
+                future = self._results[(stage, key)] = Future()
+        if owner:
+            start = time.perf_counter()
+            try:
+                future.set_result(compute())
+            except Exception as e:
+                future.set_exception(e)
+            self.seconds[(stage, key)] = time.perf_counter() - start
+        return future.result(), owner
+
+
+def _variant_climatology(data: pd.DataFrame, settings: Settings) -> dict:
+    """Klimatologie wie die Pipeline-Stufe: aus dem Trainingszeitraum der Variante, gerundet wie climatology.json."""
+    from climatology import training_history, compute_climatology, climatology_to_json, climatology_from_json
+    return climatology_from_json(climatology_to_json(
+        compute_climatology(training_history(data, settings.test_period_days), config.REQUIRED_COLUMNS)
+    ))
+
+
+def _build_features(interpolated: pd.DataFrame, settings: Settings, console: Console) -> pd.DataFrame:
+    """
+    Wie dataset.build_featured_data, aber mit den Einstellungen der Variante statt config.py; die Anomalie-Features
+    kommen wie in der Pipeline aus einer Klimatologie des Trainingszeitraums.
+    """
+    if settings.data_backend == "polars":
+        from polars_backend import build_featured_data_polars
+        from climatology import add_anomaly_features
+        featured = build_featured_data_polars(
+            interpolated, console, lag_days=settings.lag_days, compact=settings.compact_dtypes
+        )
+        if featured is not None:
+            featured = add_anomaly_features(featured, _variant_climatology(interpolated, settings))
+    else:
+        from data_preprocessing import preprocess_data
+        from feature_engineering import engineer_features
+        processed = preprocess_data(interpolated, console, compact=settings.compact_dtypes)
+        featured = engineer_features(
+            processed,
+            target_cols=config.TARGET_COLUMNS,
+            target_base_cols=config.ORIGINAL_TARGET_BASE_COLUMNS,
+            lag_days=settings.lag_days,
+            compact=settings.compact_dtypes,
+            climatology=_variant_climatology(processed, settings) if processed is not None else None,
+        )
+    if featured is None or featured.empty:
+        raise RuntimeError("Nach dem Feature Engineering sind keine Daten mehr verfügbar.")
+    return featured
+
+
+def _train_and_score(featured: pd.DataFrame, settings: Settings) -> dict:
+    """Trainiert RF und XGB mit den Parametern der Variante -> Metriken je Modell und Zielvariable, Trainingszeit."""
+    from data_splitting import get_feature_target_columns, split_frames
+    from model_training import build_models
+
+    features_cols, target_cols = get_feature_target_columns(featured)
+    X_train, X_test, y_train, y_test = split_frames(
+        featured, features_cols, target_cols, len(featured) - settings.test_period_days, settings.compact_dtypes
+    )
+    result = {"metrics": {}, "train_seconds": 0.0}
+    for model_name, model in build_models(settings.rf_parameter, settings.xgb_parameter).items():
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        result["train_seconds"] += time.perf_counter() - start
+        errors = np.asarray(model.predict(X_test)).reshape(len(X_test), -1) - y_test.to_numpy()
+        for i, target in enumerate(target_cols):
+            result["metrics"][(model_name, target)] = {
+                "MAE": float(np.abs(errors[:, i]).mean()),
+                "RMSE": float(np.sqrt((errors[:, i] ** 2).mean())),
+            }
+    return result
+
+
+def run_variant(settings: Settings, shared: SharedStages, console: Console) -> dict:
+    """
+    Datenpfad und Training für eine Variante; jede Stufe kommt aus `shared`, wenn eine andere Variante sie schon
+    mit denselben Einstellungen berechnet hat.
+
+    Rohdaten werden je Station geteilt (ein größerer Suchradius lädt nur die zusätzlichen Stationen), die
+    Interpolation je Stationsmenge und IDW-Potenz, die Features zusätzlich je Lag-Tage und Backend.
+    """
+    from data_collection import find_stations, get_data_for_stations
+    from interpolation import get_station_data, idw_interpolate
+
+    used = [] # (Stufe, Schlüssel, selbst berechnet?)
+
+    def stage(name: str, key, compute):
+        value, owner = shared.get(name, key, compute)
+        used.append((name, key, owner))
+        return value
+
+    location = (config.TARGET_LAT, config.TARGET_LON)
+    station_ids = stage(
+        "stations", (location, settings.search_radius_km, settings.max_nearby_stations),
+        lambda: find_stations(console, *location, radius_km=settings.search_radius_km,
+                              max_stations=settings.max_nearby_stations),
+    )
+    if not station_ids:
+        raise RuntimeError("Keine Stationen gefunden.")
+
+    station_data = {}
+    for station_id in station_ids:
+        station_df = stage(
+            "download", station_id,
+            lambda station_id=station_id: get_data_for_stations(
+                [station_id], config.START_DATE, config.END_DATE, config.REQUIRED_COLUMNS, config.ESSENTIAL_COLS, console
+            ).get(station_id),
+        )
+        if station_df is not None:
+            station_data[station_id] = station_df
+    if not station_data:
+        raise RuntimeError("Keine Daten für die gefundenen Stationen geladen.")
+
+    ids_key = tuple(sorted(station_data))
+    station_metadata = stage("metadata", ids_key, lambda: get_station_data(list(ids_key), console))
+    interpolation_key = (location, ids_key, settings.idw_power, settings.compact_dtypes)
+    interpolated = stage(
+        "interpolation", interpolation_key,
+        lambda: idw_interpolate(station_data, station_metadata, *location, config.REQUIRED_COLUMNS, console,
+                                power=settings.idw_power, compact=settings.compact_dtypes),
+    )
+    if interpolated is None:
+        raise RuntimeError("IDW-Interpolation fehlgeschlagen.")
+
+    # test_period_days: die Klimatologie für die Anomalie-Features endet vor dem Testzeitraum
+    features_key = interpolation_key + (settings.data_backend, settings.lag_days, settings.test_period_days)
+    featured = stage("features", features_key, lambda: _build_features(interpolated, settings, console))
+    training_key = features_key + (
+        settings.test_period_days,
+        json.dumps(settings.rf_parameter, sort_keys=True, default=str),
+        json.dumps(settings.xgb_parameter, sort_keys=True, default=str),
+    )
+    trained = stage("training", training_key, lambda: _train_and_score(featured, settings))
+
+    return {
+        "metrics": trained["metrics"],
+        "train_seconds": trained["train_seconds"],
+        "n_stations": len(station_data),
+        "compute_seconds": sum(shared.seconds[(name, key)] for name, key, owner in used if owner),
+        "standalone_seconds": sum(shared.seconds[(name, key)] for name, key, _ in used),
+        "reused": sorted({name for name, _, owner in used if not owner}),
+    }
+
+
+def _variant_label(settings: Settings, base: Settings) -> str:
+    changed = settings.changed_from(base)
+    return ", ".join(f"{key}={value}" for key, value in changed.items()) or "Basis"
+
+
+def run_sweep(
+    variants: list[dict],
+    base: Settings | None = None,
+    n_workers: int = config.SWEEP_WORKERS,
+    console: Console | None = None,
+) -> pd.DataFrame:
+    """
+    Führt alle Varianten (Überschreibungen relativ zu `base`) in einem Prozess aus, n_workers gleichzeitig.
+
+    Die Modelle verwenden die Parameter der Variante; getunte Parameter (TUNED_PARAMS_PATH) werden bewusst nicht
+    angewendet, damit RF_PARAMETER/XGB_PARAMETER-Varianten vergleichbar bleiben.
+
+    Returns:
+        Eine Zeile je Variante mit MAE/RMSE je Modell und Zielvariable sowie Trainings- und Rechenzeit.
+    """
+    console = console or Console()
+    base = base or Settings.from_config()
+    all_settings = [base.with_overrides(overrides) for overrides in variants] # ungültige Namen vor dem Start melden
+    shared = SharedStages()
+    quiet = Console(quiet=True)
+    # Ausgaben der Stufen (print) unterdrücken; der Fortschritt geht an die ursprüngliche Ausgabe
+    progress = Console(file=console.file, width=console.width)
+
+    console.print(f"   {len(all_settings)} Varianten, {n_workers} gleichzeitig")
+    rows = [None] * len(all_settings)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(run_variant, settings, shared, quiet): i for i, settings in enumerate(all_settings)}
+        for future in as_completed(futures):
+            i = futures[future]
+            label = _variant_label(all_settings[i], base)
+            row = {"variant": label}
+            try:
+                result = future.result()
+            except Exception as e:
+                progress.print(f"[red]   ✘ {label}: {e}[/red]")
+                rows[i] = {**row, "error": str(e)}
+                continue
+            for (model_name, target), values in result.pop("metrics").items():
+                for metric, value in values.items():
+                    row[f"{model_name}_{target}_{metric}"] = value
+            result["reused"] = ", ".join(result["reused"])
+            rows[i] = {**row, **result}
+            progress.print(f"[green]   ✔️ {label}[/green] ({result['compute_seconds']:.1f} s)")
+    wall_seconds = time.perf_counter() - start
+
+    results = pd.DataFrame(rows)
+    results.attrs["wall_seconds"] = wall_seconds
+    results.attrs["stage_runs"] = len(shared.seconds)
+    return results
+
+
+def print_sweep_results(results: pd.DataFrame, console: Console):
+    rmse_cols = [col for col in results.columns if col.endswith("_RMSE")]
+    table = Table(title="Konfigurations-Sweep (RMSE auf dem Testzeitraum)")
+    table.add_column("Variante")
+    for col in rmse_cols:
+        table.add_column(col.removesuffix("_RMSE").replace("_target", ""), justify="right")
+    for column in ["Training (s)", "Rechenzeit (s)", "Wiederverwendet"]:
+        table.add_column(column, justify="left" if column == "Wiederverwendet" else "right")
+
+    best = {col: results[col].min() for col in rmse_cols}
+    for _, row in results.iterrows():
+        if isinstance(row.get("error"), str):
+            table.add_row(row["variant"], *(["-"] * len(rmse_cols)), "-", "-", f"[red]{row['error']}[/red]")
+            continue
+        cells = [f"[bold green]{row[col]:.3f}[/bold green]" if row[col] == best[col] else f"{row[col]:.3f}" for col in rmse_cols]
+        table.add_row(row["variant"], *cells, f"{row['train_seconds']:.1f}", f"{row['compute_seconds']:.1f}", row["reused"])
+    console.print(table)
+
+    if "standalone_seconds" in results:
+        console.print(
+            f"   Laufzeit {results.attrs['wall_seconds']:.1f} s, {results.attrs['stage_runs']} Stufen berechnet; "
+            f"einzeln nacheinander wären es {results['standalone_seconds'].sum():.1f} s Rechenzeit."
+        )
+
+
+def _parse_grid(items: list[str]) -> dict:
+    """['LAG_DAYS=5,14', 'DATA_BACKEND=pandas,polars'] -> {'LAG_DAYS': [5, 14], 'DATA_BACKEND': ['pandas', 'polars']}."""
+    grid = {}
+    for key, text in (item.split("=", 1) for item in items):
+        values = parse_value(f"[{text}]")
+        if isinstance(values, str): # Texte ohne Anführungszeichen
+            values = [parse_value(value.strip()) for value in text.split(",")]
+        grid[key.strip()] = values
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mehrere Konfigurationen in einem Prozess vergleichen; gemeinsame Stufen werden nur einmal berechnet."
+    )
+    parser.add_argument("--config", help="JSON-Datei mit Überschreibungen für alle Varianten")
+    parser.add_argument("--set", nargs="+", default=[], metavar="NAME=WERT", help="Überschreibung für alle Varianten")
+    parser.add_argument("--grid", nargs="+", default=[], metavar="NAME=W1,W2",
+                        help="Werte, deren Kombinationen verglichen werden (Standard: SWEEP_GRID)")
+    parser.add_argument("--variants", help="JSON-Datei mit einer Liste von Überschreibungen (eine je Variante)")
+    parser.add_argument("--workers", type=int, default=config.SWEEP_WORKERS)
+    parser.add_argument("--output-dir", default=config.SWEEP_RESULTS_DIR)
+    args = parser.parse_args()
+
+    console = Console()
+    console.rule("[bold purple4]Konfigurations-Sweep[/bold purple4]")
+    try:
+        overrides = load_overrides(args.config) if args.config else {}
+        overrides.update(parse_assignments(args.set))
+        base = Settings.from_config().with_overrides(overrides)
+        variants = load_variants(args.variants) if args.variants else []
+        if args.grid or not variants:
+            variants += expand_grid(_parse_grid(args.grid) if args.grid else config.SWEEP_GRID)
+        results = run_sweep(variants, base, args.workers, console)
+    except ValueError as e:
+        console.print(f"[red]FEHLER: {e}[/red]")
+        sys.exit(1)
+
+    print_sweep_results(results, console)
+    os.makedirs(args.output_dir, exist_ok=True)
+    filepath = os.path.join(args.output_dir, f"sweep_{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv")
+    results.to_csv(filepath, index=False)
+    console.print(f"[green]   ✔️ Ergebnisse gespeichert in {filepath}[/green]")
+    if "error" in results and results["error"].notna().any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import sys
+import math
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+import xgboost as xgb
+
+import config
+from data_splitting import get_feature_target_columns
+from model_manager import save_tuned_parameters
+from model_training import xgb_train_params
+
+# Wird pro Worker-Prozess im Initializer gefüllt. Die XGBoost-Matrizen werden je Fold
+# einmal gebaut und dann von allen Trials in diesem Prozess wiederverwendet.
+_WORKER_STATE = {}
+
+
+def make_cv_folds(n_samples: int, n_folds: int, valid_days: int) -> list[tuple[int, int, int]]:
+    """Zeitliche CV-Folds (expanding window) als (train_end, valid_start, valid_end)."""
+    splitter = TimeSeriesSplit(n_splits=n_folds, test_size=valid_days)
+    folds = []
+    for train_idx, valid_idx in splitter.split(np.arange(n_samples)):
+        folds.append((int(train_idx[-1]) + 1, int(valid_idx[0]), int(valid_idx[-1]) + 1))
+    return folds
+
+
+def sample_candidates(search_space: dict, n_candidates: int, random_state: int) -> list[dict]:
+    """Zieht bis zu n_candidates verschiedene Kombinationen aus dem Suchraum."""
+    rng = np.random.default_rng(random_state)
+    keys = list(search_space)
+    n_total = math.prod(len(search_space[k]) for k in keys)
+    seen = set()
+    candidates = []
+    while len(candidates) < min(n_candidates, n_total):
+        choice = tuple(int(rng.integers(len(search_space[k]))) for k in keys)
+        if choice in seen:
+            continue
+        seen.add(choice)
+        candidates.append({k: search_space[k][i] for k, i in zip(keys, choice)})
+    return candidates
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: list, rf_base: dict, xgb_base: dict):
+    _WORKER_STATE.update(X=X, y=y, folds=folds, rf_base=rf_base, xgb_base=xgb_base, dmatrix={})
+
+
+def _get_dmatrix(fold_id: int):
+    """Baut Trainings-/Validierungsmatrix eines Folds nur beim ersten Zugriff im Prozess."""
+    cache = _WORKER_STATE["dmatrix"]
+    if fold_id not in cache:
+        X, y = _WORKER_STATE["X"], _WORKER_STATE["y"]
+        train_end, valid_start, valid_end = _WORKER_STATE["folds"][fold_id]
+        dtrain = xgb.QuantileDMatrix(X[:train_end], label=y[:train_end])
+        dvalid = xgb.DMatrix(X[valid_start:valid_end])
+        cache[fold_id] = (dtrain, dvalid)
+    return cache[fold_id]
+
+
+def _score(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    """Skalenfreier Score: mittlerer RMSE über alle Targets, normiert mit der Streuung des Targets."""
+    if y_pred.ndim == 1:
+        y_pred = y_pred.reshape(-1, 1)
+    rmse = np.sqrt(((y_pred - y_true) ** 2).mean(axis=0))
+    scale = y_true.std(axis=0)
+    scale[scale == 0] = 1.0
+    return float((rmse / scale).mean())
+
+
+def _run_trial(task: tuple) -> tuple:
+    """Ein Trial = ein Kandidat mit gegebener Ressource (Anzahl Bäume) auf einem Fold."""
+    model_name, candidate_id, params, resource, fold_id = task
+    X, y = _WORKER_STATE["X"], _WORKER_STATE["y"]
+    train_end, valid_start, valid_end = _WORKER_STATE["folds"][fold_id]
+    y_valid = y[valid_start:valid_end]
+
+    t0 = time.perf_counter()
+    if model_name == "rf":
+        model = RandomForestRegressor(**{**_WORKER_STATE["rf_base"], **params, "n_estimators": resource})
+        model.fit(X[:train_end], y[:train_end])
+        y_pred = model.predict(X[valid_start:valid_end])
+    else:
+        dtrain, dvalid = _get_dmatrix(fold_id)
+        booster = xgb.train(
+            xgb_train_params({**_WORKER_STATE["xgb_base"], **params}), dtrain, num_boost_round=resource
+        )
+        y_pred = booster.predict(dvalid)
+    return candidate_id, fold_id, _score(y_valid, y_pred), time.perf_counter() - t0
+
+
+def successive_halving(
+    model_name: str,
+    candidates: list[dict],
+    max_resource: int,
+    n_folds: int,
+    executor,
+    halving_factor: int = config.TUNING_HALVING_FACTOR,
+    console: Console | None = None,
+) -> tuple[dict, pd.DataFrame]:
+    """
+    Successive Halving: alle Kandidaten starten mit wenigen Bäumen, nach jeder Runde
+    überlebt nur das beste 1/halving_factor, dafür mit halving_factor-mal mehr Bäumen.
+    Alle (Kandidat, Fold)-Trials einer Runde laufen gleichzeitig im Prozess-Pool.
+    """
+    console = console or Console()
+    n_rungs = max(1, math.ceil(math.log(len(candidates), halving_factor)) + 1) if len(candidates) > 1 else 1
+    alive = list(range(len(candidates)))
+    history = []
+
+    for rung in range(n_rungs):
+        resource = max(1, max_resource // halving_factor ** (n_rungs - 1 - rung))
+        tasks = [
+            (model_name, cid, candidates[cid], resource, fold_id)
+            for cid in alive
+            for fold_id in range(n_folds)
+        ]
+        t0 = time.perf_counter()
+        results = list(executor.map(_run_trial, tasks))
+        elapsed = time.perf_counter() - t0
+
+        scores = {}
+        for cid, fold_id, score, seconds in results:
+            scores.setdefault(cid, []).append(score)
+            history.append({
+                "model": model_name, "rung": rung, "candidate": cid, "fold": fold_id,
+                "resource": resource, "score": score, "seconds": seconds,
+            })
+        mean_scores = {cid: float(np.mean(s)) for cid, s in scores.items()}
+        console.print(
+            f"   [{model_name}] Runde {rung + 1}/{n_rungs}: {len(alive)} Kandidat(en) x {n_folds} Folds "
+            f"mit {resource} Bäumen, bester Score {min(mean_scores.values()):.4f} ({elapsed:.1f}s)"
+        )
+
+        if rung < n_rungs - 1:
+            n_keep = max(1, len(alive) // halving_factor)
+            alive = sorted(alive, key=mean_scores.get)[:n_keep]
+
+    best_id = min(alive, key=mean_scores.get)
+    best = {"params": candidates[best_id], "cv_score": mean_scores[best_id], "resource": resource}
+    return best, pd.DataFrame(history)
+
+
+def tune_models(
+    data_featured: pd.DataFrame,
+    model_names: list[str] = ("rf", "xgb"),
+    n_candidates: int = config.TUNING_CANDIDATES,
+    n_folds: int = config.TUNING_FOLDS,
+    valid_days: int = config.TUNING_VALID_DAYS,
+    n_workers: int = config.TUNING_WORKERS,
+    console: Console | None = None,
+) -> tuple[dict, pd.DataFrame]:
+    """Tunt die Modelle mit zeitlicher Cross-Validation auf den Trainingsdaten (ohne Testzeitraum)."""
+    console = console or Console()
+    # Testzeitraum wie in split_data abschneiden, damit das Tuning nicht auf den Testdaten optimiert
+    train_part = data_featured.iloc[:-config.TEST_PERIOD_DAYS]
+    features_cols, target_cols = get_feature_target_columns(train_part)
+    X = train_part[features_cols].to_numpy(dtype=np.float32)
+    y = train_part[target_cols].to_numpy(dtype=np.float32)
+
+    folds = make_cv_folds(len(train_part), n_folds, valid_days)
+    console.print(
+        f"   {len(train_part)} Trainingszeilen, {n_folds} Folds à {valid_days} Tage, {n_workers} Prozess(e)"
+    )
+
+    search = {
+        "rf": (config.RF_SEARCH_SPACE, config.RF_PARAMETER["n_estimators"]),
+        "xgb": (config.XGB_SEARCH_SPACE, config.XGB_PARAMETER["n_estimators"]),
+    }
+    tuned = {}
+    histories = []
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(X, y, folds, config.RF_PARAMETER, config.XGB_PARAMETER),
+    ) as executor:
+        for model_name in model_names:
+            space, max_resource = search[model_name]
+            candidates = sample_candidates(space, n_candidates, config.RANDOM_STATE)
+            best, history = successive_halving(
+                model_name, candidates, max_resource, len(folds), executor, console=console
+            )
+            tuned[model_name] = best
+            histories.append(history)
+
+    tuned["tuned_at"] = datetime.now().isoformat()
+    tuned["features_cols"] = features_cols
+    return tuned, pd.concat(histories, ignore_index=True)
+
+
+def print_tuned_parameters(tuned: dict, model_names: list[str], console: Console):
+    table = Table(title="Beste Parameter")
+    table.add_column("Modell")
+    table.add_column("CV-Score (RMSE/σ)", justify="right")
+    table.add_column("Parameter")
+    for model_name in model_names:
+        table.add_row(model_name, f"{tuned[model_name]['cv_score']:.4f}", str(tuned[model_name]["params"]))
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter-Tuning mit zeitlicher CV und Successive Halving.")
+    parser.add_argument("--models", nargs="+", choices=["rf", "xgb"], default=["rf", "xgb"])
+    parser.add_argument("--candidates", type=int, default=config.TUNING_CANDIDATES)
+    parser.add_argument("--folds", type=int, default=config.TUNING_FOLDS)
+    parser.add_argument("--valid-days", type=int, default=config.TUNING_VALID_DAYS)
+    parser.add_argument("--workers", type=int, default=config.TUNING_WORKERS)
+    parser.add_argument("--output", default=config.TUNED_PARAMS_PATH)
+    args = parser.parse_args()
+
+    console = Console()
+    console.rule("[bold purple4]Hyperparameter-Tuning[/bold purple4]")
+
+    from dataset import load_featured_data
+    from climatology import load_climatology
+    from model_registry import current_model_dir
+    # dieselben Anomalie-Features wie die aktuellen Modelle
+    data_featured = load_featured_data(console, load_climatology(current_model_dir(config.MODEL_SAVE_DIR)))
+    if data_featured is None:
+        console.print("[bold red]Keine Daten für das Tuning verfügbar. Breche ab.[/bold red]")
+        sys.exit(1)
+
+    console.rule("[orange1]Tuning[/orange1]")
+    tuned, _ = tune_models(
+        data_featured,
+        model_names=args.models,
+        n_candidates=args.candidates,
+        n_folds=args.folds,
+        valid_days=args.valid_days,
+        n_workers=args.workers,
+        console=console,
+    )
+
+    print_tuned_parameters(tuned, args.models, console)
+
+    if not save_tuned_parameters(tuned, args.output):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,25 @@ import numpy as np
 import sys
 import os
 import json
+import time
+import argparse
+import threading
 from datetime import datetime, timedelta, date
 
 import config
 from data_collection import get_weather_data
 from feature_engineering import engineer_features
 from model_manager import load_model
+from flat_trees import load_flat_models
+from multistep_forecast import recursive_forecast, horizon_to_json
+from prediction_intervals import load_calibration, predict_intervals, intervals_to_json
+from climatology import load_climatology, climatology_values
 from rich.console import Console
 
 console = Console()
 
-def get_latest_features_for_tomorrow():
-    """Holt die neuesten Daten und erstellt Features für die morgige Vorhersage."""
-    console.print("[cyan]Hole neueste Daten für Feature-Erstellung...[/cyan]")
+def fetch_latest_data() -> pd.DataFrame | None:
+    """Holt die Rohdaten der letzten LAG_DAYS + 10 Tage (bis heute) und füllt Lücken; None bei Fehlern."""
     # Daten bis HEUTE holen, damit der letzte Feature-Tag GESTERN ist
     # (oder vorgestern, wenn heute noch nicht verfügbar/verarbeitet)
     fetch_end_date = date.today() + timedelta(days=1) # Ende ist morgen früh
@@ -39,7 +45,7 @@ def get_latest_features_for_tomorrow():
         )
         if data_raw.empty:
              console.print("[red]   FEHLER: Keine Rohdaten erhalten.[/red]")
-             return None, None
+             return None
         console.print("[green]   ✔️ Rohdaten geholt.[/green]")
 
         # --- Preprocessing ---
@@ -49,18 +55,33 @@ def get_latest_features_for_tomorrow():
              data_raw.dropna(inplace=True)
              if data_raw.empty:
                   console.print("[red]   FEHLER: Keine Daten nach dropna.[/red]")
-                  return None, None
+                  return None
+        return data_raw
+
+    except Exception as e:
+        console.print(f"[red]   FEHLER beim Holen der Rohdaten: {e}[/red]")
+        console.print_exception(show_locals=False)
+        return None
+
 
+def features_from_data(data_raw: pd.DataFrame, climatology: dict | None = None):
+    """
+    Feature-Zeile des letzten vollständigen Tages -> (features, features_cols, Datum) oder (None, None, None).
+
+    climatology: climatology.json der Modelle (load_climatology); deren Anomalie-Spalten gehören zu den Features.
+    """
+    try:
         # --- Feature Engineering ---
         data_featured = engineer_features(
             data=data_raw,
             target_cols=config.TARGET_COLUMNS,
             target_base_cols=config.ORIGINAL_TARGET_BASE_COLUMNS,
-            lag_days=config.LAG_DAYS
+            lag_days=config.LAG_DAYS,
+            climatology=climatology,
         )
         if data_featured is None or data_featured.empty:
             console.print("[red]   FEHLER: Keine Features nach Engineering.[/red]")
-            return None, None
+            return None, None, None
 
         # --- Letzte Zeile holen (Basis für Vorhersage) ---
         last_row = data_featured.iloc[-1:]
@@ -75,60 +96,100 @@ def get_latest_features_for_tomorrow():
         if features_for_prediction.isnull().sum().sum() > 0:
             console.print("[red]   FEHLER: NaNs in finalen Features für Vorhersage.[/red]")
             console.print(features_for_prediction.isnull().sum())
-            return None, None
+            return None, None, None
 
         console.print("[green]   ✔️ Features für Vorhersage extrahiert.[/green]")
         # WICHTIG: Wir geben hier auch das Datum der Features zurück
         return features_for_prediction, features_cols, last_data_date
 
     except Exception as e:
-        console.print(f"[red]   FEHLER beim Holen/Erstellen der Features: {e}[/red]")
+        console.print(f"[red]   FEHLER beim Erstellen der Features: {e}[/red]")
         console.print_exception(show_locals=False)
         return None, None, None
 
 
-def run_prediction_and_save():
-    """Lädt Modelle, macht Vorhersage für MORGEN basierend auf letzten Features und speichert als JSON."""
-    console.rule("[bold blue]Starte tägliches Vorhersage-Update[/bold blue]")
+def get_latest_features_for_tomorrow(climatology: dict | None = None):
+    """Holt die neuesten Daten und erstellt Features für die morgige Vorhersage."""
+    console.print("[cyan]Hole neueste Daten für Feature-Erstellung...[/cyan]")
+    data_raw = fetch_latest_data()
+    if data_raw is None:
+        return None, None, None
+    return features_from_data(data_raw, climatology)
 
-    # --- Modelle laden ---
-    console.print("\n[cyan]Lade Modelle...[/cyan]")
-    rf_model_path = os.path.join(config.MODEL_SAVE_DIR, 'rf_model.joblib')
-    xgb_model_path = os.path.join(config.MODEL_SAVE_DIR, 'xgb_model.joblib')
-    rf_model = load_model(rf_model_path, console)
-    xgb_model = load_model(xgb_model_path, console)
-    if rf_model is None or xgb_model is None:
-        console.print("[red]FEHLER: Mindestens ein Modell konnte nicht geladen werden. Abbruch.[/red]")
-        sys.exit(1)
-    console.print("[green]   ✔️ Modelle geladen.[/green]")
-    models = {'rf': rf_model, 'xgb': xgb_model}
 
-    # --- Neueste Features holen ---
-    console.print("\n[cyan]Hole neueste verfügbare Features...[/cyan]")
-    # Funktion gibt jetzt auch das Datum der Features zurück
-    features_for_prediction, features_cols, last_feature_date = get_latest_features_for_tomorrow()
-    if features_for_prediction is None:
-        console.print("[red]FEHLER: Features konnten nicht erstellt werden. Abbruch.[/red]")
-        sys.exit(1)
+def save_feature_cache(features_for_prediction: pd.DataFrame, last_feature_date: date,
+                       filepath: str = config.FEATURE_CACHE_PATH) -> bool:
+    """Speichert die Feature-Zeile (Rückfall, wenn der nächste Abruf scheitert oder zu lange dauert)."""
+    cache = {
+        "feature_date": last_feature_date.strftime("%Y-%m-%d"),
+        "columns": list(features_for_prediction.columns),
+        "values": [float(v) for v in features_for_prediction.iloc[-1]],
+        "saved_at": datetime.now().isoformat(),
+    }
+    try:
+        with open(f"{filepath}.tmp", "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(f"{filepath}.tmp", filepath)
+        return True
+    except Exception as e:
+        console.print(f"[yellow]   Features nicht zwischengespeichert: {e}[/yellow]")
+        return False
 
-    # --- Vorhersage machen ---
-    # Das Zieldatum ist der Tag NACH dem Datum der Features
-    prediction_target_date = last_feature_date + timedelta(days=1)
-    console.print(f"\n[cyan]Mache Vorhersage für: [bold green]{prediction_target_date}[/bold green] (basierend auf Daten vom {last_feature_date})[/cyan]")
 
+def load_feature_cache(filepath: str = config.FEATURE_CACHE_PATH, max_age_days: int = config.FEATURE_CACHE_MAX_AGE_DAYS):
+    """Zwischengespeicherte Feature-Zeile -> (features, features_cols, Datum) oder (None, None, None), wenn zu alt."""
+    if not os.path.exists(filepath):
+        return None, None, None
+    try:
+        with open(filepath) as f:
+            cache = json.load(f)
+        last_feature_date = date.fromisoformat(cache["feature_date"])
+    except Exception as e:
+        console.print(f"[yellow]   Zwischengespeicherte Features nicht lesbar: {e}[/yellow]")
+        return None, None, None
+    if (date.today() - last_feature_date).days > max_age_days:
+        console.print(f"[yellow]   Zwischengespeicherte Features vom {last_feature_date} sind älter als {max_age_days} Tage.[/yellow]")
+        return None, None, None
+    features_for_prediction = pd.DataFrame(
+        [cache["values"]], columns=cache["columns"], index=pd.DatetimeIndex([last_feature_date], name="time")
+    )
+    return features_for_prediction, cache["columns"], last_feature_date
+
+
+def load_models(model_dir: str = config.MODEL_SAVE_DIR) -> dict | None:
+    """
+    Lädt RF- und XGB-Modell; gibt None zurück, wenn eines fehlt.
+
+    Bevorzugt die flachen Baummodelle (flat_models.mfa), solange sie aus den joblib-Dateien daneben erstellt wurden
+    (SHA-256 im Header). Dann werden weder sklearn noch xgboost importiert.
+    """
+    flat_path = os.path.join(model_dir, 'flat_models.mfa')
+    if os.path.exists(flat_path):
+        flat_models = load_flat_models(flat_path, source_dir=model_dir)
+        if flat_models is not None and {'rf', 'xgb'} <= set(flat_models):
+            console.print(f"\nFlache Baummodelle geladen von: {flat_path}")
+            return {'rf': flat_models['rf'], 'xgb': flat_models['xgb']}
+
+    rf_model = load_model(os.path.join(model_dir, 'rf_model.joblib'), console)
+    xgb_model = load_model(os.path.join(model_dir, 'xgb_model.joblib'), console)
+    if rf_model is None or xgb_model is None:
+        return None
+    return {'rf': rf_model, 'xgb': xgb_model}
+
+
+def predict_values(models: dict, features_for_prediction: pd.DataFrame, target_cols: list = config.TARGET_COLUMNS) -> dict:
+    """Vorhersage aller Modelle für eine Feature-Zeile -> {model_name: {'temp': float|None, 'wspd': float|None}}."""
     predictions_output = {}
-    target_cols = config.TARGET_COLUMNS
-    # --- Vorhersage-Schleife ---
+    tavg_idx = target_cols.index('tavg_target') if 'tavg_target' in target_cols else -1
+    wspd_idx = target_cols.index('wspd_target') if 'wspd_target' in target_cols else -1
+    features_np = features_for_prediction.to_numpy()
     for model_name, model in models.items():
          console.print(f"--- Verarbeite Vorhersage für: [bold]{model_name}[/bold] ---")
          temp_processed: float | None = None
          wind_processed: float | None = None
          try:
-             features_np = features_for_prediction.to_numpy()
              prediction = model.predict(features_np)
              if prediction.ndim == 1: prediction = prediction.reshape(1, -1)
-             tavg_idx = target_cols.index('tavg_target') if 'tavg_target' in target_cols else -1
-             wspd_idx = target_cols.index('wspd_target') if 'wspd_target' in target_cols else -1
              temp_raw = prediction[0, tavg_idx] if tavg_idx != -1 and tavg_idx < prediction.shape[1] else None
              wind_raw = prediction[0, wspd_idx] if wspd_idx != -1 and wspd_idx < prediction.shape[1] else None
              if temp_raw is not None:
@@ -142,10 +203,34 @@ def run_prediction_and_save():
          except Exception as e:
              console.print(f"[bold red]   FEHLER bei Vorhersage mit {model_name}: {e}[/bold red]")
              predictions_output[model_name] = {'temp': None, 'wspd': None}
+    return predictions_output
 
-    console.print("[green]   ✔️ Vorhersage-Loop abgeschlossen.[/green]")
 
-    # --- Daten für JSON aufbereiten ---
+def predict_horizon(models: dict, features_for_prediction: pd.DataFrame, last_feature_date: date,
+                    climatology: dict | None = None) -> list | None:
+    """Mehrtagesvorhersage (FORECAST_HORIZON_DAYS) im Format von prediction.json['horizon']; None bei Fehlern."""
+    try:
+        result = recursive_forecast(
+            models, features_for_prediction, list(features_for_prediction.columns), last_feature_date,
+            climatology=climatology,
+        )
+        return horizon_to_json(result)
+    except Exception as e:
+        console.print(f"[bold red]   FEHLER bei der Mehrtagesvorhersage: {e}[/bold red]")
+        return None
+
+
+def build_output_data(
+    prediction_target_date: date,
+    predictions_output: dict,
+    horizon: list | None = None,
+    intervals: dict | None = None,
+) -> dict:
+    """
+    Bringt die Vorhersagen in das Format von prediction.json (die Schlüssel für morgen bleiben unverändert).
+
+    intervals: Ausgabe von prediction_intervals.intervals_to_json, landet unter "intervals".
+    """
     output_data = {
         "forecast_date": prediction_target_date.strftime("%Y-%m-%d"), # Tag nach den Features
         "rf_temp_c": predictions_output.get('rf', {}).get('temp'),
@@ -154,24 +239,331 @@ def run_prediction_and_save():
         "xgb_wspd_kmh": predictions_output.get('xgb', {}).get('wspd'),
         "generated_at": datetime.now().isoformat()
     }
-    console.print("\n[bold]Finale Daten für JSON:[/bold]")
-    console.print(output_data)
+    if intervals:
+        output_data["intervals"] = intervals
+    if horizon:
+        output_data["horizon"] = horizon
+    return output_data
 
-    # --- JSON Speichern ---
-    json_filepath = "prediction.json"
+
+def predict_intervals_json(models: dict, features_for_prediction: pd.DataFrame, predictions_output: dict,
+                           calibration: dict | None) -> dict | None:
+    """Intervalle für morgen im Format von prediction.json['intervals']; None bei Fehlern."""
+    try:
+        intervals, latency_ms = predict_intervals(models, features_for_prediction, predictions_output, calibration)
+    except Exception as e:
+        console.print(f"[bold red]   FEHLER bei den Vorhersageintervallen: {e}[/bold red]")
+        return None
+    coverage = calibration["coverage"] if calibration else config.PREDICTION_INTERVAL_COVERAGE
+    if calibration is None:
+        console.print("[yellow]   Keine Intervall-Kalibrierung (intervals.json) gefunden, nur RF-Intervalle.[/yellow]")
+    console.print(f"   Intervalle ({coverage:.0%}) in {latency_ms:.2f} ms zusätzlich berechnet.")
+    return intervals_to_json(intervals, coverage, latency_ms)
+
+
+def save_prediction(output_data: dict, json_filepath: str = "prediction.json") -> bool:
+    """Schreibt die Vorhersage als JSON (Zahlen auf eine Nachkommastelle); False bei Fehlern."""
     console.print(f"\n[cyan]Speichere Vorhersage in '{json_filepath}'...[/cyan]")
     try:
         with open(json_filepath, 'w') as f:
             json.dump(output_data, f, indent=2, default=lambda x: round(x, 1) if isinstance(x, (float, int)) else None)
         console.print(f"[green]   ✔️ Vorhersage erfolgreich in '{json_filepath}' gespeichert.[/green]")
+        return True
     except Exception as e:
         console.print(f"[red]   FEHLER beim Speichern der JSON-Datei: {e}[/red]")
+        return False
+
+
+def forecast_output(models: dict, features_for_prediction: pd.DataFrame, last_feature_date: date,
+                    calibration: dict | None, climatology: dict | None = None) -> dict:
+    """Vorhersage für den Tag nach last_feature_date mit Intervallen und Mehrtagesvorhersage (Format von prediction.json)."""
+    # Das Zieldatum ist der Tag NACH dem Datum der Features
+    prediction_target_date = last_feature_date + timedelta(days=1)
+    console.print(f"\n[cyan]Mache Vorhersage für: [bold green]{prediction_target_date}[/bold green] (basierend auf Daten vom {last_feature_date})[/cyan]")
+
+    predictions_output = predict_values(models, features_for_prediction, config.TARGET_COLUMNS)
+    console.print("[green]   ✔️ Vorhersage-Loop abgeschlossen.[/green]")
+    intervals = predict_intervals_json(models, features_for_prediction, predictions_output, calibration)
+
+    console.print(f"\n[cyan]Mehrtagesvorhersage für {config.FORECAST_HORIZON_DAYS} Tage...[/cyan]")
+    horizon = predict_horizon(models, features_for_prediction, last_feature_date, climatology)
+    return build_output_data(prediction_target_date, predictions_output, horizon, intervals)
+
+
+def run_prediction_and_save(deadline_seconds: float | None = None):
+    """
+    Lädt Modelle, macht Vorhersage für MORGEN basierend auf letzten Features und speichert als JSON.
+
+    Mit deadline_seconds läuft stattdessen run_prediction_with_deadline (kein Abbruch, Rückfallstufen).
+    """
+    if deadline_seconds is not None:
+        if run_prediction_with_deadline(deadline_seconds) is None:
+            sys.exit(1)
+        return
+
+    console.rule("[bold blue]Starte tägliches Vorhersage-Update[/bold blue]")
+
+    # --- Modelle laden ---
+    console.print("\n[cyan]Lade Modelle...[/cyan]")
+    from model_registry import current_model_dir
+    model_dir = current_model_dir(config.MODEL_SAVE_DIR) # alle Dateien aus derselben Version
+    models = load_models(model_dir)
+    if models is None:
+        console.print("[red]FEHLER: Mindestens ein Modell konnte nicht geladen werden. Abbruch.[/red]")
         sys.exit(1)
+    console.print("[green]   ✔️ Modelle geladen.[/green]")
+    climatology = load_climatology(model_dir) # Anomalie-Features, falls die Modelle damit trainiert wurden
+
+    # --- Neueste Features holen ---
+    console.print("\n[cyan]Hole neueste verfügbare Features...[/cyan]")
+    # Funktion gibt jetzt auch das Datum der Features zurück
+    features_for_prediction, features_cols, last_feature_date = get_latest_features_for_tomorrow(climatology)
+    if features_for_prediction is None:
+        console.print("[red]FEHLER: Features konnten nicht erstellt werden. Abbruch.[/red]")
+        sys.exit(1)
+    save_feature_cache(features_for_prediction, last_feature_date)
+
+    # --- Vorhersage machen ---
+    output_data = forecast_output(
+        models, features_for_prediction, last_feature_date, load_calibration(model_dir), climatology
+    )
+    console.print("\n[bold]Finale Daten für JSON:[/bold]")
+    console.print(output_data)
+
+    # --- JSON Speichern ---
+    if not save_prediction(output_data, "prediction.json"):
+        sys.exit(1)
+
+    # --- Historie (prediction.json wird täglich überschrieben) ---
+    from forecast_history import update_history
+    update_history(output_data, features_for_prediction, last_feature_date, console)
 
     console.rule("[bold blue]Update abgeschlossen[/bold blue]")
 
 
+# ----- Zeitbudget und Rückfallstufen -----
+
+def run_with_budget(function, seconds: float, *args):
+    """
+    Führt function(*args) in einem Daemon-Thread aus und wartet höchstens `seconds` Sekunden.
+
+    Returns: (Ergebnis, None) oder (None, Grund). Ein überzogener Aufruf (z.B. ein hängender Abruf) läuft im
+    Hintergrund weiter, hält aber weder den Job noch das Programmende auf.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = function(*args)
+        except Exception as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+
+    thread = threading.Thread(target=target, name=f"budget-{function.__name__}", daemon=True)
+    thread.start()
+    thread.join(max(seconds, 0.0))
+    if thread.is_alive():
+        return None, f"Zeitbudget von {seconds:.0f} s überschritten"
+    if "error" in outcome:
+        return None, outcome["error"]
+    return outcome["result"], None
+
+
+def load_previous_forecast(json_filepath: str = "prediction.json") -> dict | None:
+    """Zuletzt gespeicherte prediction.json; None, wenn es keine (lesbare) gibt."""
+    if not os.path.exists(json_filepath):
+        return None
+    try:
+        with open(json_filepath) as f:
+            previous = json.load(f)
+        date.fromisoformat(previous["forecast_date"])
+        datetime.fromisoformat(previous["generated_at"])
+        return previous
+    except Exception as e:
+        console.print(f"[yellow]   Letzte Vorhersage '{json_filepath}' nicht lesbar: {e}[/yellow]")
+        return None
+
+
+def expected_forecast_date(previous: dict | None, today: date) -> date:
+    """Zieltag dieses Laufs ohne Features: wie beim letzten Lauf, um die seitdem vergangenen Tage verschoben."""
+    if previous is None:
+        return today + timedelta(days=1)
+    issued = datetime.fromisoformat(previous["generated_at"]).date()
+    return date.fromisoformat(previous["forecast_date"]) + timedelta(days=(today - issued).days)
+
+
+def shift_previous_forecast(previous: dict, target_date: date) -> dict | None:
+    """
+    Vorhersage (die letzte gespeicherte oder eine aus zwischengespeicherten Features) für target_date: unverändert,
+    wenn sie schon für diesen Tag war, sonst aus ihrem 'horizon' (ab target_date, ohne die Intervalle, die nur für
+    den ersten Tag gelten). None, wenn der Horizont den Tag nicht abdeckt.
+    """
+    if previous["forecast_date"] == target_date.strftime("%Y-%m-%d"):
+        output_data = {key: value for key, value in previous.items() if key != "degradation"}
+        output_data["generated_at"] = datetime.now().isoformat()
+        return output_data
+    horizon = [entry for entry in previous.get("horizon") or [] if entry["date"] >= target_date.strftime("%Y-%m-%d")]
+    if not horizon or horizon[0]["date"] != target_date.strftime("%Y-%m-%d"):
+        return None
+    predictions_output = {
+        model_name: {'temp': horizon[0].get(f"{model_name}_temp_c"), 'wspd': horizon[0].get(f"{model_name}_wspd_kmh")}
+        for model_name in ('rf', 'xgb')
+    }
+    return build_output_data(target_date, predictions_output, horizon)
+
+
+def climatology_forecast(target_date: date, climatology: dict | None) -> dict | None:
+    """
+    Normalwerte der Klimatologie für target_date und die folgenden Tage, unter den Schlüsseln beider Modelle
+    (damit Webseite und Dienst unverändert funktionieren); mit Perzentilen auch als Intervall. None ohne Klimatologie.
+    """
+    if climatology is None:
+        return None
+    dates = [target_date + timedelta(days=step) for step in range(max(config.FORECAST_HORIZON_DAYS, 1))]
+    units = {'temp': 'temp_c', 'wspd': 'wspd_kmh'}
+    columns = {'temp': 'tavg', 'wspd': 'wspd'}
+
+    def values(key: str, table: str = "normals") -> list:
+        if columns[key] not in climatology["columns"]:
+            return [None] * len(dates)
+        return [None if np.isnan(v) else float(v) for v in climatology_values(climatology, dates, columns[key], table)]
+
+    normals = {key: values(key) for key in units}
+    predictions_output = {model_name: {key: normals[key][0] for key in units} for model_name in ('rf', 'xgb')}
+    horizon = [
+        {"date": day.strftime("%Y-%m-%d"),
+         **{f"{model_name}_{unit}": normals[key][step] for model_name in ('rf', 'xgb') for key, unit in units.items()}}
+        for step, day in enumerate(dates)
+    ]
+    intervals = None
+    percentiles = sorted(climatology.get("percentiles", []))
+    if len(percentiles) >= 2:
+        low, high = percentiles[0], percentiles[-1]
+        intervals = {"coverage": (high - low) / 100, "latency_ms": 0.0}
+        for key, unit in units.items():
+            bounds = [values(key, f"p{low}")[0], values(key, f"p{high}")[0]]
+            if None not in bounds:
+                for model_name in ('rf', 'xgb'):
+                    intervals[f"{model_name}_{unit}"] = bounds
+    return build_output_data(target_date, predictions_output, horizon if config.FORECAST_HORIZON_DAYS > 0 else None, intervals)
+
+
+def run_prediction_with_deadline(
+    deadline_seconds: float = config.DAILY_JOB_DEADLINE_SECONDS,
+    step_budgets: dict | None = None,
+    json_filepath: str = "prediction.json",
+) -> dict | None:
+    """
+    Tägliches Update mit Zeitbudget: schreibt immer eine prediction.json, spätestens nach deadline_seconds.
+
+    Abruf, Features und Vorhersage bekommen je ihr Budget aus DAILY_JOB_STEP_BUDGETS (gekürzt auf die Restzeit
+    abzüglich DAILY_JOB_RESERVE_SECONDS). Scheitert ein Schritt oder überzieht er, wird der Reihe nach auf
+    zwischengespeicherte Features, die letzte gespeicherte Vorhersage und die Klimatologie zurückgegriffen.
+    Die Stufe steht in output_data['degradation']['level']: 'none', 'cached_features', 'last_forecast',
+    'climatology' oder 'unavailable' (nichts davon verfügbar, Werte null). Returns: die gespeicherten Daten oder None, wenn das
+    Schreiben scheitert.
+    """
+    started = time.monotonic()
+    budgets = {**config.DAILY_JOB_STEP_BUDGETS, **(step_budgets or {})}
+    reasons = []
+
+    def budget(step: str) -> float:
+        remaining = deadline_seconds - (time.monotonic() - started) - config.DAILY_JOB_RESERVE_SECONDS
+        return max(0.0, min(budgets[step], remaining))
+
+    console.rule(f"[bold blue]Starte tägliches Vorhersage-Update (Zeitbudget {deadline_seconds:.0f} s)[/bold blue]")
+    level, output_data, model_output = None, None, None
+    features_for_prediction, last_feature_date = None, None
+    # Zieltag ohne neue Features: gilt für zwischengespeicherte Features und alle weiteren Rückfallstufen
+    previous = load_previous_forecast(json_filepath)
+    target_date = expected_forecast_date(previous, date.today())
+
+    console.print("\n[cyan]Lade Modelle...[/cyan]")
+    from model_registry import current_model_dir
+    model_dir = current_model_dir(config.MODEL_SAVE_DIR) # alle Dateien aus derselben Version
+    models = load_models(model_dir)
+    climatology = load_climatology(model_dir) # Anomalie-Features und letzte Rückfallstufe
+    if models is None:
+        reasons.append("Modelle: mindestens ein Modell konnte nicht geladen werden")
+    else:
+        console.print(f"\n[cyan]Hole neueste Daten (Budget {budget('fetch'):.0f} s)...[/cyan]")
+        data_raw, error = run_with_budget(fetch_latest_data, budget('fetch'))
+        if data_raw is None:
+            reasons.append(f"Abruf: {error or 'keine Daten'}")
+        else:
+            features, error = run_with_budget(features_from_data, budget('features'), data_raw, climatology)
+            if features is None or features[0] is None:
+                reasons.append(f"Features: {error or 'keine Features'}")
+            else:
+                features_for_prediction, _, last_feature_date = features
+                save_feature_cache(features_for_prediction, last_feature_date)
+                level = 'none'
+        if features_for_prediction is None:
+            features_for_prediction, _, last_feature_date = load_feature_cache()
+            if features_for_prediction is not None:
+                console.print(f"[yellow]   Verwende zwischengespeicherte Features vom {last_feature_date}.[/yellow]")
+                level = 'cached_features'
+        if features_for_prediction is not None:
+            model_output, error = run_with_budget(
+                forecast_output, budget('predict'), models, features_for_prediction, last_feature_date,
+                load_calibration(model_dir), climatology,
+            )
+            if model_output is None:
+                reasons.append(f"Vorhersage: {error or 'kein Ergebnis'}")
+            elif level == 'cached_features':
+                # alte Features sagen den Tag nach ihrem Datum vorher; veröffentlicht wird der heutige Zieltag
+                output_data = shift_previous_forecast(model_output, target_date)
+                if output_data is None:
+                    reasons.append(f"Zwischengespeicherte Features: Horizont reicht nicht bis {target_date}")
+            else:
+                output_data = model_output
+
+    if output_data is None:
+        if previous is not None:
+            output_data = shift_previous_forecast(previous, target_date)
+            if output_data is not None:
+                # eine fortgeschriebene Klimatologie bleibt Klimatologie
+                previous_level = (previous.get("degradation") or {}).get("level")
+                level = 'climatology' if previous_level == 'climatology' else 'last_forecast'
+                console.print(f"[yellow]   Verwende die letzte Vorhersage vom {previous['generated_at']}.[/yellow]")
+        if output_data is None:
+            output_data = climatology_forecast(target_date, climatology)
+            level = 'climatology'
+            if output_data is not None:
+                console.print("[yellow]   Verwende die Klimatologie (Normalwerte) als Vorhersage.[/yellow]")
+        if output_data is None:
+            console.print("[red]   Keine Rückfallstufe verfügbar, schreibe leere Vorhersage.[/red]")
+            output_data, level = build_output_data(target_date, {}), 'unavailable'
+
+    output_data["degradation"] = {
+        "level": level,
+        "reasons": reasons,
+        "feature_date": last_feature_date.strftime("%Y-%m-%d") if level in ('none', 'cached_features') else None,
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    if level != 'none':
+        console.print(f"[yellow]   Stufe '{level}': {'; '.join(reasons) or 'siehe oben'}[/yellow]")
+    console.print("\n[bold]Finale Daten für JSON:[/bold]")
+    console.print(output_data)
+
+    if not save_prediction(output_data, json_filepath):
+        return None
+    if level in ('none', 'cached_features'):
+        # in die Historie mit dem Feature-Tag, von dem aus vorhergesagt wurde (Vorlauf ab forecast_date - 1)
+        from forecast_history import update_history
+        update_history(model_output, features_for_prediction, last_feature_date, console)
+
+    console.rule(f"[bold blue]Update abgeschlossen in {time.monotonic() - started:.1f} s (Stufe '{level}')[/bold blue]")
+    return output_data
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tägliches Vorhersage-Update (schreibt prediction.json).")
+    parser.add_argument("--deadline", type=float, default=config.DAILY_JOB_DEADLINE_SECONDS,
+                        help="Zeitbudget in Sekunden; der Job schreibt immer eine Vorhersage (Rückfallstufen)")
+    parser.add_argument("--no-deadline", action="store_true", help="ohne Zeitbudget, Abbruch bei Fehlern")
+    args = parser.parse_args()
+    deadline_seconds = None if args.no_deadline else args.deadline
+
     # --- Modell-Verzeichnis-Check (bleibt gleich) ---
     if not hasattr(config, 'MODEL_SAVE_DIR') or not os.path.isdir(config.MODEL_SAVE_DIR):
          script_dir = os.path.dirname(__file__)
@@ -182,6 +574,7 @@ if __name__ == "__main__":
          else:
              abs_model_dir = getattr(config, 'MODEL_SAVE_DIR', 'saved_models')
              console.print(f"[red]FEHLER: Modell-Verzeichnis nicht gefunden. Erwartet unter '{abs_model_dir}' oder relativ als '../saved_models'[/red]")
-             sys.exit(1)
+             if deadline_seconds is None:
+                 sys.exit(1)
 
-    run_prediction_and_save()
\ No newline at end of file
+    run_prediction_and_save(deadline_seconds)